@@ -0,0 +1,77 @@
+import asyncio
+import hmac
+import logging
+import os
+import threading
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from services.configs.config import settings
+from utils.profiling.profiling_utils import SamplingProfiler
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Router setup
+admin_router = APIRouter()
+
+# Only one profile runs per worker at a time
+_profile_lock = asyncio.Lock()
+
+
+def check_admin_token(token: Optional[str]):
+    """
+    Rejects admin requests without the configured token.
+
+    Args:
+        token (Optional[str]): The X-Admin-Token header.
+
+    Raises:
+        HTTPException: 503 if no ADMIN_TOKEN is configured, 403 if the token is wrong.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin token not configured.")
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@admin_router.post("/admin/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval: float = Query(0.005, ge=0.001, le=1.0),
+    all_threads: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Endpoint profiling the worker that serves it with a sampling profiler.
+
+    Stacks of the event loop thread (or of every thread) are sampled while the
+    worker keeps serving requests, and returned in the folded format for
+    flamegraph.pl or speedscope. Work in the process pool is not sampled.
+
+    Args:
+        seconds (float): How long to profile, at most PROFILE_MAX_SECONDS.
+        interval (float): Seconds between samples.
+        all_threads (bool): Whether to sample executor threads too.
+        x_admin_token (Optional[str]): The admin token.
+
+    Returns:
+        PlainTextResponse: Folded stacks, with the worker's pid in X-Worker-Pid.
+    """
+    check_admin_token(x_admin_token)
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running.")
+
+    async with _profile_lock:
+        seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+        profiler = SamplingProfiler(
+            interval, () if all_threads else (threading.get_ident(),)
+        )
+        logger.info(f"Profiling worker {os.getpid()} for {seconds}s.")
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    return PlainTextResponse(
+        profiler.folded(), headers={"X-Worker-Pid": str(os.getpid())}
+    )
@@ -1,14 +1,40 @@
 import logging
-import json
-from fastapi import APIRouter, HTTPException, Depends
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
 from redis.asyncio import Redis
+from api.admin import check_admin_token
+from exceptions.excpetions import (
+    BudgetExceededError,
+    CircuitOpenError,
+    ClientDisconnectedError,
+    DeadlineExceededError,
+    OverloadedError,
+    QuotaExceededError,
+)
 from models.request_models import ReviewRequest, ReviewResponse
-from services.github.github_access import fetch_repository_contents
-from services.review.review_service import generate_review
+from models.storage_models import ReviewHistoryPage
+from models.usage_models import UsageReport
+from services.accounting.usage_ledger import read_usage, usage_period
+from services.configs.config import settings
+from services.review.review_pipeline import (
+    CACHE_STALE,
+    find_stale_review,
+    run_review_pipeline,
+    set_cache_headers,
+)
+from services.routing.model_router import get_route_metrics
+from services.storage.review_store import MAX_PAGE_SIZE, ReviewStore, get_review_store
+from utils.admission.admission_utils import (
+    authenticated_tenant,
+    client_identity,
+    get_admission_controller,
+)
+from utils.deadline.deadline_utils import Deadline, run_until_disconnected
+from utils.github.github_utils import normalize_repo_url
 from utils.redis_cache.redis_utils import get_redis_client
-from utils.logging_config.logging_config import logging_config
+from utils.resilience.resilience_utils import get_resilience_metrics
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("CodeReviewAI")
 
 # Router setup
@@ -16,81 +42,212 @@ review_router = APIRouter()
 
 
 @review_router.post("/review", response_model=ReviewResponse)
-async def review_code(request: ReviewRequest, redis: Redis = Depends(get_redis_client)):
+async def review_code(
+    request: ReviewRequest,
+    http_request: Request,
+    http_response: Response,
+    redis: Redis = Depends(get_redis_client),
+    store: ReviewStore = Depends(get_review_store),
+):
     """
     Endpoint to review code from a GitHub repository.
 
-    Steps:
-    1. Fetch repository contents from GitHub.
-    2. Check Redis cache for an existing review.
-    3. Generate a new review if no cached response is found.
-    4. Cache the generated review and return it.
+    The request deadline comes from the X-Request-Timeout or X-Request-Deadline
+    header, or REQUEST_TIMEOUT. All work is cancelled when the deadline passes or
+    the client disconnects.
+
+    With API_KEYS set, requests need a tenant's API key and get 401 without one;
+    otherwise clients are told apart by their address.
+
+    Cached reviews are always served. Requests that need a new review count
+    against the client's quota and daily budget and wait for one of this worker's
+    in-flight slots; they are rejected with 429 or 503 and a Retry-After header
+    when none is left.
+    While GitHub or every LLM provider is down, the newest stored review of any
+    commit is served with a Warning header, or 503 if there is none.
+
+    X-Cache (HIT, STALE or MISS), Age and Cache-Status headers tell the client
+    whether the review came from the cache and how old it is.
+
+    With RECORD_REQUESTS_PATH set, requests are recorded anonymized for replay.
 
     Args:
         request (ReviewRequest): The incoming request payload containing GitHub repo URL and candidate level.
+        http_request (Request): The raw HTTP request, used for headers and disconnects.
+        http_response (Response): The response, for headers of stale reviews.
         redis (Redis): Redis client dependency for caching.
+        store (ReviewStore): Review store dependency for durable storage.
 
     Returns:
-        ReviewResponse: The review results.
+        Union[ReviewResponse, Response]: The review results; cache hits are
+        a response carrying the cached JSON as is.
     """
+    deadline = Deadline.from_headers(http_request.headers)
+    client_id = client_identity(http_request)
+    if client_id is None:
+        raise HTTPException(status_code=401, detail="Missing or unknown API key.")
     try:
-        # Step 1: Fetch repository contents and generate a unique cache key
-        logger.info(f"Fetching repository contents for {request.github_repo_url}.")
-        repo_contents = await fetch_repository_contents(request.github_repo_url)
-        cache_key = f"review:{request.github_repo_url}:{request.candidate_level}"
-
-        # Step 2: Check Redis cache for existing review
-        logger.info(f"Checking cache for key: {cache_key}")
-        cached_response = await redis.get(cache_key)
-        if cached_response:
-            logger.info(f"Cache hit for key: {cache_key}")
-            try:
-                # Parse the cached response into a ReviewResponse object
-                cached_review = ReviewResponse.parse_raw(cached_response)
-                return cached_review
-            except Exception as e:
-                logger.error(f"Failed to parse cached response: {e}")
-                # Remove corrupted cache if parsing fails
-                await redis.delete(cache_key)
-
-        # Step 3: Generate a new review if no cache exists
-        logger.info("Cache miss. Generating a new review.")
-        review = await generate_review(request, repo_contents)
-        logger.info(f"Generated review: {review}")
-
-        # Validate and format the generated review
-        if isinstance(review, ReviewResponse):
-            # Ensure all fields are populated with default values if missing
-            review = ReviewResponse(
-                found_files=review.found_files or [],
-                downsides=review.downsides or "",
-                rating=review.rating or "",
-                conclusion=review.conclusion or "",
+        return await run_until_disconnected(
+            run_review_pipeline(
+                request, redis, store, deadline, client_id, http_response, record=True
+            ),
+            http_request,
+        )
+    except (BudgetExceededError, QuotaExceededError) as e:
+        label = http_request.headers.get(settings.CLIENT_ID_HEADER)
+        logger.info(
+            f"Review of {request.github_repo_url} for {client_id}"
+            f"{f' ({label})' if label else ''} rejected: {e.message}"
+        )
+        raise HTTPException(
+            status_code=429,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except CircuitOpenError as e:
+        stale_record = await find_stale_review(request, store)
+        if stale_record:
+            logger.warning(f"Serving a stale review of {request.github_repo_url}.")
+            set_cache_headers(
+                http_response,
+                CACHE_STALE,
+                max(time.time() - stale_record.created_at, 0.0),
+                detail=f"{e.dependency} unavailable",
             )
-            review_json = review.json()
-
-        elif isinstance(review, str):
-            # Validate the review string as JSON
-            try:
-                json.loads(review)  # Check if valid JSON
-                review_json = review
-            except json.JSONDecodeError:
-                raise ValueError("Invalid JSON string received from generate_review.")
-        else:
-            raise TypeError("Unsupported type for the review object.")
-
-        # Step 4: Cache the generated review for 1 hour
-        await redis.set(cache_key, review_json, ex=3600)
-        logger.info(f"Cached review for key: {cache_key}")
-        return ReviewResponse.parse_raw(review_json)
-
-    except HTTPException as e:
-        logger.error(f"HTTP exception occurred: {e.detail}")
-        raise e
-
-    except Exception as e:
-        # Log unexpected errors and raise a 500 Internal Server Error
-        logger.exception("Unexpected error occurred during review generation.")
+            return stale_record.review
+        raise HTTPException(
+            status_code=503,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except OverloadedError as e:
         raise HTTPException(
-            status_code=500, detail=f"An unexpected error occurred: {str(e)}"
+            status_code=503,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)},
         )
+    except DeadlineExceededError as e:
+        logger.warning(f"Review of {request.github_repo_url} timed out: {e.message}")
+        raise HTTPException(status_code=504, detail=e.message)
+    except ClientDisconnectedError as e:
+        logger.info(f"Review of {request.github_repo_url} cancelled: {e.message}")
+        raise HTTPException(status_code=499, detail=e.message)
+
+
+@review_router.get("/metrics/routes")
+async def route_metrics():
+    """
+    Endpoint exposing per-route latency and cost metrics for this worker.
+
+    Returns:
+        dict: Metrics keyed by route name.
+    """
+    return get_route_metrics()
+
+
+@review_router.get("/metrics/admission")
+async def admission_metrics():
+    """
+    Endpoint exposing this worker's in-flight, queued and rejected review counts.
+
+    Returns:
+        dict: Admission control metrics.
+    """
+    return get_admission_controller().metrics()
+
+
+@review_router.get("/metrics/dependencies")
+async def dependency_metrics():
+    """
+    Endpoint exposing this worker's circuit breaker states and hedged requests.
+
+    Returns:
+        dict: Breaker metrics by dependency, and hedged request counts.
+    """
+    return get_resilience_metrics()
+
+
+@review_router.get("/usage", response_model=UsageReport)
+async def usage_report(
+    http_request: Request,
+    tenant: Optional[str] = None,
+    candidate_id: Optional[str] = None,
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    x_admin_token: Optional[str] = Header(None),
+    redis: Redis = Depends(get_redis_client),
+    store: ReviewStore = Depends(get_review_store),
+):
+    """
+    Endpoint reporting a day's tokens, LLM cost, GitHub calls and cache tier hits.
+
+    Totals are shared by all workers, and lag behind by up to USAGE_FLUSH_INTERVAL.
+    The admin token (X-Admin-Token) reads any totals. A tenant's API key reads
+    only that tenant's totals.
+
+    Args:
+        http_request (Request): The raw HTTP request, for the API key.
+        tenant (Optional[str]): Only reviews served to this client.
+        candidate_id (Optional[str]): Only reviews of this candidate.
+        period (Optional[str]): UTC day as YYYY-MM-DD; today if not provided.
+        x_admin_token (Optional[str]): The admin token.
+        redis (Redis): Redis client dependency.
+        store (ReviewStore): Review store dependency, for totals no longer in Redis.
+
+    Returns:
+        UsageReport: The usage totals.
+    """
+    if not settings.ADMIN_TOKEN and not settings.API_KEYS:
+        raise HTTPException(
+            status_code=503, detail="Neither admin token nor API keys configured."
+        )
+    if x_admin_token:
+        check_admin_token(x_admin_token)
+    else:
+        own_tenant = authenticated_tenant(http_request)
+        if own_tenant is None:
+            raise HTTPException(status_code=401, detail="Missing or unknown API key.")
+        if candidate_id or (tenant and tenant != own_tenant):
+            raise HTTPException(
+                status_code=403, detail="API keys only read their own tenant's usage."
+            )
+        tenant = own_tenant
+
+    if candidate_id:
+        scope, scope_id = "candidate", candidate_id
+    elif tenant:
+        scope, scope_id = "tenant", tenant
+    else:
+        scope, scope_id = "total", "all"
+    return await read_usage(redis, store, period or usage_period(), scope, scope_id)
+
+
+@review_router.get("/reviews", response_model=ReviewHistoryPage)
+async def review_history(
+    repo_url: Optional[str] = None,
+    candidate_id: Optional[str] = None,
+    candidate_level: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    store: ReviewStore = Depends(get_review_store),
+):
+    """
+    Endpoint listing past reviews for a repository or a candidate, newest first.
+
+    Args:
+        repo_url (Optional[str]): Only reviews of this repository.
+        candidate_id (Optional[str]): Only reviews of this candidate.
+        candidate_level (Optional[str]): Only reviews at this level.
+        page (int): 1-based page number.
+        page_size (int): Maximum number of reviews per page.
+        store (ReviewStore): Review store dependency.
+
+    Returns:
+        ReviewHistoryPage: The requested page of reviews.
+    """
+    return await store.list_history(
+        repo_url=normalize_repo_url(repo_url) if repo_url else None,
+        candidate_id=candidate_id,
+        candidate_level=candidate_level,
+        page=page,
+        page_size=page_size,
+    )
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import os
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
+from services.configs.config import settings
+from services.storage.review_store import ReviewStore, get_review_store
+from utils.redis_cache.redis_utils import get_redis_client
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Router setup
+health_router = APIRouter()
+
+
+@health_router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: answers as long as the worker's event loop is responsive.
+
+    Returns:
+        dict: Status and the id of the worker process that answered.
+    """
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@health_router.get("/health/ready")
+async def readiness(
+    redis: Redis = Depends(get_redis_client),
+    store: ReviewStore = Depends(get_review_store),
+):
+    """
+    Readiness probe: checks the dependencies every review needs.
+
+    Redis carries the cache and the cross-worker coordination, so a worker that
+    cannot reach it is taken out of rotation rather than serving uncoordinated work.
+
+    Args:
+        redis (Redis): Redis client dependency.
+        store (ReviewStore): Review store dependency.
+
+    Returns:
+        dict: Status of each dependency; served with status 503 if any check failed.
+    """
+    checks = {"redis": redis.ping(), "review_store": store.ping()}
+    results = {}
+    for name, check in checks.items():
+        try:
+            await asyncio.wait_for(check, timeout=settings.HEALTH_CHECK_TIMEOUT)
+            results[name] = "ok"
+        except Exception as e:
+            logger.warning(f"Readiness check {name} failed: {e!r}")
+            results[name] = "unavailable"
+
+    ready = all(result == "ok" for result in results.values())
+    content = {"status": "ok" if ready else "unavailable", "checks": results}
+    return content if ready else JSONResponse(status_code=503, content=content)
@@ -1,19 +1,54 @@
 import logging
-import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from uvicorn.config import LOGGING_CONFIG
+from api.admin import admin_router
 from api.endpoints import review_router
-from utils.logging_config.logging_config import logging_config
+from api.health import health_router
+from api.webhooks import webhook_router
+from services.accounting.usage_ledger import get_usage_ledger
+from services.prefetch.prefetch_service import prefetch_queue
+from services.recording.request_recorder import get_request_recorder
+from services.review.review_pipeline import cancel_revalidations
+from services.storage.review_store import close_review_store
+from utils.executor.executor_utils import shutdown_process_pool
+from utils.logging_config.logging_config import configure_logging, logging_config
+from utils.redis_cache.redis_utils import close_redis_client
 
-# Configure logging
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("CodeReviewAI")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts background work when a worker boots and releases shared clients on shutdown.
+
+    Clients (Redis, the review store, LLM providers, the process pool) are not
+    created here but on first use, so a worker that never needs one never pays for it.
+    """
+    configure_logging()
+    prefetch_queue.start()
+    get_usage_ledger().start()
+    logger.info("CodeReviewAI worker started")
+    try:
+        yield
+    finally:
+        await prefetch_queue.stop()
+        await cancel_revalidations()
+        await get_usage_ledger().stop()
+        await close_redis_client()
+        await close_review_store()
+        get_request_recorder().close()
+        shutdown_process_pool()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="CodeReviewAI", docs_url="/swagger")
+app = FastAPI(title="CodeReviewAI", docs_url="/swagger", lifespan=lifespan)
 
-# Include the review router
+# Include the review, webhook and admin routers, and the probes at the root
 app.include_router(review_router, prefix="/api")
+app.include_router(webhook_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(health_router)
 
 
 @app.get("/", include_in_schema=False)
@@ -23,5 +58,6 @@ async def redirect_to_docs():
 
 
 if __name__ == "__main__":
-    logger.info("Starting CodeReviewAI application")
+    import uvicorn
+
     uvicorn.run(app, host="localhost", port=80, log_config=logging_config)
@@ -0,0 +1,67 @@
+import json
+import logging
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from services.configs.config import settings
+from services.prefetch.prefetch_service import prefetch_queue, verify_signature
+from utils.github.github_utils import normalize_repo_url
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Router setup
+webhook_router = APIRouter()
+
+
+@webhook_router.post("/webhooks/github", status_code=202)
+async def github_webhook(request: Request):
+    """
+    Endpoint receiving GitHub push webhooks.
+
+    Pushes to a repository's default branch schedule a debounced prefetch of the
+    repository into the snapshot cache.
+
+    Args:
+        request (Request): The webhook delivery.
+
+    Returns:
+        dict: Whether the push was queued, coalesced with a pending one, or ignored.
+    """
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured.")
+
+    body = await request.body()
+    if not verify_signature(
+        settings.GITHUB_WEBHOOK_SECRET,
+        body,
+        request.headers.get("X-Hub-Signature-256"),
+    ):
+        logger.warning("Rejected webhook delivery with an invalid signature.")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "push":
+        return {"status": "ignored", "reason": f"Unsupported event: {event}"}
+
+    try:
+        payload = json.loads(body)
+        repository = payload["repository"]
+        repo_url = normalize_repo_url(repository["html_url"])
+        default_ref = f"refs/heads/{repository['default_branch']}"
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Malformed push payload.")
+
+    # Reviews always read the default branch, so other pushes cannot change them
+    if payload.get("ref") != default_ref:
+        return {"status": "ignored", "reason": "Push is not to the default branch."}
+
+    status = prefetch_queue.enqueue(repo_url)
+    if status == "rejected":
+        return JSONResponse(
+            status_code=503,
+            content={"status": status, "detail": "Prefetch queue is full."},
+            headers={"Retry-After": str(int(settings.PREFETCH_DEBOUNCE_SECONDS))},
+        )
+    logger.info(f"Push to {repo_url}: prefetch {status}.")
+    return {"status": status}
@@ -0,0 +1,104 @@
+"""
+Measures review latency as offered load grows, with and without admission control.
+
+Review generation is modelled as a shared backend (GitHub, the LLM provider and
+this worker's CPU) that serves a fixed number of requests at full speed and shares
+its capacity among any more than that, like a processor-sharing queue. Without
+admission control every request slows down as load grows; with it, admitted
+requests keep their latency and the excess is shed with 503 and Retry-After.
+
+Usage (from the app directory):
+    python -m benchmarks.admission_load --capacity 8 --loads 8,16,32,64,128
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from exceptions.excpetions import OverloadedError
+from utils.admission.admission_utils import AdmissionController
+
+STEP = 0.005  # Simulation step of the shared backend, in seconds
+
+
+class SharedBackend:
+    """Serves `capacity` requests at full speed and shares itself among more."""
+
+    def __init__(self, capacity: int, service_time: float):
+        self.capacity = capacity
+        self.service_time = service_time
+        self.active = 0
+
+    async def serve(self):
+        self.active += 1
+        remaining = self.service_time
+        try:
+            while remaining > 0:
+                await asyncio.sleep(STEP)
+                remaining -= STEP * min(1.0, self.capacity / self.active)
+        finally:
+            self.active -= 1
+
+
+async def run_load(
+    load: int, args, controller: AdmissionController
+) -> tuple[list, int]:
+    """
+    Runs `load` concurrent clients, each sending requests back to back.
+
+    Returns:
+        tuple[list, int]: Latencies of completed requests and the number shed.
+    """
+    backend = SharedBackend(args.capacity, args.service_time)
+    latencies, shed = [], 0
+    stop_at = time.monotonic() + args.duration
+
+    async def client():
+        nonlocal shed
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                async with controller.slot():
+                    await backend.serve()
+                latencies.append(time.perf_counter() - started)
+            except OverloadedError as e:
+                shed += 1
+                await asyncio.sleep(min(e.retry_after, args.service_time))
+
+    await asyncio.gather(*(client() for _ in range(load)))
+    return latencies, shed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--loads", default="8,16,32,64,128")
+    parser.add_argument("--service-time", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--max-queued", type=int, default=8)
+    parser.add_argument("--queue-timeout", type=float, default=1)
+    args = parser.parse_args()
+    logging.getLogger("CodeReviewAI").setLevel(logging.ERROR)  # One line per shed
+
+    print(
+        f"{'mode':<10} {'load':>5} {'done':>6} {'shed':>6} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for mode in ("unbounded", "admission"):
+        for load in (int(value) for value in args.loads.split(",")):
+            controller = AdmissionController(
+                args.capacity if mode == "admission" else 0,
+                args.max_queued,
+                args.queue_timeout,
+            )
+            latencies, shed = asyncio.run(run_load(load, args, controller))
+            latencies = sorted(latencies) or [0.0]
+            p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+            print(
+                f"{mode:<10} {load:>5} {len(latencies):>6} {shed:>6} "
+                f"{statistics.median(latencies) * 1000:>8.0f} {p95 * 1000:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Measures the latency of review cache hits, end to end through the application.
+
+Requests go through the ASGI app in-process, against an in-memory Redis stand-in
+holding one cached review, so only the cache-hit path is timed: reading the
+entry, building the response and sending it. The review is padded with a file
+index and static-analysis metrics, as for a large repository.
+
+Each run is compared with a baseline that parses the cached review and lets
+FastAPI validate and serialize it through the response model, which is what
+cache hits did before reviews were cached pre-serialized.
+
+Usage (from the app directory):
+    python -m benchmarks.cache_hit_latency --requests 2000 --files 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import AsyncMock, patch
+from httpx import ASGITransport, AsyncClient
+from api.main import app
+from models.analysis_models import FileIndex, StaticAnalysisReport
+from models.request_models import ReviewResponse
+from models.storage_models import CachedReview
+from services.review import review_pipeline
+from services.storage.review_store import get_review_store
+from utils.redis_cache.redis_utils import (
+    get_redis_client,
+    parse_cached_review,
+    serialize_cached_review,
+)
+
+PAYLOAD = {
+    "assignment_description": "Build a todo application with a REST API.",
+    "github_repo_url": "https://github.com/benchmark/repository",
+    "candidate_level": "senior",
+}
+
+
+class CachedRedis:
+    """Redis stand-in answering every read with the same cached entry."""
+
+    def __init__(self, value: str):
+        self.value = value
+
+    async def mget(self, keys):
+        return [self.value] + [None] * (len(keys) - 1)
+
+
+def build_review(files: int) -> ReviewResponse:
+    """Builds a review of a repository with the given number of files."""
+    paths = [f"src/module_{index}/file_{index}.py" for index in range(files)]
+    return ReviewResponse(
+        found_files=[f"- {path} (Python, 120 LOC)" for path in paths],
+        downsides="Error handling is inconsistent and several modules lack tests.",
+        rating="4",
+        conclusion="A solid submission with room for better test coverage.",
+        metrics=StaticAnalysisReport(
+            files_analyzed=files,
+            total_loc=files * 120,
+            lint_counts={"unused-import": files // 3, "bare-except": files // 10},
+            hotspots=[f"{path}:handler (12)" for path in paths[:10]],
+        ),
+        file_index=[
+            FileIndex(
+                path=path,
+                language="Python",
+                loc=120,
+                symbols=[f"Service{index}", f"Service{index}.run"],
+                imports=["os", "typing"],
+                dependencies=paths[max(index - 2, 0) : index],
+            )
+            for index, path in enumerate(paths)
+        ],
+    )
+
+
+def parsed_review_response(entry, http_response, status, age):
+    """Baseline: answers with the parsed review, serialized by the response model."""
+    review_pipeline.set_cache_headers(http_response, status, age)
+    return entry.review
+
+
+async def run(requests: int, value: str, baseline: bool) -> dict:
+    app.dependency_overrides[get_redis_client] = lambda: CachedRedis(value)
+    app.dependency_overrides[get_review_store] = lambda: AsyncMock()
+    latencies = []
+    with patch.object(
+        review_pipeline,
+        "cached_review_response",
+        parsed_review_response if baseline else review_pipeline.cached_review_response,
+    ):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://benchmark"
+        ) as client:
+            for _ in range(requests):
+                started = time.perf_counter()
+                response = await client.post("/api/review", json=PAYLOAD)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+    app.dependency_overrides.clear()
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+    }
+
+
+def time_decode(value: str, entry: CachedReview, rounds: int) -> dict:
+    """
+    Times the decoding step alone: the entry's header, the JSON envelope entries
+    were cached in before, or the entry plus a review round-trip.
+    """
+    envelope = entry.model_dump_json()
+    results = {}
+    for label, decode in (
+        ("header only", lambda: parse_cached_review(value).review_json),
+        ("JSON envelope", lambda: parse_cached_review(envelope).review_json),
+        ("parse + dump", lambda: parse_cached_review(value).review.model_dump_json()),
+    ):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            decode()
+        results[label] = round((time.perf_counter() - started) / rounds * 1e6, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+
+    review = build_review(args.files)
+    entry = CachedReview(
+        review_json=review.model_dump_json(), created_at=time.time(), commit_sha="sha"
+    )
+    value = serialize_cached_review(entry)
+    print(f"{args.requests} cache hits, cached entry of {len(value)} bytes")
+    print(f"  decode (us per hit): {time_decode(value, entry, 200)}")
+    for baseline in (True, False):
+        label = "parse + serialize" if baseline else "pre-serialized"
+        print(f"{label:>18}: {asyncio.run(run(args.requests, value, baseline))}")
+
+
+if __name__ == "__main__":
+    main()
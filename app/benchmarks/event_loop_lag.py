@@ -0,0 +1,137 @@
+"""
+Measures event-loop lag while several large-repository reviews are ingested concurrently.
+
+Each simulated review streams and decodes a set of large files from a local fake
+GitHub the way fetch_file_contents does, then assembles the prompt and parses a
+model response, once inline on the loop and once through run_cpu_bound. A ticker
+coroutine records how late it wakes up, which is the delay every other request on
+the worker would see. The fake GitHub runs in its own process, so serving the
+files does not add to the lag.
+
+Usage (from the app directory):
+    python -m benchmarks.event_loop_lag --reviews 8 --files 20 --file-size 1000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+import aiohttp
+from benchmarks.fakes.fake_github import build_repository
+from models.repository_models import RepositoryFile
+from services.configs.config import settings
+from services.github.github_access import build_code_contents
+from services.github.ingestion import stream_file_text
+from services.openai.openai_service import build_messages
+from services.review.review_service import parse_review
+from utils.executor.executor_utils import get_process_pool, run_cpu_bound
+
+TICK_INTERVAL = 0.005
+SAMPLE_REVIEW = (
+    "### Downsides:\nSome duplication.\n### Rating:\n4/5\n### Comments:\nSolid work.\n"
+    * 2000
+)
+
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    """Records how late the loop wakes a coroutine that sleeps for TICK_INTERVAL."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        samples.append(time.perf_counter() - started - TICK_INTERVAL)
+
+
+async def simulate_review(session: aiohttp.ClientSession, urls: list, offload: bool):
+    """Runs the CPU-bound stages of one review, inline or through the executor layer."""
+    files = []
+    for index, url in enumerate(urls):
+        content = await stream_file_text(session, url, {}, None)
+        files.append(RepositoryFile(path=f"file_{index}.py", content=content))
+
+    # Joining files is cheaper than pickling them to another process
+    contents = build_code_contents(files)
+    if offload:
+        await run_cpu_bound(
+            build_messages, "Task", "senior", contents, size=len(contents)
+        )
+        await run_cpu_bound(
+            parse_review, SAMPLE_REVIEW, "- a.py", size=len(SAMPLE_REVIEW)
+        )
+    else:
+        build_messages("Task", "senior", contents)
+        parse_review(SAMPLE_REVIEW, "- a.py")
+
+
+async def wait_for_github(base_url: str, timeout: float = 30):
+    """Polls the fake GitHub until it answers."""
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() - started < timeout:
+            try:
+                async with session.get(f"{base_url}/repos/a/b/commits/HEAD"):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Fake GitHub at {base_url} did not start in {timeout}s.")
+
+
+async def run(reviews: int, urls: list, offload: bool) -> dict:
+    stop, samples = asyncio.Event(), []
+    async with aiohttp.ClientSession() as session:
+        ticker = asyncio.create_task(measure_lag(stop, samples))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(simulate_review(session, urls, offload) for _ in range(reviews))
+        )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    samples.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(samples) * 1000, 2),
+        "lag_p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 2),
+        "lag_max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reviews", type=int, default=8)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--file-size", type=int, default=1_000_000)
+    parser.add_argument("--github-port", type=int, default=9300)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.github_port}"
+    urls = [
+        f"{base_url}/repos/bench/repository/contents/{path}"
+        for path in build_repository(args.files, args.file_size)
+    ]
+    github = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fakes.fake_github"]
+        + ["--port", str(args.github_port), "--files", str(args.files)]
+        + ["--file-size", str(args.file_size)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    print(
+        f"{args.reviews} concurrent reviews x {args.files} files x {args.file_size} bytes, "
+        f"offload threshold {settings.CPU_OFFLOAD_THRESHOLD_BYTES} bytes"
+    )
+
+    get_process_pool()  # Exclude worker start-up from the offloaded run
+    try:
+        asyncio.run(wait_for_github(base_url))
+        for offload in (False, True):
+            label = "process pool" if offload else "inline"
+            print(f"{label:>12}: {asyncio.run(run(args.reviews, urls, offload))}")
+    finally:
+        github.terminate()
+        github.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
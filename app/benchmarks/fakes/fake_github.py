@@ -0,0 +1,184 @@
+"""
+Local stand-in for the parts of the GitHub REST API the application uses.
+
+Serves one synthetic repository for any owner/name: a commit SHA, directory
+listings and file contents, base64-encoded or raw as the Accept header asks.
+Point GITHUB_API_URL at it to run reviews and load tests without network access
+or rate limits.
+
+Usage (from the app directory):
+    python -m benchmarks.fakes.fake_github --port 9000 --files 40 --file-size 4000
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import random
+from typing import Dict
+from aiohttp import web
+
+COMMIT_SHA = "0" * 40
+SAMPLE_FUNCTION = '''
+def handler_{index}(items, threshold={index}):
+    """Filters and scores items."""
+    result = []
+    for item in items:
+        if item is None:
+            continue
+        if item > threshold and item % 2 == 0:
+            result.append(item * 2)
+        elif item > threshold:
+            result.append(item + 1)
+    return result
+'''
+
+
+def build_repository(files: int, file_size: int) -> Dict[str, str]:
+    """
+    Builds the synthetic repository: Python modules split over two directories.
+
+    Args:
+        files (int): Number of files.
+        file_size (int): Approximate size of each file in bytes.
+
+    Returns:
+        Dict[str, str]: File contents by path.
+    """
+    repository = {}
+    for index in range(files):
+        directory = "src" if index % 2 else "src/handlers"
+        body, function = "", 0
+        while len(body) < file_size:
+            body += SAMPLE_FUNCTION.format(index=index * 1000 + function)
+            function += 1
+        repository[f"{directory}/module_{index}.py"] = body
+    return repository
+
+
+def build_app(
+    files: int, file_size: int, slow_fraction: float = 0.0, slow_delay: float = 0.0
+) -> web.Application:
+    """
+    Builds the fake GitHub API application.
+
+    Args:
+        files (int): Number of files in the synthetic repository.
+        file_size (int): Approximate size of each file in bytes.
+        slow_fraction (float): Share of file downloads delayed by slow_delay, to
+            simulate GitHub's latency tail.
+        slow_delay (float): Delay of slow file downloads in seconds.
+
+    Returns:
+        web.Application: The aiohttp application.
+    """
+    repository = build_repository(files, file_size)
+    blob_shas = {
+        path: hashlib.sha1(content.encode()).hexdigest()
+        for path, content in repository.items()
+    }
+
+    def listing(request: web.Request, directory: str) -> list:
+        base = f"{request.scheme}://{request.host}{request.path.split('/contents')[0]}"
+        entries, subdirectories = [], set()
+        prefix = f"{directory}/" if directory else ""
+        for path, content in repository.items():
+            if not path.startswith(prefix):
+                continue
+            name = path[len(prefix) :]
+            if "/" in name:
+                subdirectories.add(prefix + name.split("/")[0])
+                continue
+            entries.append(
+                {
+                    "type": "file",
+                    "path": path,
+                    "sha": blob_shas[path],
+                    "size": len(content),
+                    "url": f"{base}/contents/{path}",
+                }
+            )
+        for subdirectory in sorted(subdirectories):
+            entries.append(
+                {
+                    "type": "dir",
+                    "path": subdirectory,
+                    "url": f"{base}/contents/{subdirectory}",
+                }
+            )
+        return entries
+
+    async def commit(request: web.Request) -> web.Response:
+        return web.Response(text=COMMIT_SHA)
+
+    async def contents(request: web.Request) -> web.Response:
+        path = request.match_info.get("path", "").strip("/")
+        if path in repository:
+            if random.random() < slow_fraction:
+                await asyncio.sleep(slow_delay)
+            content = repository[path]
+            if "raw" in request.headers.get("Accept", ""):
+                return web.Response(text=content)
+            return web.json_response(
+                {
+                    "type": "file",
+                    "path": path,
+                    "sha": blob_shas[path],
+                    "size": len(content),
+                    "encoding": "base64",
+                    "content": base64.b64encode(content.encode()).decode(),
+                }
+            )
+        entries = listing(request, path)
+        if not entries:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return web.json_response(entries)
+
+    app = web.Application()
+    app.router.add_get("/repos/{owner}/{repo}/commits/HEAD", commit)
+    app.router.add_get("/repos/{owner}/{repo}/contents", contents)
+    app.router.add_get("/repos/{owner}/{repo}/contents/{path:.*}", contents)
+    return app
+
+
+async def start_fake_github(
+    port: int,
+    files: int,
+    file_size: int,
+    host: str = "127.0.0.1",
+    slow_fraction: float = 0.0,
+    slow_delay: float = 0.0,
+) -> web.AppRunner:
+    """
+    Starts the fake GitHub API on the running event loop.
+
+    Args:
+        port (int): Port to listen on.
+        files (int): Number of files in the synthetic repository.
+        file_size (int): Approximate size of each file in bytes.
+        host (str): Interface to bind.
+        slow_fraction (float): Share of file downloads delayed by slow_delay.
+        slow_delay (float): Delay of slow file downloads in seconds.
+
+    Returns:
+        web.AppRunner: The runner; call cleanup() on it to stop the server.
+    """
+    runner = web.AppRunner(
+        build_app(files, file_size, slow_fraction, slow_delay), access_log=None
+    )
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-size", type=int, default=4000)
+    args = parser.parse_args()
+    web.run_app(build_app(args.files, args.file_size), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures repository fetch latency against a GitHub with a slow tail, with and
+without hedged file downloads.
+
+The local fake GitHub delays a share of file downloads. Without hedging, one slow
+download holds up the whole fetch; with GITHUB_HEDGE_DELAY set, a download that
+is slower than the delay is sent again and the first response wins.
+
+Usage (from the app directory):
+    python -m benchmarks.hedged_fetch --fetches 30 --slow-fraction 0.02 --hedge-delay 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from benchmarks.fakes.fake_github import start_fake_github
+from services.configs.config import settings
+from services.github.github_access import fetch_repository_contents
+from utils.resilience.resilience_utils import hedge_counts
+
+REPO_URL = "https://github.com/hedging/repository"
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * fraction + 0.5) - 1, 0)]
+
+
+async def main_async(args):
+    github = await start_fake_github(
+        args.port,
+        args.files,
+        args.file_size,
+        slow_fraction=args.slow_fraction,
+        slow_delay=args.slow_delay,
+    )
+    settings.GITHUB_API_URL = f"http://127.0.0.1:{args.port}"
+    try:
+        print(
+            f"{'hedge delay':>11} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'extra':>6}"
+        )
+        for delay in (0.0, args.hedge_delay):
+            settings.GITHUB_HEDGE_DELAY = delay
+            hedged_before = hedge_counts["hedged"]
+            latencies = []
+            for _ in range(args.fetches):
+                started = time.perf_counter()
+                await fetch_repository_contents(REPO_URL)
+                latencies.append(time.perf_counter() - started)
+            extra = (hedge_counts["hedged"] - hedged_before) / (
+                args.fetches * args.files
+            )
+            print(
+                f"{delay:>11} {statistics.median(latencies) * 1000:>8.0f} "
+                f"{percentile(latencies, 0.95) * 1000:>8.0f} "
+                f"{max(latencies) * 1000:>8.0f} {extra:>6.1%}"
+            )
+    finally:
+        await github.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fetches", type=int, default=30)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-size", type=int, default=2000)
+    parser.add_argument("--slow-fraction", type=float, default=0.02)
+    parser.add_argument("--slow-delay", type=float, default=1.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=9050)
+    args = parser.parse_args()
+    logging.getLogger("CodeReviewAI").setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures worker memory while fetching repositories of growing size, with the
+ingestion budgets and without them.
+
+The fake GitHub runs in this process; each fetch runs in a fresh subprocess that
+reports its peak RSS growth and the tracemalloc peak of the fetch. With budgets
+the peak stays flat however big the repository gets; without them it grows with
+the repository.
+
+Usage (from the app directory):
+    python -m benchmarks.ingest_memory --files 50,200,800 --file-size 50000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+from benchmarks.fakes.fake_github import start_fake_github
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_URL = "https://github.com/memory/repository"
+UNBOUNDED = {
+    "INGEST_MAX_FILE_BYTES": "0",
+    "INGEST_MAX_BYTES": "0",
+    "INGEST_MAX_FILES": "0",
+    "INGEST_MAX_TOKENS": "0",
+}
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def child(port: int):
+    """Fetches the repository once and prints its memory use as JSON."""
+    from services.configs.config import settings
+    from services.github.github_access import fetch_repository_contents
+
+    settings.GITHUB_API_URL = f"http://127.0.0.1:{port}"
+    baseline = max_rss_mb()
+    tracemalloc.start()
+    result = await fetch_repository_contents(REPO_URL)
+    _, peak = tracemalloc.get_traced_memory()
+    print(
+        json.dumps(
+            {
+                "files": len(result.files),
+                "kept_mb": len(result.code_contents) / 2**20,
+                "traced_peak_mb": peak / 2**20,
+                "rss_growth_mb": max_rss_mb() - baseline,
+            }
+        )
+    )
+
+
+def measure(port: int, unbounded: bool) -> dict:
+    env = {**os.environ, **(UNBOUNDED if unbounded else {})}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.ingest_memory", "--child", str(port)],
+        env=env,
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def main_async(args):
+    print(
+        f"{'repo MB':>8} {'mode':<10} {'files':>6} {'kept MB':>8} "
+        f"{'traced MB':>10} {'RSS +MB':>8}"
+    )
+    for index, files in enumerate(int(count) for count in args.files.split(",")):
+        port = args.port + index
+        github = await start_fake_github(port, files, args.file_size)
+        try:
+            for mode in ("budgeted", "unbounded"):
+                result = await asyncio.to_thread(measure, port, mode == "unbounded")
+                print(
+                    f"{files * args.file_size / 2**20:>8.1f} {mode:<10} "
+                    f"{result['files']:>6} {result['kept_mb']:>8.1f} "
+                    f"{result['traced_peak_mb']:>10.1f} {result['rss_growth_mb']:>8.1f}"
+                )
+        finally:
+            await github.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", default="50,200,800")
+    parser.add_argument("--file-size", type=int, default=50000)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(child(args.child))
+    else:
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Load test of the multi-worker server, measuring how throughput scales with workers.
+
+For each worker count the script starts server.py against a local fake GitHub, the
+deterministic stub LLM provider and a fresh SQLite review store, waits for the
+readiness probe, and then drives concurrent review requests for a fixed duration.
+Every request uses a new assignment, so each one is a cache miss that runs the
+whole pipeline: lock, fetch, static analysis, completion, store and cache writes.
+
+Requires a running Redis (REDIS_URL). Scaling is bounded by the CPU count, so
+compare worker counts up to the number of cores.
+
+Usage (from the app directory):
+    python -m benchmarks.load_test --workers 1,2,4,8 --concurrency 64 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import aiohttp
+from benchmarks.fakes.fake_github import start_fake_github
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_URL = "https://github.com/load-test/repository"
+
+
+async def wait_until_ready(base_url: str, timeout: float = 60):
+    """Polls the readiness probe until the server accepts traffic."""
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() - started < timeout:
+            try:
+                async with session.get(f"{base_url}/health/ready") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s.")
+
+
+async def drive_load(base_url: str, concurrency: int, duration: float) -> dict:
+    """
+    Sends review requests from concurrent clients for a fixed duration.
+
+    Args:
+        base_url (str): Server address.
+        concurrency (int): Number of concurrent clients.
+        duration (float): Seconds to run.
+
+    Returns:
+        dict: Completed requests, errors and latencies in seconds.
+    """
+    latencies, errors = [], 0
+    run_id = uuid.uuid4().hex[:8]
+    stop_at = time.monotonic() + duration
+
+    async def client(session: aiohttp.ClientSession, client_id: int):
+        nonlocal errors
+        sequence = 0
+        while time.monotonic() < stop_at:
+            sequence += 1
+            payload = {
+                "assignment_description": f"Load test {run_id}-{client_id}-{sequence}",
+                "github_repo_url": REPO_URL,
+                "candidate_level": "junior",
+            }
+            started = time.perf_counter()
+            try:
+                async with session.post(
+                    f"{base_url}/api/review", json=payload
+                ) as response:
+                    await response.read()
+                    if response.status == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session, index) for index in range(concurrency)))
+    return {"completed": len(latencies), "errors": errors, "latencies": latencies}
+
+
+async def run_scenario(workers: int, args, workdir: str) -> dict:
+    """Starts the server with the given number of workers and measures it."""
+    port = args.port + workers
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "GITHUB_API_URL": f"http://127.0.0.1:{args.github_port}",
+        "LLM_PROVIDERS": "stub",
+        "STUB_LATENCY": str(args.stub_latency),
+        "REVIEW_STORE_URL": f"sqlite:///{workdir}/reviews-{workers}.db",
+        "PREFETCH_WORKERS": "0",
+        "PROCESS_POOL_WORKERS": "1",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "server.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=APP_DIR,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_until_ready(base_url)
+        # Warm up every worker before measuring
+        await drive_load(base_url, args.concurrency, 2)
+        result = await drive_load(base_url, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    result["throughput"] = result["completed"] / args.duration
+    return result
+
+
+async def main_async(args):
+    github = await start_fake_github(args.github_port, args.files, args.file_size)
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for workers in worker_counts:
+                results[workers] = await run_scenario(workers, args, workdir)
+    finally:
+        await github.cleanup()
+
+    baseline = results[worker_counts[0]]["throughput"] / worker_counts[0]
+    print(
+        f"{'workers':>7} {'req/s':>8} {'speedup':>8} {'eff.':>6} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'errors':>6}"
+    )
+    for workers, result in results.items():
+        latencies = sorted(result["latencies"]) or [0.0]
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        speedup = result["throughput"] / baseline if baseline else 0.0
+        print(
+            f"{workers:>7} {result['throughput']:>8.1f} {speedup:>8.2f} "
+            f"{speedup / workers:>6.0%} {statistics.median(latencies) * 1000:>8.1f} "
+            f"{p95 * 1000:>8.1f} {result['errors']:>6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-size", type=int, default=4000)
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--github-port", type=int, default=9000)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
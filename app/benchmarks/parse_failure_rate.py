@@ -0,0 +1,167 @@
+"""
+Measures how often model outputs fail to parse, for the original heading parser and
+the tolerant single-pass parser.
+
+A failure of the original parser (no rating, or a response that fails validation)
+used to cost a whole new review on the large model. A failure of the new parser
+costs a short repair call. The built-in corpus covers the output shapes models
+actually produce; recorded outputs can be checked with --corpus, a JSONL file with
+one {"output": "..."} object per line.
+
+Usage (from the app directory):
+    python -m benchmarks.parse_failure_rate --samples 200
+    python -m benchmarks.parse_failure_rate --corpus recorded_outputs.jsonl
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+from models.request_models import ReviewResponse
+from services.review.review_parser import parse_model_output
+
+WORDS = (
+    "error handling tests naming functions modules coupling validation logging "
+    "duplication complexity documentation structure async caching typing"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def build_corpus(samples: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    Generates model outputs in every shape seen in practice.
+
+    Args:
+        samples (int): Outputs per shape.
+        seed (int): Random seed, for reproducible runs.
+
+    Returns:
+        List[Tuple[str, str]]: (shape name, output) pairs.
+    """
+    rng = random.Random(seed)
+    shapes: Dict[str, Callable[[str, int, str], str]] = {
+        "canonical": lambda d, r, c: f"### Downsides:\n{d}\n### Rating:\n{r}/5\n### Comments:\n{c}",
+        "no colons": lambda d, r, c: f"### Downsides\n{d}\n### Rating\n{r}/5\n### Comments\n{c}",
+        "bold headings": lambda d, r, c: f"**Downsides:** {d}\n**Rating:** {r}/5\n**Comments:** {c}",
+        "plain labels": lambda d, r, c: f"Downsides: {d}\nRating: {r}/5\nComments: {c}",
+        "ten-point scale": lambda d, r, c: f"### Downsides:\n{d}\n### Rating:\n{r * 2}/10\n### Comments:\n{c}",
+        "out of": lambda d, r, c: f"### Downsides:\n{d}\n### Rating: {r} out of 5\n### Comments:\n{c}",
+        "bare number": lambda d, r, c: f"### Downsides:\n{d}\n### Rating:\n{r}\n### Comments:\n{c}",
+        "conclusion heading": lambda d, r, c: f"## Downsides:\n{d}\n## Rating:\n{r}/5\n## Conclusion:\n{c}",
+        "lowercase": lambda d, r, c: f"### downsides:\n{d}\n### rating:\n{r}/5\n### comments:\n{c}",
+        "json": lambda d, r, c: json.dumps(
+            {"downsides": d, "rating": r, "conclusion": c}
+        ),
+        "fenced json": lambda d, r, c: "Here is my review:\n```json\n"
+        + json.dumps({"downsides": d, "rating": r, "conclusion": c}, indent=2)
+        + "\n```",
+        "truncated json": lambda d, r, c: json.dumps(
+            {"rating": r, "downsides": d, "conclusion": c}
+        )[:-12],
+        "long sections": lambda d, r, c: f"### Downsides:\n{d * 12}\n### Rating:\n{r}/5\n### Comments:\n{c * 12}",
+        "no rating": lambda d, r, c: f"### Downsides:\n{d}\n### Comments:\n{c}",
+    }
+    corpus = []
+    for name, render in shapes.items():
+        for _ in range(samples):
+            downsides = sentence(rng, rng.randint(6, 20))
+            conclusion = sentence(rng, rng.randint(6, 20))
+            corpus.append((name, render(downsides, rng.randint(1, 5), conclusion)))
+    return corpus
+
+
+def legacy_parse_review(review: str) -> ReviewResponse:
+    """The heading parser this repository used before the tolerant parser."""
+    downsides, rating, conclusion = "", "", ""
+    if "### Downsides" in review:
+        downsides_start = review.find("### Downsides")
+        downsides_end = review.find("### Rating", downsides_start)
+        downsides = (
+            review[downsides_start + len("### Downsides") : downsides_end].strip()
+            if downsides_end != -1
+            else ""
+        )
+    if "### Rating" in review:
+        rating_start = review.find("### Rating")
+        rating_end = review.find("### Comments:", rating_start)
+        rating_section = (
+            review[rating_start + len("### Rating") : rating_end].strip()
+            if rating_end != -1
+            else ""
+        )
+        rating_match = re.search(r"\d+\/\d+", rating_section)
+        if rating_match:
+            raw_rating = rating_match.group(0).split("/")[0]
+            rating = str(min(max(int(raw_rating), 1), 5))
+        else:
+            rating = "No rating provided"
+    conclusion_start = review.find("### Comments:")
+    conclusion = (
+        review[conclusion_start + len("### Comments:") :].strip()
+        if conclusion_start != -1
+        else review.strip()
+    )
+    return ReviewResponse(
+        conclusion=conclusion[:500], downsides=downsides[:500], rating=rating
+    )
+
+
+def legacy_fails(output: str) -> bool:
+    try:
+        return not legacy_parse_review(output).rating
+    except ValueError:
+        return True
+
+
+def tolerant_fails(output: str) -> bool:
+    return not parse_model_output(output).complete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--corpus", help="JSONL file of recorded outputs")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as corpus_file:
+            corpus = [
+                ("recorded", json.loads(line)["output"])
+                for line in corpus_file
+                if line.strip()
+            ]
+    else:
+        corpus = build_corpus(args.samples)
+
+    failures: Dict[str, Counter] = defaultdict(Counter)
+    timings = Counter()
+    for shape, output in corpus:
+        for name, fails in (("legacy", legacy_fails), ("tolerant", tolerant_fails)):
+            started = time.perf_counter()
+            failures[shape][name] += fails(output)
+            timings[name] += time.perf_counter() - started
+        failures[shape]["total"] += 1
+
+    print(f"{'shape':<20} {'legacy':>8} {'tolerant':>9}")
+    for shape, counts in failures.items():
+        print(
+            f"{shape:<20} {counts['legacy'] / counts['total']:>8.0%} "
+            f"{counts['tolerant'] / counts['total']:>9.0%}"
+        )
+    total = len(corpus)
+    for name in ("legacy", "tolerant"):
+        failed = sum(counts[name] for counts in failures.values())
+        print(
+            f"{name}: {failed}/{total} failed ({failed / total:.1%}), "
+            f"{timings[name] / total * 1e6:.1f} us per output"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares the share of prompt tokens served from the provider's prompt cache for
+each prompt template.
+
+Many candidates solve the same assignment, usually on top of the same starter
+code. The original template put the candidate's level first and the instructions
+last, so prompts shared almost no prefix. The prefix-stable template puts the
+instructions, assignment and starter code first. The provider cache is simulated
+by LocalStubProvider, which matches prefixes in fixed-size blocks.
+
+Usage (from the app directory):
+    python -m benchmarks.prompt_cache_ratio --candidates 200
+"""
+
+import argparse
+import asyncio
+import random
+from services.llm.providers import LocalStubProvider
+from services.openai.openai_service import build_messages
+from services.prompts.prompt_registry import PROMPT_TEMPLATES
+
+LEVELS = ("Junior", "Middle", "Senior")
+
+
+def fake_source(rng: random.Random, lines: int) -> str:
+    names = ("user", "order", "item", "cart", "token", "session")
+    return "\n".join(
+        f"def handle_{rng.choice(names)}_{i}(value):\n    return value * {i}"
+        for i in range(lines)
+    )
+
+
+async def measure(version: str, candidates: int, assignments: int) -> float:
+    """
+    Sends every candidate's prompt through a fresh stub provider.
+
+    Args:
+        version (str): Prompt template version.
+        candidates (int): Candidates per assignment.
+        assignments (int): Number of distinct assignments.
+
+    Returns:
+        float: Cached prompt tokens divided by prompt tokens.
+    """
+    rng = random.Random(0)
+    provider = LocalStubProvider(concurrency=1, timeout=10)
+    prompt_tokens = cached_tokens = 0
+    for a in range(assignments):
+        assignment = f"Assignment {a}: build a REST API for an online shop. " * 30
+        starter = fake_source(random.Random(a), 60)
+        for _ in range(candidates):
+            messages = build_messages(
+                assignment,
+                rng.choice(LEVELS),
+                fake_source(rng, rng.randint(20, 120)),
+                findings=f"- {rng.randint(0, 20)} unused imports",
+                starter_contents=starter if version != "review-v1" else "",
+                template_version=version,
+            )
+            completion = await provider.complete(messages, "stub", 100, 0.0)
+            prompt_tokens += completion.prompt_tokens
+            cached_tokens += completion.cached_tokens
+    return cached_tokens / prompt_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--assignments", type=int, default=3)
+    args = parser.parse_args()
+    for version in PROMPT_TEMPLATES:
+        ratio = asyncio.run(measure(version, args.candidates, args.assignments))
+        print(f"{version}: {ratio:.1%} of prompt tokens cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Replays a recording of /api/review traffic against a local server.
+
+Recordings are written by servers running with RECORD_REQUESTS_PATH set: one
+anonymized request per line, with the time it arrived and the time spent in each
+pipeline stage. The script starts server.py against a local fake GitHub, the
+stub LLM provider and a fresh SQLite review store, and sends one request per
+recorded one: the same repository, assignment and client stand for the same
+synthetic ones, and each recorded client gets an API key of its own, so cache
+hits, single-flight waits, quotas and budgets recur as recorded.
+Requests are sent at their recorded times divided by --speed, or at a fixed
+--rate, whether earlier ones have finished or not.
+
+The server records the replay itself, so the report compares the mean time of
+each stage in the recording and in the replay. With --profile, the server is
+profiled for the length of the replay and the folded stacks are written for
+flamegraph.pl or speedscope.
+
+Requires a running Redis (REDIS_URL).
+
+Usage (from the app directory):
+    python -m benchmarks.replay requests.jsonl --speed 2 --profile replay.folded
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+import aiohttp
+from benchmarks.fakes.fake_github import start_fake_github
+from benchmarks.load_test import wait_until_ready
+from models.recording_models import RecordedRequest
+from services.configs.config import settings
+from services.recording.request_recorder import load_recording
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_TOKEN = "replay"
+WORDS = ("build", "a", "service", "that", "parses", "stores", "and", "reports", "data")
+
+
+def replay_payload(entry: RecordedRequest) -> dict:
+    """
+    Builds the request standing in for a recorded one.
+
+    Args:
+        entry (RecordedRequest): The recorded request.
+
+    Returns:
+        dict: A review request with a repository and an assignment derived from
+        the recorded digests, and an assignment of the recorded length.
+    """
+    words = random.Random(entry.assignment)
+    assignment = entry.assignment
+    while len(assignment) < entry.assignment_length:
+        assignment += " " + words.choice(WORDS)
+    payload = {
+        "assignment_description": assignment[: max(entry.assignment_length, 10)],
+        "github_repo_url": f"https://github.com/replay/{entry.repo[:12]}",
+        "candidate_level": entry.candidate_level,
+    }
+    if entry.has_candidate_id:
+        payload["candidate_id"] = f"replay-{entry.repo[:8]}"
+    return payload
+
+
+def replay_api_key(entry: RecordedRequest) -> str:
+    """API key, and tenant, standing in for a recorded request's client."""
+    return f"replay-{(entry.tenant or 'anonymous')[:12]}"
+
+
+def replay_schedule(
+    entries: List[RecordedRequest], speed: float, rate: Optional[float]
+) -> List[float]:
+    """
+    Computes when to send each request, in seconds from the start of the replay.
+
+    Args:
+        entries (List[RecordedRequest]): Recorded requests, oldest first.
+        speed (float): Factor the recorded times are divided by.
+        rate (Optional[float]): Fixed requests per second, overriding speed.
+
+    Returns:
+        List[float]: Offset of each request.
+    """
+    if rate:
+        return [index / rate for index in range(len(entries))]
+    first = entries[0].at if entries else 0.0
+    return [(entry.at - first) / speed for entry in entries]
+
+
+def stage_means(entries: List[RecordedRequest]) -> Dict[str, float]:
+    """Mean seconds per stage over the requests that ran it."""
+    stages = defaultdict(list)
+    for entry in entries:
+        for stage, seconds in entry.stages.items():
+            stages[stage].append(seconds)
+    return {stage: statistics.fmean(times) for stage, times in stages.items()}
+
+
+def default_stub_latency(entries: List[RecordedRequest]) -> float:
+    """Median recorded latency of one model call, or 50 ms without any."""
+    calls = [
+        entry.llm_latency / entry.llm_calls for entry in entries if entry.llm_calls
+    ]
+    return statistics.median(calls) if calls else 0.05
+
+
+async def send_requests(
+    base_url: str, entries: List[RecordedRequest], offsets: List[float]
+) -> List[tuple]:
+    """
+    Sends the requests at their offsets, without waiting for earlier responses.
+
+    Returns:
+        List[tuple]: Status and latency in seconds of each request.
+    """
+    started = time.monotonic()
+
+    async def send(session: aiohttp.ClientSession, entry, offset) -> tuple:
+        await asyncio.sleep(max(started + offset - time.monotonic(), 0.0))
+        headers = {settings.API_KEY_HEADER: replay_api_key(entry)}
+        sent = time.perf_counter()
+        try:
+            async with session.post(
+                f"{base_url}/api/review", json=replay_payload(entry), headers=headers
+            ) as response:
+                await response.read()
+                return str(response.status), time.perf_counter() - sent
+        except aiohttp.ClientError as e:
+            return type(e).__name__, time.perf_counter() - sent
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(
+            *(send(session, entry, offset) for entry, offset in zip(entries, offsets))
+        )
+
+
+async def capture_profile(base_url: str, seconds: float, interval: float) -> str:
+    """Profiles the server for the given time and returns its folded stacks."""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{base_url}/api/admin/profile",
+            params={"seconds": str(seconds), "interval": str(interval)},
+            headers={"X-Admin-Token": ADMIN_TOKEN},
+        ) as response:
+            response.raise_for_status()
+            return await response.text()
+
+
+async def main_async(args):
+    entries = load_recording(args.recording)[: args.limit or None]
+    if not entries:
+        raise SystemExit(f"No requests recorded in {args.recording}.")
+    offsets = replay_schedule(entries, args.speed, args.rate)
+    stub_latency = args.stub_latency
+    if stub_latency is None:
+        stub_latency = default_stub_latency(entries)
+
+    github = await start_fake_github(args.github_port, args.files, args.file_size)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            replay_path = os.path.join(workdir, "replay.jsonl")
+            env = {
+                **os.environ,
+                "WEB_CONCURRENCY": str(args.workers),
+                "SERVER_HOST": "127.0.0.1",
+                "SERVER_PORT": str(args.port),
+                "GITHUB_API_URL": f"http://127.0.0.1:{args.github_port}",
+                "LLM_PROVIDERS": "stub",
+                "STUB_LATENCY": str(stub_latency),
+                "REVIEW_STORE_URL": f"sqlite:///{workdir}/reviews.db",
+                "PREFETCH_WORKERS": "0",
+                "PROCESS_POOL_WORKERS": "1",
+                "RECORD_REQUESTS_PATH": replay_path,
+                "RECORD_SAMPLE_RATE": "1",
+                "RECORD_HASH_KEY": secrets.token_hex(16),
+                "ADMIN_TOKEN": ADMIN_TOKEN,
+                "API_KEYS": ",".join(
+                    f"{key}:{key}"
+                    for key in {replay_api_key(entry) for entry in entries}
+                ),
+            }
+            server = subprocess.Popen(
+                [sys.executable, "server.py"],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                cwd=APP_DIR,
+            )
+            base_url = f"http://127.0.0.1:{args.port}"
+            try:
+                await wait_until_ready(base_url)
+                profile = None
+                if args.profile:
+                    # Profile for the whole schedule plus the slowest recorded request
+                    seconds = offsets[-1] + max(entry.latency for entry in entries)
+                    profile = asyncio.create_task(
+                        capture_profile(base_url, seconds, args.profile_interval)
+                    )
+                started = time.monotonic()
+                results = await send_requests(base_url, entries, offsets)
+                elapsed = time.monotonic() - started
+                if profile:
+                    with open(args.profile, "w", encoding="utf-8") as output:
+                        output.write(await profile)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            replayed = (
+                load_recording(replay_path) if os.path.exists(replay_path) else []
+            )
+    finally:
+        await github.cleanup()
+
+    latencies = sorted(latency for _, latency in results)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    statuses = Counter(status for status, _ in results)
+    print(
+        f"{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.1f} req/s), "
+        f"statuses: {dict(statuses)}"
+    )
+    print(
+        f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+    )
+    recorded_stages, replayed_stages = stage_means(entries), stage_means(replayed)
+    print(f"{'stage':>12} {'recorded ms':>12} {'replayed ms':>12}")
+    for stage in sorted(recorded_stages.keys() | replayed_stages.keys()):
+        print(
+            f"{stage:>12} {recorded_stages.get(stage, 0.0) * 1000:>12.1f} "
+            f"{replayed_stages.get(stage, 0.0) * 1000:>12.1f}"
+        )
+    if args.profile:
+        print(f"Profile written to {args.profile}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-size", type=int, default=4000)
+    parser.add_argument("--stub-latency", type=float, default=None)
+    parser.add_argument("--profile", default=None)
+    parser.add_argument("--profile-interval", type=float, default=0.005)
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--github-port", type=int, default=9200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
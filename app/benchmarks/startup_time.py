@@ -0,0 +1,102 @@
+"""
+Measures cold-start time of a worker: importing the application and running its startup.
+
+Every run happens in a fresh interpreter, as it would for a new uvicorn worker, a new
+pod or a test process. The slowest imports of the last run are listed, so regressions
+from a new eager import are easy to spot.
+
+Usage (from the app directory):
+    python -m benchmarks.startup_time --runs 10 --top 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter; prints import and startup durations in seconds
+CHILD_SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+from api.main import app, lifespan
+imported = time.perf_counter()
+
+async def start():
+    async with lifespan(app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(imported - started, ready - imported)
+"""
+
+
+def run_once(importtime: bool = False) -> tuple:
+    """
+    Starts the application in a fresh interpreter.
+
+    Args:
+        importtime (bool): Also collect the interpreter's per-module import times.
+
+    Returns:
+        tuple: Import seconds, startup seconds and the raw -X importtime report.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    result = subprocess.run(
+        command + ["-c", CHILD_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PREFETCH_WORKERS": "0"},
+    )
+    import_seconds, startup_seconds = map(float, result.stdout.split()[-2:])
+    return import_seconds, startup_seconds, result.stderr
+
+
+def slowest_imports(report: str, top: int) -> list:
+    """
+    Parses an -X importtime report into the modules with the highest self time.
+
+    Args:
+        report (str): stderr of an interpreter run with -X importtime.
+        top (int): Number of modules to return.
+
+    Returns:
+        list: (self microseconds, module name) pairs, slowest first.
+    """
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        modules.append((int(self_us), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    imports = [run[0] * 1000 for run in runs]
+    startups = [run[1] * 1000 for run in runs]
+    print(f"runs: {args.runs}")
+    print(
+        f"import:  median {statistics.median(imports):.1f} ms, max {max(imports):.1f} ms"
+    )
+    print(
+        f"startup: median {statistics.median(startups):.1f} ms, max {max(startups):.1f} ms"
+    )
+
+    _, _, report = run_once(importtime=True)
+    print("slowest imports (self time):")
+    for self_us, name in slowest_imports(report, args.top):
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,3 +34,71 @@ class InvalidRequestError(AppBaseException):
 
     def __init__(self, message: str):
         super().__init__(f"Invalid request: {message}")
+
+
+class DeadlineExceededError(AppBaseException):
+    """
+    Raised when a request runs past its deadline.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}.")
+        self.stage = stage
+
+
+class ClientDisconnectedError(AppBaseException):
+    """
+    Raised when the client disconnects before the response is ready.
+    """
+
+    def __init__(self):
+        super().__init__("Client disconnected before the review was ready.")
+
+
+class OverloadedError(AppBaseException):
+    """
+    Raised when a worker sheds a request because its wait queue is full.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server overloaded. Retry after {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(AppBaseException):
+    """
+    Raised when a client has used up its review quota for the current window.
+    """
+
+    def __init__(self, client_id: str, retry_after: int):
+        super().__init__(
+            f"Review quota of {client_id} exceeded. Retry after {retry_after} seconds."
+        )
+        self.client_id = client_id
+        self.retry_after = retry_after
+
+
+class BudgetExceededError(AppBaseException):
+    """
+    Raised when a tenant has spent its daily LLM budget.
+    """
+
+    def __init__(self, tenant: str, retry_after: int):
+        super().__init__(
+            f"Daily budget of {tenant} exceeded. Retry after {retry_after} seconds."
+        )
+        self.tenant = tenant
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AppBaseException):
+    """
+    Raised instead of calling a dependency whose circuit breaker is open.
+    """
+
+    def __init__(self, dependency: str, retry_after: int):
+        super().__init__(
+            f"{dependency} is unavailable. Retry after {retry_after} seconds."
+        )
+        self.dependency = dependency
+        self.retry_after = retry_after
@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+
+class StaticAnalysisReport(BaseModel):
+    """
+    Aggregated results of the local static-analysis pass.
+
+    Attributes:
+        files_analyzed (int): Number of files that were analyzed.
+        total_loc (int): Non-blank lines of code across all analyzed files.
+        functions (int): Number of functions and methods found.
+        classes (int): Number of classes found.
+        max_complexity (int): Highest cyclomatic complexity of a single function.
+        average_complexity (float): Mean cyclomatic complexity per function.
+        duplicate_blocks (int): Number of repeated code blocks across the repository.
+        lint_counts (Dict[str, int]): Lint-level issue counts by rule.
+        hotspots (List[str]): Most complex functions, as "path:function (complexity)".
+        omitted_files (List[str]): Low-value files left out of the prompt.
+    """
+
+    files_analyzed: int = 0
+    total_loc: int = 0
+    functions: int = 0
+    classes: int = 0
+    max_complexity: int = 0
+    average_complexity: float = 0.0
+    duplicate_blocks: int = 0
+    lint_counts: Dict[str, int] = Field(default_factory=dict)
+    hotspots: List[str] = Field(default_factory=list)
+    omitted_files: List[str] = Field(default_factory=list)
+
+
+class FileIndex(BaseModel):
+    """
+    Structural summary of a single repository file.
+
+    Attributes:
+        path (str): Path of the file relative to the repository root.
+        language (str): Language detected from the file name.
+        loc (int): Non-blank lines of code.
+        symbols (List[str]): Classes and functions defined, methods as "Class.method".
+        imports (List[str]): Modules or paths imported, as written in the file.
+        dependencies (List[str]): Paths of the repository files it imports.
+    """
+
+    path: str
+    language: str
+    loc: int = 0
+    symbols: List[str] = Field(default_factory=list)
+    imports: List[str] = Field(default_factory=list)
+    dependencies: List[str] = Field(default_factory=list)
+
+
+class RepositoryIndex(BaseModel):
+    """
+    Per-file structure of a repository and the dependency graph between its files.
+
+    Attributes:
+        files (List[FileIndex]): Index entries in repository listing order.
+        languages (Dict[str, int]): Lines of code by language.
+    """
+
+    files: List[FileIndex] = Field(default_factory=list)
+    languages: Dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,47 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class Completion(BaseModel):
+    """
+    Normalized result of a chat completion from any LLM provider.
+
+    Attributes:
+        content (str): Text of the first choice.
+        model (str): Model that produced the completion.
+        provider (str): Name of the provider that served the request.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+    """
+
+    content: str
+    model: str
+    provider: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class ParsedReview(BaseModel):
+    """
+    Sections extracted from a model's review output, before response validation.
+
+    Attributes:
+        downsides (Optional[str]): The downsides section, None if absent.
+        rating (Optional[int]): Rating normalized to the 1-5 scale, None if absent or
+            unparsable.
+        conclusion (Optional[str]): The comments section, None if absent.
+        sections (List[str]): Sections present in the output, even if empty or
+            unparsable: "downsides", "rating" and "conclusion".
+    """
+
+    downsides: Optional[str] = None
+    rating: Optional[int] = None
+    conclusion: Optional[str] = None
+    sections: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        """True if every section was found and the rating could be parsed."""
+        return self.rating is not None and len(set(self.sections)) == 3
@@ -0,0 +1,23 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class PromptTemplate(BaseModel):
+    """
+    A versioned layout of the review prompt.
+
+    Sections are str.format templates rendered in order; a section whose
+    placeholders are all empty is dropped. Keeping content that is identical
+    across requests in the system message and the first sections lets providers
+    serve that prefix from their prompt cache.
+
+    Attributes:
+        version (str): Identifier, part of review cache keys.
+        system (Optional[str]): Static instructions sent as the system message.
+        sections (List[str]): Templates of the user message, in order. Placeholders:
+            assignment, starter_code, level, findings, code, format_instructions.
+    """
+
+    version: str
+    system: Optional[str] = None
+    sections: List[str]
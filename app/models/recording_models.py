@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+
+class RecordedRequest(BaseModel):
+    """
+    An anonymized review request and how it was served, as recorded for replay.
+
+    Identifiers are keyed digests: requests for the same repository, assignment
+    or client can be told apart, and replayed as such, but not traced back.
+
+    Attributes:
+        at (float): Unix timestamp of when the request arrived.
+        repo (str): Digest of the normalized repository URL.
+        candidate_level (str): The candidate's level.
+        assignment (str): Digest of the assignment description.
+        assignment_length (int): Characters in the assignment description.
+        tenant (Optional[str]): Digest of the client identity.
+        has_candidate_id (bool): Whether the request named a candidate.
+        status (str): "200", the HTTP status of an error, or the exception name.
+        latency (float): Seconds spent serving the request.
+        cache_tier (str): "redis", "store" or "generated"; empty on failure.
+        stages (Dict[str, float]): Seconds spent in each pipeline stage.
+        llm_calls (int): Model calls made.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        llm_latency (float): Seconds spent waiting for model calls.
+        github_calls (int): GitHub API requests made.
+    """
+
+    at: float
+    repo: str
+    candidate_level: str
+    assignment: str
+    assignment_length: int
+    tenant: Optional[str] = None
+    has_candidate_id: bool = False
+    status: str
+    latency: float
+    cache_tier: str = ""
+    stages: Dict[str, float] = Field(default_factory=dict)
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_latency: float = 0.0
+    github_calls: int = 0
@@ -1,7 +1,24 @@
 # File: models/repository_models.py
 
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class RepositoryFile(BaseModel):
+    """
+    Data model for a single file fetched from a repository.
+
+    Attributes:
+        path (str): Path of the file relative to the repository root.
+        content (str): Decoded file contents.
+        sha (Optional[str]): Git blob SHA reported by the GitHub API.
+        size (int): File size in bytes reported by the GitHub API.
+    """
+
+    path: str
+    content: str
+    sha: Optional[str] = None
+    size: int = 0
 
 
 class Result(BaseModel):
@@ -11,10 +28,12 @@ class Result(BaseModel):
     Attributes:
         code_contents (str): Combined contents of all fetched code files.
         file_contents (List[str]): List of file paths for all fetched code files.
+        files (List[RepositoryFile]): Per-file contents of all fetched code files.
     """
 
     code_contents: str
     file_contents: List[str]
+    files: List[RepositoryFile] = Field(default_factory=list)
 
     def dict(self, *args, **kwargs):
         """
@@ -23,4 +42,5 @@ class Result(BaseModel):
         return {
             "code_contents": self.code_contents,
             "file_contents": self.file_contents,
+            "files": [file.model_dump() for file in self.files],
         }
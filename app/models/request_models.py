@@ -1,11 +1,16 @@
 from pydantic import BaseModel, HttpUrl, Field, field_validator
 from typing import Optional, List
+from models.analysis_models import FileIndex, StaticAnalysisReport
 
 
 class ReviewRequest(BaseModel):
     assignment_description: str
     github_repo_url: HttpUrl
     candidate_level: str
+    candidate_id: Optional[str] = None
+    # Template repository the assignment started from; unchanged starter files
+    # are placed in the shared, cacheable part of the prompt
+    starter_repo_url: Optional[HttpUrl] = None
 
     @field_validator("assignment_description")
     def validate_assignment_description(cls, value: str) -> str:
@@ -30,6 +35,8 @@ class ReviewResponse(BaseModel):
     downsides: Optional[str] = ""
     rating: Optional[str] = ""
     conclusion: Optional[str] = ""
+    metrics: Optional[StaticAnalysisReport] = None
+    file_index: Optional[List[FileIndex]] = None
 
     @field_validator("rating")
     def validate_rating(cls, value: Optional[str]) -> Optional[str]:
@@ -0,0 +1,56 @@
+from pydantic import BaseModel
+
+
+class Route(BaseModel):
+    """
+    A model routing tier.
+
+    Attributes:
+        name (str): Route name, recorded in cache keys and metrics.
+        model (str): Model used for reviews on this route.
+        max_tokens (int): Completion token limit for this route.
+        prompt_cost_per_1k (float): USD cost per 1,000 prompt tokens.
+        completion_cost_per_1k (float): USD cost per 1,000 completion tokens.
+    """
+
+    name: str
+    model: str
+    max_tokens: int
+    prompt_cost_per_1k: float = 0.0
+    completion_cost_per_1k: float = 0.0
+
+
+class RouteMetrics(BaseModel):
+    """
+    Aggregated per-route latency and cost metrics for this worker.
+
+    Attributes:
+        requests (int): Number of model calls made on the route.
+        escalations (int): Number of reviews escalated away from the route.
+        repairs (int): Number of malformed outputs fixed with a repair call.
+        total_latency (float): Sum of call latencies in seconds.
+        max_latency (float): Slowest call latency in seconds.
+        prompt_tokens (int): Total prompt tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+        completion_tokens (int): Total completion tokens consumed.
+        cost (float): Estimated total cost in USD.
+    """
+
+    requests: int = 0
+    escalations: int = 0
+    repairs: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    @property
+    def cached_token_ratio(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
@@ -0,0 +1,82 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from models.request_models import ReviewResponse
+from models.usage_models import ReviewUsage
+
+
+class ReviewRecord(BaseModel):
+    """
+    A review persisted in the review store.
+
+    Attributes:
+        id (Optional[int]): Store-assigned identifier.
+        repo_url (str): URL of the reviewed GitHub repository.
+        commit_sha (str): Commit the review was generated for.
+        candidate_level (str): The candidate's level.
+        assignment_hash (str): Hash of the assignment description.
+        candidate_id (Optional[str]): Optional identifier of the candidate.
+        route (str): Model routing tier that produced the review.
+        review (ReviewResponse): The review itself.
+        created_at (float): Unix timestamp of when the review was stored.
+        prompt_version (Optional[str]): Prompt template the review was generated
+            with; None for reviews stored before it was recorded.
+        usage (Optional[ReviewUsage]): Tokens, cost and GitHub calls spent
+            generating the review; None for reviews stored before it was recorded.
+    """
+
+    id: Optional[int] = None
+    repo_url: str
+    commit_sha: str
+    candidate_level: str
+    assignment_hash: str
+    candidate_id: Optional[str] = None
+    route: str
+    review: ReviewResponse
+    created_at: float
+    prompt_version: Optional[str] = None
+    usage: Optional[ReviewUsage] = None
+
+
+class CachedReview(BaseModel):
+    """
+    A review in the Redis cache, with what is needed to judge its freshness.
+
+    The review is kept as the JSON it was serialized to when it was validated and
+    cached, so a cache hit can be sent to the client without parsing it again.
+
+    Attributes:
+        review_json (str): The review, as JSON.
+        created_at (Optional[float]): Unix timestamp of when the review was cached;
+            None for entries cached before ages were recorded.
+        commit_sha (Optional[str]): Commit the review was generated for, if known.
+    """
+
+    review_json: str
+    created_at: Optional[float] = None
+    commit_sha: Optional[str] = None
+
+    @property
+    def review(self) -> ReviewResponse:
+        """The review, parsed from its JSON."""
+        return ReviewResponse.model_validate_json(self.review_json)
+
+    def age(self, now: float) -> float:
+        """Seconds since the review was cached, 0 if unknown."""
+        return max(now - self.created_at, 0.0) if self.created_at else 0.0
+
+
+class ReviewHistoryPage(BaseModel):
+    """
+    A page of past reviews, newest first.
+
+    Attributes:
+        items (List[ReviewRecord]): Reviews on this page.
+        total (int): Total number of matching reviews.
+        page (int): 1-based page number.
+        page_size (int): Maximum number of reviews per page.
+    """
+
+    items: List[ReviewRecord]
+    total: int
+    page: int
+    page_size: int
@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+
+class ReviewUsage(BaseModel):
+    """
+    Resources consumed while serving a single review request.
+
+    Attributes:
+        cache_tier (str): Where the review came from: "redis", "store" or
+            "generated"; empty if the request failed.
+        llm_calls (int): Model calls made, including repairs and escalations.
+        models (List[str]): Models called, in call order.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+        cost (float): Estimated LLM cost in USD.
+        llm_latency (float): Seconds spent waiting for model calls.
+        github_calls (int): GitHub API requests made.
+        stages (Dict[str, float]): Seconds spent in each pipeline stage.
+    """
+
+    cache_tier: str = ""
+    llm_calls: int = 0
+    models: List[str] = Field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    llm_latency: float = 0.0
+    github_calls: int = 0
+    stages: Dict[str, float] = Field(default_factory=dict)
+
+
+class UsageReport(BaseModel):
+    """
+    Usage aggregated over a day for all reviews, a tenant or a candidate.
+
+    Attributes:
+        period (str): UTC day, as YYYY-MM-DD.
+        scope (str): "total", "tenant" or "candidate".
+        scope_id (str): Tenant or candidate identifier; "all" for the total.
+        reviews (int): Review requests served, from any cache tier.
+        llm_calls (int): Model calls made.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+        cost (float): Estimated LLM cost in USD.
+        llm_latency (float): Seconds spent waiting for model calls.
+        github_calls (int): GitHub API requests made.
+        cache_tiers (Dict[str, int]): Requests by the tier that served them.
+    """
+
+    period: str
+    scope: str
+    scope_id: str
+    reviews: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    llm_latency: float = 0.0
+    github_calls: int = 0
+    cache_tiers: Dict[str, int] = Field(default_factory=dict)
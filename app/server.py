@@ -0,0 +1,67 @@
+"""
+Production entry point: serves the application with several worker processes.
+
+Workers share nothing in memory. The review cache, single-flight locks, rate
+budgets and cache invalidation all go through Redis, so any number of workers on
+any number of nodes can run behind one load balancer.
+
+Usage (from the app directory):
+    WEB_CONCURRENCY=4 python server.py
+"""
+
+import importlib.util
+import logging
+import uvicorn
+from services.configs.config import settings
+from utils.logging_config.logging_config import configure_logging, logging_config
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Preferred implementation and fallback for each "auto" setting
+LOOP_IMPLEMENTATIONS = ("uvloop", "asyncio")
+HTTP_IMPLEMENTATIONS = ("httptools", "h11")
+
+
+def resolve_implementation(requested: str, implementations: tuple) -> str:
+    """
+    Resolves an "auto" server setting to the fastest installed implementation.
+
+    Args:
+        requested (str): Configured value, e.g. "auto", "uvloop" or "asyncio".
+        implementations (tuple): Preferred module, then the built-in fallback.
+
+    Returns:
+        str: The implementation name to pass to uvicorn.
+    """
+    if requested != "auto":
+        return requested
+    preferred, fallback = implementations
+    if importlib.util.find_spec(preferred) is not None:
+        return preferred
+    logger.warning(f"{preferred} is not installed, falling back to {fallback}.")
+    return fallback
+
+
+def main():
+    configure_logging()
+    loop = resolve_implementation(settings.SERVER_LOOP, LOOP_IMPLEMENTATIONS)
+    http = resolve_implementation(settings.SERVER_HTTP, HTTP_IMPLEMENTATIONS)
+    logger.info(
+        f"Starting CodeReviewAI with {settings.SERVER_WORKERS} workers "
+        f"on {settings.SERVER_HOST}:{settings.SERVER_PORT} (loop={loop}, http={http})"
+    )
+    # The app is passed as an import string so each worker imports it itself;
+    # nothing is built at import time, so workers start without shared state
+    uvicorn.run(
+        "api.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop=loop,
+        http=http,
+        log_config=logging_config,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from redis.asyncio import Redis
+from exceptions.excpetions import BudgetExceededError
+from models.routing_models import Route
+from models.usage_models import ReviewUsage, UsageReport
+from services.configs.config import settings
+from services.routing.model_router import estimate_cost
+from services.storage.review_store import ReviewStore, get_review_store
+from utils.redis_cache.redis_utils import get_redis_client, usage_key
+from utils.sharding.sharding_utils import hash_tag
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Redis counters are integers, so cost and latency are kept in small units
+MICRO_USD = 1_000_000
+MILLISECONDS = 1000
+
+# Usage of the review request being served, shared by the tasks it starts
+_current_usage: ContextVar[Optional[ReviewUsage]] = ContextVar(
+    "review_usage", default=None
+)
+
+
+@contextmanager
+def track_usage() -> Iterator[ReviewUsage]:
+    """
+    Records the usage of the code run inside the block, e.g. one review request.
+
+    Yields:
+        ReviewUsage: Usage recorded so far; complete once the block exits.
+    """
+    usage = ReviewUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def current_usage() -> Optional[ReviewUsage]:
+    """Returns the usage being recorded, or None outside track_usage."""
+    return _current_usage.get()
+
+
+def record_llm_call(
+    route: Route,
+    latency: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+):
+    """
+    Adds a model call to the usage being recorded.
+
+    Args:
+        route (Route): The route the call was made on.
+        latency (float): Call latency in seconds.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+    """
+    usage = _current_usage.get()
+    if usage is None:
+        return
+    usage.llm_calls += 1
+    usage.models.append(route.model)
+    usage.prompt_tokens += prompt_tokens
+    usage.completion_tokens += completion_tokens
+    usage.cached_tokens += cached_tokens
+    usage.cost += estimate_cost(route, prompt_tokens, completion_tokens)
+    usage.llm_latency += latency
+
+
+def record_github_call():
+    """Adds a GitHub API request to the usage being recorded."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.github_calls += 1
+
+
+def set_cache_tier(tier: str):
+    """
+    Records which tier served the review being recorded.
+
+    Args:
+        tier (str): "redis", "store" or "generated".
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.cache_tier = tier
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """
+    Adds the time spent inside the block to a stage of the usage being recorded.
+
+    Args:
+        name (str): Stage name, e.g. "fetch" or "generate".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        usage = _current_usage.get()
+        if usage is not None:
+            elapsed = time.perf_counter() - started
+            usage.stages[name] = usage.stages.get(name, 0.0) + elapsed
+
+
+def usage_period(now: Optional[datetime] = None) -> str:
+    """Returns the UTC day usage is aggregated under, as YYYY-MM-DD."""
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def seconds_until_next_period(now: Optional[datetime] = None) -> int:
+    """Returns the whole seconds left until the next UTC day starts."""
+    now = now or datetime.now(timezone.utc)
+    midnight = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+    return max(int((midnight + timedelta(days=1) - now).total_seconds()), 1)
+
+
+def usage_scopes(
+    tenant: Optional[str], candidate_id: Optional[str]
+) -> List[Tuple[str, str]]:
+    """
+    Returns the (scope, scope_id) totals a review's usage is added to.
+
+    Args:
+        tenant (Optional[str]): Client the review was served to.
+        candidate_id (Optional[str]): Candidate the review was for.
+
+    Returns:
+        List[Tuple[str, str]]: The overall total, then the tenant and candidate.
+    """
+    scopes = [("total", "all")]
+    if tenant:
+        scopes.append(("tenant", tenant))
+    if candidate_id:
+        scopes.append(("candidate", candidate_id))
+    return scopes
+
+
+def usage_counters(usage: ReviewUsage) -> Counter:
+    """
+    Converts a review's usage into the integer counters aggregated in Redis.
+
+    Args:
+        usage (ReviewUsage): Usage of one review request.
+
+    Returns:
+        Counter: Counter increments by field.
+    """
+    counters = Counter(
+        {
+            "llm_calls": usage.llm_calls,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cached_tokens": usage.cached_tokens,
+            "github_calls": usage.github_calls,
+            "cost_microusd": round(usage.cost * MICRO_USD),
+            "llm_latency_ms": round(usage.llm_latency * MILLISECONDS),
+        }
+    )
+    if usage.cache_tier:
+        counters["reviews"] += 1
+    counters[f"tier:{usage.cache_tier or 'failed'}"] += 1
+    return counters
+
+
+def report_from_counters(
+    period: str, scope: str, scope_id: str, counters: Dict[str, str]
+) -> UsageReport:
+    """
+    Builds a usage report from the counters of a Redis usage hash.
+
+    Args:
+        period (str): UTC day, as YYYY-MM-DD.
+        scope (str): "total", "tenant" or "candidate".
+        scope_id (str): Tenant or candidate identifier; "all" for the total.
+        counters (Dict[str, str]): Fields and values of the hash.
+
+    Returns:
+        UsageReport: The aggregated usage.
+    """
+    values = {field: int(value) for field, value in counters.items()}
+    return UsageReport(
+        period=period,
+        scope=scope,
+        scope_id=scope_id,
+        reviews=values.get("reviews", 0),
+        llm_calls=values.get("llm_calls", 0),
+        prompt_tokens=values.get("prompt_tokens", 0),
+        completion_tokens=values.get("completion_tokens", 0),
+        cached_tokens=values.get("cached_tokens", 0),
+        github_calls=values.get("github_calls", 0),
+        cost=values.get("cost_microusd", 0) / MICRO_USD,
+        llm_latency=values.get("llm_latency_ms", 0) / MILLISECONDS,
+        cache_tiers={
+            field[len("tier:") :]: value
+            for field, value in values.items()
+            if field.startswith("tier:")
+        },
+    )
+
+
+class UsageLedger:
+    """
+    Per-worker usage counters, flushed to Redis in the background.
+
+    Recording a review only updates in-memory counters; every
+    USAGE_FLUSH_INTERVAL the deltas are added to the shared Redis totals in one
+    transaction, and every USAGE_PERSIST_INTERVAL the Redis totals of the current
+    and previous day are copied to the review store.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Counter] = defaultdict(Counter)
+        self._task: Optional[asyncio.Task] = None
+
+    def add(
+        self, usage: ReviewUsage, tenant: Optional[str], candidate_id: Optional[str]
+    ):
+        """
+        Adds a review's usage to the totals of its tenant, candidate and day.
+
+        Args:
+            usage (ReviewUsage): Usage of one review request.
+            tenant (Optional[str]): Client the review was served to.
+            candidate_id (Optional[str]): Candidate the review was for.
+        """
+        counters = usage_counters(usage)
+        period = usage_period()
+        for scope, scope_id in usage_scopes(tenant, candidate_id):
+            self._pending[usage_key(period, scope, scope_id)].update(counters)
+
+    def pending(self, key: str, field: str) -> int:
+        """Returns the part of a counter not yet flushed to Redis."""
+        counters = self._pending.get(key)
+        return counters[field] if counters else 0
+
+    async def flush(self, redis: Redis):
+        """
+        Adds the pending counters to the Redis totals.
+
+        If Redis is unavailable the counters are kept for the next flush.
+
+        Args:
+            redis (Redis): Redis client.
+        """
+        pending, self._pending = self._pending, defaultdict(Counter)
+        retention = settings.USAGE_RETENTION_DAYS * 24 * 3600
+        # A day's counters share a node, so each day is flushed in one transaction.
+        # It either applies every increment or none, so a failed flush can be
+        # retried without counting anything twice
+        days = defaultdict(dict)
+        for key, counters in pending.items():
+            days[hash_tag(key)][key] = counters
+        for day in days.values():
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    for key, counters in day.items():
+                        for field, value in counters.items():
+                            if value:
+                                pipe.hincrby(key, field, value)
+                        pipe.expire(key, retention)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not flush usage counters, keeping them: {e}")
+                for key, counters in day.items():
+                    self._pending[key].update(counters)
+
+    async def persist(self, redis: Redis, store: ReviewStore):
+        """
+        Copies the Redis usage totals of today and yesterday to the review store.
+
+        Yesterday is included so that its last increments are stored once the day
+        has ended.
+
+        Args:
+            redis (Redis): Redis client.
+            store (ReviewStore): Review store the totals are kept in.
+        """
+        today = datetime.now(timezone.utc)
+        for period in (usage_period(today - timedelta(days=1)), usage_period(today)):
+            async for key in redis.scan_iter(match=usage_key(period, "*", "*")):
+                _, _, scope, scope_id = key.split(":", 3)
+                counters = await redis.hgetall(key)
+                if counters:
+                    await store.save_usage(
+                        report_from_counters(period, scope, scope_id, counters)
+                    )
+
+    async def _run(self):
+        last_persist = time.monotonic()
+        while True:
+            await asyncio.sleep(settings.USAGE_FLUSH_INTERVAL)
+            redis = await get_redis_client()
+            await self.flush(redis)
+            if time.monotonic() - last_persist < settings.USAGE_PERSIST_INTERVAL:
+                continue
+            last_persist = time.monotonic()
+            try:
+                await self.persist(redis, await get_review_store())
+            except Exception as e:
+                logger.warning(f"Could not persist usage totals: {e}")
+
+    def start(self):
+        """Starts the background flushes on the running event loop."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background flushes and flushes what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(await get_redis_client())
+
+
+_usage_ledger: Optional[UsageLedger] = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    global _usage_ledger
+    if _usage_ledger is None:
+        _usage_ledger = UsageLedger()
+    return _usage_ledger
+
+
+def _reset_usage_ledger():
+    global _usage_ledger
+    _usage_ledger = None
+
+
+# Counters recorded before a fork belong to the parent, which flushes them
+os.register_at_fork(after_in_child=_reset_usage_ledger)
+
+
+async def check_tenant_budget(redis: Redis, tenant: str) -> bool:
+    """
+    Checks a tenant's LLM spend of the day against TENANT_DAILY_BUDGET.
+
+    A budget of 0 is unlimited. Budgets need tenants authenticated by API_KEYS,
+    and are not enforced without them. If Redis is unavailable the budget is not
+    enforced either.
+
+    Args:
+        redis (Redis): Redis client.
+        tenant (str): Client identity from client_identity.
+
+    Returns:
+        bool: True if the tenant spent TENANT_BUDGET_DOWNGRADE_AT of its budget,
+        so new reviews should use the fast route without escalation.
+
+    Raises:
+        BudgetExceededError: If the tenant spent its whole budget.
+    """
+    budget = settings.TENANT_DAILY_BUDGET
+    if budget <= 0 or not settings.API_KEYS:
+        return False
+    key = usage_key(usage_period(), "tenant", tenant)
+    try:
+        flushed = int(await redis.hget(key, "cost_microusd") or 0)
+    except Exception as e:
+        logger.warning(f"Usage totals unavailable, not enforcing budgets: {e}")
+        return False
+    spent = (flushed + get_usage_ledger().pending(key, "cost_microusd")) / MICRO_USD
+    if spent >= budget:
+        raise BudgetExceededError(tenant, seconds_until_next_period())
+    return spent >= budget * settings.TENANT_BUDGET_DOWNGRADE_AT
+
+
+async def read_usage(
+    redis: Redis, store: ReviewStore, period: str, scope: str, scope_id: str
+) -> UsageReport:
+    """
+    Reads the usage totals of a day, from Redis or else from the review store.
+
+    Args:
+        redis (Redis): Redis client.
+        store (ReviewStore): Review store the totals are persisted in.
+        period (str): UTC day, as YYYY-MM-DD.
+        scope (str): "total", "tenant" or "candidate".
+        scope_id (str): Tenant or candidate identifier; "all" for the total.
+
+    Returns:
+        UsageReport: The totals; all zero if nothing was recorded.
+    """
+    try:
+        counters = await redis.hgetall(usage_key(period, scope, scope_id))
+        if counters:
+            return report_from_counters(period, scope, scope_id, counters)
+    except Exception as e:
+        logger.warning(f"Usage totals unavailable in Redis, reading the store: {e}")
+    stored = await store.find_usage(period, scope, scope_id)
+    return stored or UsageReport(period=period, scope=scope, scope_id=scope_id)
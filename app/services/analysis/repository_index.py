@@ -0,0 +1,457 @@
+import ast
+import asyncio
+import logging
+import posixpath
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Pattern, Tuple
+from models.analysis_models import FileIndex, RepositoryIndex
+from models.repository_models import RepositoryFile
+from services.analysis.static_analysis import batch_files
+from services.configs.config import settings
+from services.github.ingestion import CHARS_PER_TOKEN
+from utils.executor.executor_utils import run_cpu_bound
+from utils.redis_cache.redis_utils import file_index_key, get_redis_client
+
+logger = logging.getLogger("CodeReviewAI")
+
+MAX_SYMBOLS = 50  # Per file, so generated code does not bloat the response
+UNKNOWN_LANGUAGE = "Other"
+
+LANGUAGES = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".jsx": "JavaScript",
+    ".mjs": "JavaScript",
+    ".cjs": "JavaScript",
+    ".ts": "TypeScript",
+    ".tsx": "TypeScript",
+    ".go": "Go",
+    ".java": "Java",
+    ".kt": "Kotlin",
+    ".cs": "C#",
+    ".rb": "Ruby",
+    ".php": "PHP",
+    ".rs": "Rust",
+    ".c": "C",
+    ".h": "C",
+    ".cpp": "C++",
+    ".hpp": "C++",
+    ".swift": "Swift",
+    ".html": "HTML",
+    ".css": "CSS",
+    ".scss": "CSS",
+    ".sql": "SQL",
+    ".sh": "Shell",
+    ".md": "Markdown",
+    ".json": "JSON",
+    ".yml": "YAML",
+    ".yaml": "YAML",
+    ".toml": "TOML",
+}
+LANGUAGE_NAMES = {"Dockerfile": "Dockerfile", "Makefile": "Makefile"}
+
+# Line-based patterns for languages without a parser in the standard library;
+# good enough for a summary and far cheaper than a full grammar
+_JS_SYMBOLS = [
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)"),
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)"),
+    re.compile(
+        r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?"
+        r"(?:\([^)]*\)|\w+)\s*=>"
+    ),
+]
+_JS_IMPORTS = [
+    re.compile(r"^\s*import\s+(?:[^'\"]*?\s+from\s+)?['\"]([^'\"]+)['\"]"),
+    re.compile(r"^\s*export\s+[^'\"]*?\s+from\s+['\"]([^'\"]+)['\"]"),
+    re.compile(r"\brequire\(\s*['\"]([^'\"]+)['\"]\s*\)"),
+]
+_JVM_SYMBOLS = [
+    re.compile(r"\b(?:class|interface|enum|record|object)\s+(\w+)"),
+]
+SYMBOL_PATTERNS: Dict[str, List[Pattern]] = {
+    "JavaScript": _JS_SYMBOLS,
+    "TypeScript": _JS_SYMBOLS
+    + [re.compile(r"^\s*(?:export\s+)?(?:interface|type|enum)\s+(\w+)")],
+    "Go": [
+        re.compile(r"^func\s+(?:\([^)]*\)\s*)?(\w+)"),
+        re.compile(r"^type\s+(\w+)\s+(?:struct|interface)\b"),
+    ],
+    "Java": _JVM_SYMBOLS,
+    "Kotlin": _JVM_SYMBOLS + [re.compile(r"^\s*(?:\w+\s+)*fun\s+(\w+)")],
+    "C#": _JVM_SYMBOLS,
+    "Ruby": [
+        re.compile(r"^\s*(?:class|module)\s+([\w:]+)"),
+        re.compile(r"^\s*def\s+(?:self\.)?(\w+[?!]?)"),
+    ],
+    "PHP": [
+        re.compile(r"^\s*(?:abstract\s+|final\s+)?(?:class|interface|trait)\s+(\w+)"),
+        re.compile(r"^\s*(?:\w+\s+)*function\s+(\w+)"),
+    ],
+    "Rust": [re.compile(r"^\s*(?:pub\s+)?(?:fn|struct|enum|trait)\s+(\w+)")],
+}
+IMPORT_PATTERNS: Dict[str, List[Pattern]] = {
+    "JavaScript": _JS_IMPORTS,
+    "TypeScript": _JS_IMPORTS,
+    "Go": [re.compile(r"^\s*(?:import\s+)?(?:\w+\s+)?\"([^\"]+)\"\s*$")],
+    "Java": [re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)")],
+    "Kotlin": [re.compile(r"^\s*import\s+([\w.]+)")],
+    "C#": [re.compile(r"^\s*using\s+([\w.]+)\s*;")],
+    "Ruby": [re.compile(r"^\s*require_relative\s+['\"]([^'\"]+)['\"]")],
+    "PHP": [re.compile(r"^\s*(?:require|include)(?:_once)?\s*\(?\s*['\"]([^'\"]+)")],
+    "Rust": [re.compile(r"^\s*(?:pub\s+)?(?:use|mod)\s+([\w:]+)")],
+}
+SCRIPT_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".rb", ".php")
+RUST_PATH_PREFIXES = ("crate::", "self::", "super::")
+ENTRY_POINTS = {"main", "app", "index", "server", "manage", "cli", "__main__"}
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9]{3,}")
+
+
+def detect_language(path: str) -> str:
+    """
+    Detects a file's language from its name.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: The language, or UNKNOWN_LANGUAGE.
+    """
+    name = path.rsplit("/", 1)[-1]
+    if name in LANGUAGE_NAMES:
+        return LANGUAGE_NAMES[name]
+    return LANGUAGES.get(posixpath.splitext(name)[1].lower(), UNKNOWN_LANGUAGE)
+
+
+def _python_structure(content: str) -> Tuple[List[str], List[str]]:
+    """Collects classes, functions and methods, and imports, from a Python AST."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return [], []
+
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            symbols.append(node.name)
+            symbols.extend(
+                f"{node.name}.{item.name}"
+                for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+            )
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            # "from a import b" is recorded as "a.b": b may be a module or a name
+            # in a, which resolution tells apart. Relative imports keep their dots.
+            base = "." * node.level + (f"{node.module}." if node.module else "")
+            imports.extend(
+                base.rstrip(".") if alias.name == "*" else base + alias.name
+                for alias in node.names
+            )
+    return symbols, imports
+
+
+def index_file(path: str, content: str) -> dict:
+    """
+    Indexes a single file.
+
+    Executed in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        path (str): Path of the file.
+        content (str): Decoded file contents.
+
+    Returns:
+        dict: Language, LOC, symbols and imports of the file.
+    """
+    language = detect_language(path)
+    lines = content.splitlines()
+    if language == "Python":
+        symbols, imports = _python_structure(content)
+    else:
+        symbols, imports = [], []
+        symbol_patterns = SYMBOL_PATTERNS.get(language, [])
+        import_patterns = IMPORT_PATTERNS.get(language, [])
+        for line in lines:
+            for pattern in symbol_patterns:
+                match = pattern.search(line)
+                if match:
+                    symbols.append(match.group(1))
+                    break
+            for pattern in import_patterns:
+                imports.extend(pattern.findall(line))
+    return {
+        "path": path,
+        "language": language,
+        "loc": sum(1 for line in lines if line.strip()),
+        "symbols": list(dict.fromkeys(symbols))[:MAX_SYMBOLS],
+        "imports": list(dict.fromkeys(imports)),
+    }
+
+
+def index_files(items: List[Tuple[str, str]]) -> List[dict]:
+    """
+    Runs index_file over a batch of (path, content) pairs in one worker call.
+
+    Args:
+        items (List[Tuple[str, str]]): Paths and contents of the files to index.
+
+    Returns:
+        List[dict]: Results of index_file for each file.
+    """
+    return [index_file(path, content) for path, content in items]
+
+
+def _module_names(path: str) -> List[str]:
+    """Dotted names a file can be imported by, from its full path down to its name."""
+    parts = posixpath.splitext(path)[0].split("/")
+    if parts[-1] in ("__init__", "index", "mod"):
+        parts = parts[:-1]
+    return [".".join(parts[start:]) for start in range(len(parts))]
+
+
+def resolve_dependencies(entries: List[FileIndex]):
+    """
+    Resolves each entry's imports to repository files, in place.
+
+    Dotted imports match a file by a suffix of its module path, so packages
+    importable from a subdirectory resolve too. Relative specifiers resolve
+    against the importing file, and Go imports against package directories.
+    Imports of third-party packages match nothing and are left out.
+
+    Args:
+        entries (List[FileIndex]): Index entries of all repository files.
+    """
+    modules: Dict[str, List[str]] = {}
+    directories: Dict[str, List[str]] = {}
+    paths = {entry.path for entry in entries}
+    for entry in entries:
+        for name in _module_names(entry.path):
+            modules.setdefault(name, []).append(entry.path)
+        directories.setdefault(posixpath.dirname(entry.path), []).append(entry.path)
+
+    def resolve_dotted(name: str) -> List[str]:
+        # "a.b.c" is module c, or a name defined in module a.b
+        while name:
+            if name in modules:
+                return modules[name] if len(modules[name]) == 1 else []
+            name = name.rpartition(".")[0]
+        return []
+
+    def resolve_relative(entry: FileIndex, specifier: str) -> List[str]:
+        target = posixpath.normpath(
+            posixpath.join(posixpath.dirname(entry.path), specifier)
+        )
+        candidates = [target] + [
+            f"{target}{suffix}"
+            for extension in SCRIPT_EXTENSIONS
+            for suffix in (extension, f"/index{extension}")
+        ]
+        return next(([path] for path in candidates if path in paths), [])
+
+    def resolve_python_relative(entry: FileIndex, name: str) -> List[str]:
+        level = len(name) - len(name.lstrip("."))
+        package = entry.path.split("/")[:-1]
+        package = package[: len(package) - (level - 1)] if level > 1 else package
+        return resolve_dotted(".".join(package + [name[level:]]).strip("."))
+
+    for entry in entries:
+        dependencies = []
+        for name in entry.imports:
+            if entry.language == "Python" and name.startswith("."):
+                resolved = resolve_python_relative(entry, name)
+            elif name.startswith("."):
+                resolved = resolve_relative(entry, name)
+            elif entry.language == "Go":
+                resolved = next(
+                    (
+                        files
+                        for directory, files in directories.items()
+                        if directory and f"/{name}".endswith(f"/{directory}")
+                    ),
+                    [],
+                )
+            else:
+                for prefix in RUST_PATH_PREFIXES:
+                    name = name.removeprefix(prefix)
+                resolved = resolve_dotted(name.replace("::", ".").replace("/", "."))
+            dependencies.extend(path for path in resolved if path != entry.path)
+        entry.dependencies = list(dict.fromkeys(dependencies))
+
+
+async def load_cached_entries(files: List[RepositoryFile]) -> Dict[str, FileIndex]:
+    """
+    Loads the index entries of files indexed before, by blob SHA.
+
+    The index is only an optimization, so Redis errors are logged and treated
+    as misses.
+
+    Args:
+        files (List[RepositoryFile]): The repository files.
+
+    Returns:
+        Dict[str, FileIndex]: Cached entries by path.
+    """
+    keyed = [file for file in files if file.sha]
+    if not keyed:
+        return {}
+    try:
+        redis = await get_redis_client()
+        values = await redis.mget(
+            [file_index_key(file.sha, detect_language(file.path)) for file in keyed]
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load cached file index: {e}")
+        return {}
+    return {
+        # The same blob may have been indexed under another path
+        file.path: FileIndex.model_validate_json(value).model_copy(
+            update={"path": file.path}
+        )
+        for file, value in zip(keyed, values)
+        if value
+    }
+
+
+async def save_entries(files: List[RepositoryFile], entries: List[FileIndex]):
+    """
+    Caches newly computed index entries by blob SHA.
+
+    Args:
+        files (List[RepositoryFile]): The indexed files, in the order of entries.
+        entries (List[FileIndex]): Their index entries.
+    """
+    try:
+        redis = await get_redis_client()
+        async with redis.pipeline(transaction=False) as pipe:
+            for file, entry in zip(files, entries):
+                if file.sha:
+                    pipe.set(
+                        file_index_key(file.sha, entry.language),
+                        entry.model_dump_json(exclude={"dependencies"}),
+                        ex=settings.FILE_INDEX_TTL,
+                    )
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to cache file index: {e}")
+
+
+async def index_repository(files: List[RepositoryFile]) -> RepositoryIndex:
+    """
+    Indexes the fetched files and the dependency graph between them.
+
+    Entries are cached by blob SHA, so only files changed since any earlier
+    review are parsed; parsing runs in the process pool for large batches.
+
+    Args:
+        files (List[RepositoryFile]): The fetched repository files.
+
+    Returns:
+        RepositoryIndex: The repository index.
+    """
+    cached = await load_cached_entries(files)
+    missing = [file for file in files if file.path not in cached]
+    batch_results = await asyncio.gather(
+        *(
+            run_cpu_bound(
+                index_files, batch, size=sum(len(content) for _, content in batch)
+            )
+            for batch in batch_files(missing)
+        )
+    )
+    computed = [FileIndex(**result) for batch in batch_results for result in batch]
+    if computed:
+        await save_entries(missing, computed)
+
+    by_path = {**cached, **{entry.path: entry for entry in computed}}
+    entries = [by_path[file.path] for file in files]
+    resolve_dependencies(entries)
+    languages = Counter()
+    for entry in entries:
+        languages[entry.language] += entry.loc
+    logger.info(
+        f"Indexed {len(entries)} files ({len(cached)} cached): "
+        f"{dict(languages.most_common())}"
+    )
+    return RepositoryIndex(files=entries, languages=dict(languages.most_common()))
+
+
+def relevance_scores(index: RepositoryIndex, assignment: str = "") -> Dict[str, float]:
+    """
+    Scores files by how much they tell about the solution.
+
+    Files imported by many others, entry points and files whose names or
+    symbols mention words of the assignment score highest.
+
+    Args:
+        index (RepositoryIndex): The repository index.
+        assignment (str): The assignment description.
+
+    Returns:
+        Dict[str, float]: Score by path.
+    """
+    importers = Counter(
+        dependency for entry in index.files for dependency in entry.dependencies
+    )
+    keywords = set(WORD_PATTERN.findall(assignment.lower()))
+    scores = {}
+    for entry in index.files:
+        stem = posixpath.splitext(posixpath.basename(entry.path))[0].lower()
+        words = set(WORD_PATTERN.findall(entry.path.lower()))
+        words.update(
+            word
+            for symbol in entry.symbols
+            for word in WORD_PATTERN.findall(symbol.lower())
+        )
+        scores[entry.path] = (
+            2.0 * importers[entry.path]
+            + 3.0 * (stem in ENTRY_POINTS)
+            + min(len(keywords & words), 5)
+            + min(len(entry.symbols), 10) / 10
+            + (entry.language != UNKNOWN_LANGUAGE)
+        )
+    return scores
+
+
+def select_relevant_files(
+    files: List[RepositoryFile],
+    index: Optional[RepositoryIndex],
+    max_tokens: int,
+    assignment: str = "",
+) -> Tuple[List[RepositoryFile], List[str]]:
+    """
+    Picks the most relevant files that fit in the prompt's token budget.
+
+    Args:
+        files (List[RepositoryFile]): Candidate files, in prompt order.
+        index (Optional[RepositoryIndex]): The repository index.
+        max_tokens (int): Estimated token budget, 0 for unlimited.
+        assignment (str): The assignment description.
+
+    Returns:
+        Tuple[List[RepositoryFile], List[str]]: The selected files in their
+        original order, and the paths of the files left out.
+    """
+    tokens = {file.path: len(file.content) // CHARS_PER_TOKEN for file in files}
+    if not max_tokens or sum(tokens.values()) <= max_tokens or index is None:
+        return files, []
+
+    scores = relevance_scores(index, assignment)
+    selected, used = set(), 0
+    # Smaller files first among equals, so the budget covers more of them
+    for file in sorted(
+        files, key=lambda file: (-scores.get(file.path, 0), tokens[file.path])
+    ):
+        if used + tokens[file.path] <= max_tokens:
+            selected.add(file.path)
+            used += tokens[file.path]
+    return (
+        [file for file in files if file.path in selected],
+        [file.path for file in files if file.path not in selected],
+    )
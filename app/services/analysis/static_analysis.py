@@ -0,0 +1,326 @@
+import ast
+import asyncio
+import hashlib
+import logging
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+from models.analysis_models import StaticAnalysisReport
+from models.repository_models import RepositoryFile
+from services.configs.config import settings
+from utils.executor.executor_utils import run_cpu_bound
+
+logger = logging.getLogger("CodeReviewAI")
+
+MAX_LINE_LENGTH = 120
+DUPLICATE_WINDOW = 6  # Number of consecutive significant lines forming a block
+MAX_HOTSPOTS = 5
+
+# Files that carry little review value and are replaced by a note in the prompt
+LOW_VALUE_NAMES = {
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "Cargo.lock",
+    "go.sum",
+    "composer.lock",
+}
+LOW_VALUE_SUFFIXES = (
+    ".min.js",
+    ".min.css",
+    ".map",
+    ".svg",
+    ".csv",
+    ".tsv",
+    ".ipynb",
+    ".log",
+)
+LOW_VALUE_DIRS = ("node_modules/", "dist/", "build/", "vendor/", ".venv/", "venv/")
+LOW_VALUE_MIN_SIZE = 20000  # Data files above this size are omitted
+
+BRANCH_NODES = (
+    ast.If,
+    ast.For,
+    ast.AsyncFor,
+    ast.While,
+    ast.IfExp,
+    ast.With,
+    ast.AsyncWith,
+    ast.Assert,
+    ast.comprehension,
+    ast.match_case,
+)
+TODO_PATTERN = re.compile(r"\b(TODO|FIXME|XXX|HACK)\b")
+
+
+def low_value_reason(path: str, content: str) -> Optional[str]:
+    """
+    Determines whether a file is low-value for the LLM review.
+
+    Args:
+        path (str): Path of the file.
+        content (str): Decoded file contents.
+
+    Returns:
+        Optional[str]: The reason the file is low-value, or None if it should be kept.
+    """
+    name = path.rsplit("/", 1)[-1]
+    if name in LOW_VALUE_NAMES:
+        return "lock file"
+    if path.endswith(LOW_VALUE_SUFFIXES):
+        return "generated or data file"
+    if any(path.startswith(d) or f"/{d}" in path for d in LOW_VALUE_DIRS):
+        return "vendored or build output"
+    if path.endswith((".json", ".yaml", ".yml", ".xml")) and (
+        len(content) > LOW_VALUE_MIN_SIZE
+    ):
+        return "large data file"
+    lines = content.splitlines() or [""]
+    if len(content) > 1000 and len(content) / len(lines) > 500:
+        return "minified"
+    return None
+
+
+def _function_complexity(node: ast.AST) -> int:
+    """Approximates the cyclomatic complexity of a function node."""
+    complexity = 1
+    for child in ast.walk(node):
+        if isinstance(child, BRANCH_NODES):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+        elif isinstance(child, ast.Try):
+            complexity += len(child.handlers) + bool(child.orelse)
+    return complexity
+
+
+def _python_metrics(content: str) -> dict:
+    """Collects AST metrics and Python-specific lint counts."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return {"syntax_error": 1}
+
+    functions = []
+    classes = 0
+    lint = Counter()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append((node.name, _function_complexity(node)))
+        elif isinstance(node, ast.ClassDef):
+            classes += 1
+        elif isinstance(node, ast.ExceptHandler) and node.type is None:
+            lint["bare_except"] += 1
+        elif isinstance(node, ast.ImportFrom) and any(
+            alias.name == "*" for alias in node.names
+        ):
+            lint["wildcard_import"] += 1
+    return {"functions": functions, "classes": classes, "lint": lint}
+
+
+def _duplicate_windows(lines: List[str]) -> List[str]:
+    """Hashes every window of consecutive significant lines."""
+    significant = [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.strip().startswith(("#", "//", "import ", "from "))
+    ]
+    return [
+        hashlib.md5(
+            "\n".join(significant[i : i + DUPLICATE_WINDOW]).encode()
+        ).hexdigest()
+        for i in range(len(significant) - DUPLICATE_WINDOW + 1)
+    ]
+
+
+def analyze_file(path: str, content: str) -> dict:
+    """
+    Runs the local analyzers on a single file.
+
+    Executed in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        path (str): Path of the file.
+        content (str): Decoded file contents.
+
+    Returns:
+        dict: Metrics, lint counts and duplicate-block hashes for the file.
+    """
+    lines = content.splitlines()
+    lint = Counter()
+    for line in lines:
+        if len(line) > MAX_LINE_LENGTH:
+            lint["long_line"] += 1
+        if line != line.rstrip():
+            lint["trailing_whitespace"] += 1
+        if TODO_PATTERN.search(line):
+            lint["todo"] += 1
+
+    result = {
+        "path": path,
+        "loc": sum(1 for line in lines if line.strip()),
+        "functions": [],
+        "classes": 0,
+        "lint": lint,
+        "windows": _duplicate_windows(lines),
+    }
+    if path.endswith(".py"):
+        python_metrics = _python_metrics(content)
+        if python_metrics.get("syntax_error"):
+            lint["syntax_error"] += 1
+        else:
+            result["functions"] = python_metrics["functions"]
+            result["classes"] = python_metrics["classes"]
+            lint.update(python_metrics["lint"])
+    result["lint"] = dict(lint)
+    return result
+
+
+def analyze_files(items: List[Tuple[str, str]]) -> List[dict]:
+    """
+    Runs analyze_file over a batch of (path, content) pairs in one worker call.
+
+    Args:
+        items (List[Tuple[str, str]]): Paths and contents of the files to analyze.
+
+    Returns:
+        List[dict]: Results of analyze_file for each file.
+    """
+    return [analyze_file(path, content) for path, content in items]
+
+
+def batch_files(files: List[RepositoryFile]) -> List[List[Tuple[str, str]]]:
+    """
+    Groups files into batches of roughly the CPU offload threshold in size.
+
+    Batching keeps many small files from each paying for a round trip to the pool.
+
+    Args:
+        files (List[RepositoryFile]): The files to analyze.
+
+    Returns:
+        List[List[Tuple[str, str]]]: Batches of (path, content) pairs.
+    """
+    batches, batch, batch_size = [], [], 0
+    for file in files:
+        batch.append((file.path, file.content))
+        batch_size += len(file.content)
+        if batch_size >= settings.CPU_OFFLOAD_THRESHOLD_BYTES:
+            batches.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def build_report(results: List[dict], omitted_files: List[str]) -> StaticAnalysisReport:
+    """
+    Aggregates per-file analyzer results into a repository-level report.
+
+    Args:
+        results (List[dict]): Results of analyze_file for each file.
+        omitted_files (List[str]): Paths of low-value files left out of the prompt.
+
+    Returns:
+        StaticAnalysisReport: The aggregated report.
+    """
+    lint_counts = Counter()
+    complexities: List[Tuple[int, str]] = []
+    window_counts = Counter()
+    classes = 0
+    for result in results:
+        lint_counts.update(result["lint"])
+        classes += result["classes"]
+        complexities.extend(
+            (complexity, f"{result['path']}:{name}")
+            for name, complexity in result["functions"]
+        )
+        # Repeated blocks within a single file count as duplicates too
+        window_counts.update(result["windows"])
+
+    complexities.sort(reverse=True)
+    return StaticAnalysisReport(
+        files_analyzed=len(results),
+        total_loc=sum(result["loc"] for result in results),
+        functions=len(complexities),
+        classes=classes,
+        max_complexity=complexities[0][0] if complexities else 0,
+        average_complexity=(
+            round(sum(c for c, _ in complexities) / len(complexities), 2)
+            if complexities
+            else 0.0
+        ),
+        duplicate_blocks=sum(1 for count in window_counts.values() if count > 1),
+        lint_counts=dict(lint_counts),
+        hotspots=[f"{name} ({c})" for c, name in complexities[:MAX_HOTSPOTS]],
+        omitted_files=omitted_files,
+    )
+
+
+async def run_static_analysis(
+    files: List[RepositoryFile],
+) -> Tuple[StaticAnalysisReport, List[RepositoryFile]]:
+    """
+    Runs the local analyzers across the fetched files, offloading large batches
+    to the process pool.
+
+    Args:
+        files (List[RepositoryFile]): The fetched repository files.
+
+    Returns:
+        Tuple[StaticAnalysisReport, List[RepositoryFile]]: The aggregated report and
+        the files worth sending to the LLM.
+    """
+    kept, omitted = [], []
+    for file in files:
+        reason = low_value_reason(file.path, file.content)
+        if reason:
+            omitted.append(f"{file.path} ({reason})")
+        else:
+            kept.append(file)
+
+    batch_results = await asyncio.gather(
+        *(
+            run_cpu_bound(
+                analyze_files, batch, size=sum(len(content) for _, content in batch)
+            )
+            for batch in batch_files(kept)
+        )
+    )
+    results = [result for batch in batch_results for result in batch]
+    report = build_report(results, omitted)
+    logger.info(
+        f"Static analysis: {report.files_analyzed} files, {report.total_loc} LOC, "
+        f"{len(omitted)} files omitted from the prompt."
+    )
+    return report, kept
+
+
+def format_findings(report: StaticAnalysisReport) -> str:
+    """
+    Formats the report into a compact summary for the prompt.
+
+    Args:
+        report (StaticAnalysisReport): The aggregated report.
+
+    Returns:
+        str: A short, line-oriented findings summary.
+    """
+    lines = [
+        f"- Files analyzed: {report.files_analyzed}, LOC: {report.total_loc}",
+        f"- Functions: {report.functions}, classes: {report.classes}, "
+        f"complexity avg/max: {report.average_complexity}/{report.max_complexity}",
+        f"- Duplicate code blocks: {report.duplicate_blocks}",
+    ]
+    if report.lint_counts:
+        lint = ", ".join(
+            f"{rule}={count}" for rule, count in sorted(report.lint_counts.items())
+        )
+        lines.append(f"- Lint counts: {lint}")
+    if report.hotspots:
+        lines.append(f"- Most complex functions: {', '.join(report.hotspots)}")
+    if report.omitted_files:
+        lines.append(f"- Omitted low-value files: {', '.join(report.omitted_files)}")
+    return "\n".join(lines)
@@ -3,8 +3,171 @@ import os
 
 class Settings:
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+    # Overridable for GitHub Enterprise or a local fake in load tests
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # Comma-separated Redis nodes to shard keys over by consistent hashing;
+    # REDIS_URL alone if empty
+    REDIS_URLS = os.getenv("REDIS_URLS", "")
+    # Dedicated node pools for key namespaces, each free to use its own
+    # maxmemory-policy, as namespace=url,url;namespace=url. E.g. snapshots and
+    # reviews on allkeys-lru nodes, locks and usage counters on noeviction nodes
+    REDIS_NAMESPACE_URLS = os.getenv("REDIS_NAMESPACE_URLS", "")
+    # Points per node on the hash ring; more spread keys more evenly
+    REDIS_RING_REPLICAS = int(os.getenv("REDIS_RING_REPLICAS", "160"))
+    # Worker processes for CPU-bound work (0 = one per CPU)
+    PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0"))
+    # Payloads smaller than this run inline on the event loop
+    CPU_OFFLOAD_THRESHOLD_BYTES = int(
+        os.getenv("CPU_OFFLOAD_THRESHOLD_BYTES", str(256 * 1024))
+    )
+
+    # Model routing tiers: cheap model for triage, large model when needed
+    FAST_MODEL = os.getenv("FAST_MODEL", "gpt-4o-mini")
+    FAST_MAX_TOKENS = int(os.getenv("FAST_MAX_TOKENS", "1024"))
+    FAST_PROMPT_COST_PER_1K = float(os.getenv("FAST_PROMPT_COST_PER_1K", "0.00015"))
+    FAST_COMPLETION_COST_PER_1K = float(
+        os.getenv("FAST_COMPLETION_COST_PER_1K", "0.0006")
+    )
+    LARGE_MODEL = os.getenv("LARGE_MODEL", "gpt-4-1106-preview")
+    LARGE_MAX_TOKENS = int(os.getenv("LARGE_MAX_TOKENS", "1024"))
+    LARGE_PROMPT_COST_PER_1K = float(os.getenv("LARGE_PROMPT_COST_PER_1K", "0.01"))
+    LARGE_COMPLETION_COST_PER_1K = float(
+        os.getenv("LARGE_COMPLETION_COST_PER_1K", "0.03")
+    )
+    # Repositories up to this many bytes of code use the fast route
+    ROUTING_SMALL_REPO_BYTES = int(os.getenv("ROUTING_SMALL_REPO_BYTES", "50000"))
+    # Comma-separated candidate levels that always use the fast route
+    ROUTING_FAST_LEVELS = os.getenv("ROUTING_FAST_LEVELS", "junior")
+
+    # Prompt layout from the prompt template registry; part of review cache keys
+    PROMPT_TEMPLATE = os.getenv("PROMPT_TEMPLATE", "review-v2")
+    # Review output format: json_schema (strict schema, newer models), json_object
+    # (any JSON-mode model) or off (headed markdown sections)
+    STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "json_object")
+    # Completion limit of the call that reformats an unparsable review
+    REPAIR_MAX_TOKENS = int(os.getenv("REPAIR_MAX_TOKENS", "700"))
+
+    # Comma-separated LLM backends to balance across: openai, compatible, stub
+    LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "openai")
+    OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "16"))
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+    # Any server exposing the OpenAI chat completions API (vLLM, llama.cpp, TGI...)
+    COMPATIBLE_BASE_URL = os.getenv("COMPATIBLE_BASE_URL", "http://localhost:8001/v1")
+    COMPATIBLE_API_KEY = os.getenv("COMPATIBLE_API_KEY", "")
+    # Overrides the route model, since self-hosted servers name models differently
+    COMPATIBLE_MODEL = os.getenv("COMPATIBLE_MODEL", "")
+    COMPATIBLE_CONCURRENCY = int(os.getenv("COMPATIBLE_CONCURRENCY", "8"))
+    COMPATIBLE_TIMEOUT = float(os.getenv("COMPATIBLE_TIMEOUT", "120"))
+    STUB_CONCURRENCY = int(os.getenv("STUB_CONCURRENCY", "64"))
+    STUB_TIMEOUT = float(os.getenv("STUB_TIMEOUT", "5"))
+    # Simulated latency of the local stub, for load tests
+    STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0"))
+
+    # Default request deadline in seconds, overridable per request by header
+    REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "180"))
+    # How often to check whether the client is still connected
+    DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+    # Cache fetched repository files, even partial ones, so a retry resumes
+    CACHE_PARTIAL_RESULTS = os.getenv("CACHE_PARTIAL_RESULTS", "true").lower() == "true"
+    SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", "600"))
+
+    # Durable review store: sqlite:///path/to/file.db or postgresql://...
+    REVIEW_STORE_URL = os.getenv("REVIEW_STORE_URL", "sqlite:///reviews.db")
+    REVIEW_CACHE_TTL = int(os.getenv("REVIEW_CACHE_TTL", "3600"))
+    # Expired reviews are kept this much longer and served as stale while they
+    # are revalidated in the background (0 = regenerate in the foreground)
+    REVIEW_STALE_GRACE = int(os.getenv("REVIEW_STALE_GRACE", "86400"))
+
+    # Push webhooks: signature secret, prefetch queue bound and burst debounce
+    GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", "100"))
+    PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+    PREFETCH_DEBOUNCE_SECONDS = float(os.getenv("PREFETCH_DEBOUNCE_SECONDS", "30"))
+    # Optional assignment to pre-compute reviews for on every push
+    PREFETCH_ASSIGNMENT = os.getenv("PREFETCH_ASSIGNMENT", "")
+    PREFETCH_LEVELS = os.getenv("PREFETCH_LEVELS", "junior,middle,senior")
+
+    # Server entry point: worker processes, event loop and HTTP parser
+    SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # "auto" uses uvloop / httptools when installed and falls back otherwise
+    SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+    SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+
+    # Rate budgets shared by all workers through Redis (0 = unlimited)
+    LLM_RATE_LIMIT = int(os.getenv("LLM_RATE_LIMIT", "0"))
+    LLM_RATE_WINDOW = float(os.getenv("LLM_RATE_WINDOW", "60"))
+    GITHUB_RATE_LIMIT = int(os.getenv("GITHUB_RATE_LIMIT", "0"))
+    GITHUB_RATE_WINDOW = float(os.getenv("GITHUB_RATE_WINDOW", "3600"))
+    # Only one worker generates a given review; the others wait for its result
+    REVIEW_LOCK_TTL = float(os.getenv("REVIEW_LOCK_TTL", "180"))
+    REVIEW_LOCK_POLL_INTERVAL = float(os.getenv("REVIEW_LOCK_POLL_INTERVAL", "0.25"))
+    # Admission control per worker: reviews generated at once (0 = unlimited),
+    # requests waiting for a slot and the longest wait before shedding with 503
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+    ADMISSION_MAX_QUEUED = int(os.getenv("ADMISSION_MAX_QUEUED", "16"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+    # Reviews each client may request per window, shared by all workers (0 =
+    # unlimited)
+    CLIENT_QUOTA = int(os.getenv("CLIENT_QUOTA", "0"))
+    CLIENT_QUOTA_WINDOW = float(os.getenv("CLIENT_QUOTA_WINDOW", "3600"))
+    # Clients are tenants authenticated by an API key in API_KEY_HEADER, from
+    # comma-separated "key:tenant" pairs; requests without a known key get 401.
+    # Without API_KEYS, clients are identified by their address, read from
+    # X-Forwarded-For only when the peer is one of the comma-separated
+    # TRUSTED_PROXIES. The CLIENT_ID_HEADER value is only a label within the
+    # client, for logs.
+    API_KEYS = os.getenv("API_KEYS", "")
+    API_KEY_HEADER = os.getenv("API_KEY_HEADER", "X-API-Key")
+    TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+    CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "X-Client-ID")
+    # Circuit breakers per dependency and worker: consecutive failures that open
+    # one, seconds before trial calls, and concurrent trial calls
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1"))
+    # Serve the newest stored review of any commit while a dependency is down
+    SERVE_STALE_ON_OUTAGE = os.getenv("SERVE_STALE_ON_OUTAGE", "true").lower() == "true"
+    # Ingestion budgets per repository fetch (0 = unlimited): largest file, total
+    # bytes, file count, and estimated prompt tokens after which fetching stops
+    INGEST_MAX_FILE_BYTES = int(os.getenv("INGEST_MAX_FILE_BYTES", "1000000"))
+    INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", "8000000"))
+    INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "1000"))
+    INGEST_MAX_TOKENS = int(os.getenv("INGEST_MAX_TOKENS", "100000"))
+    # Estimated tokens of candidate code in the prompt; the most relevant files by
+    # the repository index are kept (0 = unlimited)
+    PROMPT_CODE_MAX_TOKENS = int(os.getenv("PROMPT_CODE_MAX_TOKENS", "60000"))
+    # Per-file index entries are keyed by blob SHA, so they never go stale
+    FILE_INDEX_TTL = int(os.getenv("FILE_INDEX_TTL", str(7 * 24 * 3600)))
+    # Usage ledger: seconds between flushes of this worker's counters to Redis and
+    # of the Redis totals to the review store, and days Redis keeps the totals
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+    USAGE_PERSIST_INTERVAL = float(os.getenv("USAGE_PERSIST_INTERVAL", "300"))
+    USAGE_RETENTION_DAYS = int(os.getenv("USAGE_RETENTION_DAYS", "35"))
+    # Daily LLM spend per tenant in USD (0 = unlimited), enforced only on tenants
+    # authenticated by API_KEYS. Past this share of it new reviews stay on the
+    # fast route; past all of it they are rejected until the next UTC day
+    TENANT_DAILY_BUDGET = float(os.getenv("TENANT_DAILY_BUDGET", "0"))
+    TENANT_BUDGET_DOWNGRADE_AT = float(os.getenv("TENANT_BUDGET_DOWNGRADE_AT", "0.8"))
+    # Recording of /api/review traffic for offline replay: JSONL file of
+    # anonymized request shapes and stage timings (empty = off), the share of
+    # requests recorded, and the key of the digests replacing identifiers
+    # (required: without it recording stays off, as unkeyed digests of repository
+    # URLs can be reversed by hashing candidate URLs)
+    RECORD_REQUESTS_PATH = os.getenv("RECORD_REQUESTS_PATH", "")
+    RECORD_SAMPLE_RATE = float(os.getenv("RECORD_SAMPLE_RATE", "0.01"))
+    RECORD_HASH_KEY = os.getenv("RECORD_HASH_KEY", "")
+    # Token expected in the X-Admin-Token header of admin endpoints (empty =
+    # admin endpoints disabled), and the longest profile they take in seconds
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    # Seconds before a slow GitHub file download is sent again (0 = no hedging)
+    GITHUB_HEDGE_DELAY = float(os.getenv("GITHUB_HEDGE_DELAY", "0"))
+    # Readiness probe timeout for dependencies
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "1"))
 
 
 settings = Settings()
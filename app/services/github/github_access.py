@@ -1,30 +1,51 @@
 import logging
 import aiohttp
-import base64
-from typing import List
+from typing import Dict, List, Optional
 from services.configs.config import settings
-from models.repository_models import Result
+from exceptions.excpetions import DeadlineExceededError
+from models.repository_models import RepositoryFile, Result
+from services.accounting.usage_ledger import record_github_call
+from services.github.ingestion import IngestBudget, stream_file_text
 from exceptions.github_api_error_handler import (
     GitHubAPIError,
     FileFetchError,
     GitHubErrorHandler,
 )
-from utils.logging_config.logging_config import logging_config
+from utils.coordination.coordination_utils import spend_rate_budget
+from utils.deadline.deadline_utils import Deadline
+from utils.github.github_utils import owner_and_repo
+from utils.resilience.resilience_utils import circuit_breaker, hedged
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("CodeReviewAI")
 
 # GitHub API headers
 GITHUB_HEADERS = {"Authorization": f"token {settings.GITHUB_TOKEN}"}
 
 
-async def fetch_repository_contents(repo_url: str) -> Result:
+@circuit_breaker("github")
+async def fetch_repository_contents(
+    repo_url: str,
+    deadline: Optional[Deadline] = None,
+    fetched_files: Optional[List[RepositoryFile]] = None,
+) -> Result:
+    """
+    Fetches all files of a repository from the GitHub contents API.
+
+    Args:
+        repo_url (str): URL of the GitHub repository.
+        deadline (Optional[Deadline]): Request deadline, checked before each GitHub call.
+        fetched_files (Optional[List[RepositoryFile]]): Files fetched by an earlier,
+            possibly interrupted attempt. Files whose blob SHA is unchanged are reused
+            instead of downloaded again, and newly fetched files are appended to the
+            list as they arrive, so the caller can keep partial progress on cancellation.
+
+    Returns:
+        Result: The repository contents.
+    """
     try:
         repo_url_str = str(repo_url)
-        owner_repo = repo_url_str.rstrip("/").split("/")[-2:]
-        repo_api_url = (
-            f"https://api.github.com/repos/{owner_repo[0]}/{owner_repo[1]}/contents"
-        )
+        owner, repo = owner_and_repo(repo_url_str)
+        repo_api_url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/contents"
 
         logger.info(f"Fetching repository contents from: {repo_api_url}")
 
@@ -35,12 +56,49 @@ async def fetch_repository_contents(repo_url: str) -> Result:
 
         async with aiohttp.ClientSession() as session:
             all_files = []
-            await fetch_files_recursively(session, repo_api_url, headers, all_files)
+            await fetch_files_recursively(
+                session,
+                repo_api_url,
+                headers,
+                all_files,
+                deadline,
+                max_files=settings.INGEST_MAX_FILES,
+            )
+        if settings.INGEST_MAX_FILES and len(all_files) >= settings.INGEST_MAX_FILES:
+            logger.warning(
+                f"Listing stopped at the {settings.INGEST_MAX_FILES} file budget."
+            )
 
         file_contents = [file_info["path"] for file_info in all_files]
-        code_contents = await fetch_file_contents(all_files)
 
-        return Result(code_contents=code_contents, file_contents=file_contents)
+        # Reuse files from an earlier attempt unless they changed since
+        files = fetched_files if fetched_files is not None else []
+        listed = {(file_info["path"], file_info.get("sha")) for file_info in all_files}
+        files[:] = [file for file in files if (file.path, file.sha) in listed]
+        reused = {file.path for file in files}
+        budget = IngestBudget.from_settings()
+        for file in files:
+            budget.charge(file.content, file.size or len(file.content))
+        if reused:
+            logger.info(f"Resuming with {len(reused)} previously fetched files.")
+
+        await fetch_file_contents(
+            [file_info for file_info in all_files if file_info["path"] not in reused],
+            deadline=deadline,
+            files=files,
+            budget=budget,
+        )
+        logger.info(f"Ingested {repo_url_str}: {budget.summary()}.")
+        order = {path: index for index, path in enumerate(file_contents)}
+        files.sort(key=lambda file: order[file.path])
+
+        return Result(
+            code_contents=build_code_contents(files),
+            file_contents=file_contents,
+            files=files,
+        )
+    except DeadlineExceededError:
+        raise
     except Exception as e:
         logger.error(f"An error occurred while fetching repository contents: {str(e)}")
         raise GitHubAPIError(
@@ -48,10 +106,94 @@ async def fetch_repository_contents(repo_url: str) -> Result:
         ) from e
 
 
+@circuit_breaker("github")
+async def fetch_repository_listing(
+    repo_url: str, deadline: Optional[Deadline] = None
+) -> Dict[str, str]:
+    """
+    Lists a repository's files and their blob SHAs without downloading them.
+
+    Args:
+        repo_url (str): URL of the GitHub repository.
+        deadline (Optional[Deadline]): Request deadline, checked before each GitHub call.
+
+    Returns:
+        Dict[str, str]: Blob SHA by file path.
+    """
+    try:
+        owner, repo = owner_and_repo(repo_url)
+        repo_api_url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/contents"
+        headers = {
+            "Authorization": f"token {settings.GITHUB_TOKEN}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+        all_files = []
+        async with aiohttp.ClientSession() as session:
+            await fetch_files_recursively(
+                session, repo_api_url, headers, all_files, deadline
+            )
+        return {file_info["path"]: file_info.get("sha") for file_info in all_files}
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error while listing repository files: {str(e)}")
+        raise GitHubAPIError("Error occurred while listing repository files.") from e
+
+
+@circuit_breaker("github")
+async def fetch_commit_sha(repo_url: str) -> str:
+    """
+    Fetches the SHA of the latest commit on the repository's default branch.
+
+    Args:
+        repo_url (str): URL of the GitHub repository.
+
+    Returns:
+        str: The commit SHA.
+    """
+    try:
+        owner, repo = owner_and_repo(repo_url)
+        commit_url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/commits/HEAD"
+        headers = {
+            "Authorization": f"token {settings.GITHUB_TOKEN}",
+            # Returns the bare SHA instead of the full commit object
+            "Accept": "application/vnd.github.sha",
+        }
+        await spend_rate_budget(
+            "github", settings.GITHUB_RATE_LIMIT, settings.GITHUB_RATE_WINDOW
+        )
+        record_github_call()
+        async with aiohttp.ClientSession() as session:
+            async with session.get(commit_url, headers=headers) as response:
+                if response.status != 200:
+                    GitHubErrorHandler.handle_http_error(
+                        status_code=response.status,
+                        url=commit_url,
+                        message="Failed to fetch the latest commit.",
+                    )
+                return (await response.text()).strip()
+    except Exception as e:
+        logger.error(f"Error while fetching the latest commit SHA: {str(e)}")
+        raise GitHubAPIError("Error occurred while fetching the latest commit.") from e
+
+
 async def fetch_files_recursively(
-    session, url: str, headers: dict, all_files: List[dict]
+    session,
+    url: str,
+    headers: dict,
+    all_files: List[dict],
+    deadline: Optional[Deadline] = None,
+    max_files: int = 0,
 ):
     try:
+        if max_files and len(all_files) >= max_files:
+            return
+        if deadline:
+            deadline.check("fetch_files_recursively")
+        await spend_rate_budget(
+            "github", settings.GITHUB_RATE_LIMIT, settings.GITHUB_RATE_WINDOW, deadline
+        )
+        record_github_call()
         async with session.get(url, headers=headers) as response:
             if response.status != 200:
                 GitHubErrorHandler.handle_http_error(
@@ -62,46 +204,111 @@ async def fetch_files_recursively(
             contents = await response.json()
 
         for item in contents:
+            if max_files and len(all_files) >= max_files:
+                break
             if item["type"] == "file":
                 all_files.append(item)
             elif item["type"] == "dir":
-                await fetch_files_recursively(session, item["url"], headers, all_files)
+                await fetch_files_recursively(
+                    session, item["url"], headers, all_files, deadline, max_files
+                )
+    except DeadlineExceededError:
+        raise
     except Exception as e:
         logger.error(f"Error while fetching files recursively: {str(e)}")
         raise GitHubAPIError("Error occurred while fetching files recursively.") from e
 
 
-async def fetch_file_contents(all_files: List[dict]) -> str:
-    code_contents = ""
+def build_code_contents(files: List[RepositoryFile]) -> str:
+    """
+    Joins fetched files into a single string with a path header per file.
+
+    Args:
+        files (List[RepositoryFile]): The fetched repository files.
+
+    Returns:
+        str: Combined contents of all files.
+    """
+    return "".join(f"\n\n# File: {file.path}\n{file.content}" for file in files)
+
+
+async def fetch_file_contents(
+    all_files: List[dict],
+    deadline: Optional[Deadline] = None,
+    files: Optional[List[RepositoryFile]] = None,
+    budget: Optional[IngestBudget] = None,
+) -> List[RepositoryFile]:
+    """
+    Streams and decodes the given files within an ingestion budget.
+
+    Files larger than the remaining budget are skipped using the listing size,
+    downloads are cut off once they exceed it, and fetching stops when the byte,
+    file count or prompt token budget is used up.
+
+    Args:
+        all_files (List[dict]): File entries from the GitHub contents API.
+        deadline (Optional[Deadline]): Request deadline, checked before each download.
+        files (Optional[List[RepositoryFile]]): List to append fetched files to.
+        budget (Optional[IngestBudget]): Limits for the whole fetch. Defaults to
+            the INGEST_* settings.
+
+    Returns:
+        List[RepositoryFile]: The fetched files.
+    """
+    files = [] if files is None else files
+    budget = budget or IngestBudget.from_settings()
     async with aiohttp.ClientSession() as session:
-        for file_info in all_files:
+        for index, file_info in enumerate(all_files):
+            exhausted_by = budget.exhausted_by()
+            if exhausted_by:
+                budget.skipped[f"over {exhausted_by} budget"] += len(all_files) - index
+                logger.info(
+                    f"Ingestion {exhausted_by} budget reached, skipping "
+                    f"{len(all_files) - index} files."
+                )
+                break
+            if not budget.admits(file_info["path"], file_info.get("size", 0)):
+                continue
+            if deadline:
+                deadline.check("fetch_file_contents")
             # Use API URL instead of raw content URL
             file_url = file_info["url"]
+
+            async def download() -> Optional[str]:
+                # Each attempt, hedged ones included, is a GitHub request
+                await spend_rate_budget(
+                    "github",
+                    settings.GITHUB_RATE_LIMIT,
+                    settings.GITHUB_RATE_WINDOW,
+                    deadline,
+                )
+                record_github_call()
+                return await stream_file_text(
+                    session, file_url, GITHUB_HEADERS, budget.file_limit()
+                )
+
             try:
-                async with session.get(file_url, headers=GITHUB_HEADERS) as response:
-                    if response.status != 200:
-                        GitHubErrorHandler.handle_file_fetch_error(file_url)
-                    file_data = await response.json()
-
-                    # Check if the file is too large
-                    if file_data.get("size", 0) > 1000000:  # Skip files larger than 1MB
-                        logger.warning(f"Skipping large file: {file_info['path']}")
-                        continue
-
-                    content = file_data.get("content", "")
-                    if content:
-                        try:
-                            decoded_content = base64.b64decode(content).decode(
-                                "utf-8", errors="replace"
-                            )
-                            code_contents += f"\n\n# File: {file_info['path']}\n"
-                            code_contents += decoded_content
-                        except Exception as e:
-                            logger.error(f"Error decoding file content: {str(e)}")
-                    else:
-                        logger.warning(
-                            f"No content found for file: {file_info['path']}"
+                content = await hedged(download, settings.GITHUB_HEDGE_DELAY)
+                if content is None:
+                    logger.warning(
+                        f"Skipping large or binary file: {file_info['path']}"
+                    )
+                    budget.skipped["too large or binary"] += 1
+                elif content:
+                    size = file_info.get("size") or len(content)
+                    budget.charge(content, size)
+                    files.append(
+                        RepositoryFile(
+                            path=file_info["path"],
+                            content=content,
+                            sha=file_info.get("sha"),
+                            size=size,
                         )
+                    )
+                else:
+                    logger.warning(f"No content found for file: {file_info['path']}")
+            except DeadlineExceededError:
+                raise
             except FileFetchError as e:
                 logger.error(f"Error fetching file: {str(e)}")
                 continue
@@ -110,4 +317,4 @@ async def fetch_file_contents(all_files: List[dict]) -> str:
                     f"Unexpected error processing file {file_info['path']}: {str(e)}"
                 )
                 continue
-    return code_contents
+    return files
@@ -0,0 +1,174 @@
+import aiohttp
+import codecs
+import logging
+from collections import Counter
+from typing import Optional
+from exceptions.github_api_error_handler import GitHubErrorHandler
+from services.configs.config import settings
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Media type of the contents API that returns the file itself instead of JSON
+# with base64 content, so files can be streamed
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+STREAM_CHUNK_BYTES = 64 * 1024
+CHARS_PER_TOKEN = 4  # Rough estimate for code, as used for prompt budgets
+
+
+class IngestBudget:
+    """
+    Byte, file and token limits for fetching one repository.
+
+    A limit of 0 is unlimited. Files are admitted up front by the size in the
+    repository listing, bounded again while they stream, and charged once decoded.
+    """
+
+    def __init__(
+        self, max_file_bytes: int, max_bytes: int, max_files: int, max_tokens: int
+    ):
+        """
+        Initializes an empty budget.
+
+        Args:
+            max_file_bytes (int): Largest file downloaded.
+            max_bytes (int): Total bytes downloaded per repository.
+            max_files (int): Files downloaded per repository.
+            max_tokens (int): Estimated prompt tokens of the downloaded code;
+                fetching stops once they are reached.
+        """
+        self.max_file_bytes = max_file_bytes
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_tokens = max_tokens
+        self.bytes = 0
+        self.files = 0
+        self.chars = 0
+        self.skipped: Counter = Counter()
+
+    @classmethod
+    def from_settings(cls) -> "IngestBudget":
+        return cls(
+            settings.INGEST_MAX_FILE_BYTES,
+            settings.INGEST_MAX_BYTES,
+            settings.INGEST_MAX_FILES,
+            settings.INGEST_MAX_TOKENS,
+        )
+
+    @property
+    def tokens(self) -> int:
+        return self.chars // CHARS_PER_TOKEN
+
+    def exhausted_by(self) -> Optional[str]:
+        """Returns the limit that has been reached, or None."""
+        if self.max_files and self.files >= self.max_files:
+            return "file count"
+        if self.max_bytes and self.bytes >= self.max_bytes:
+            return "byte"
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            return "token"
+        return None
+
+    def file_limit(self) -> Optional[int]:
+        """Most bytes the next file may have, or None if unlimited."""
+        limits = [
+            limit
+            for limit in (
+                self.max_file_bytes,
+                self.max_bytes and self.max_bytes - self.bytes,
+            )
+            if limit
+        ]
+        return min(limits) if limits else None
+
+    def admits(self, path: str, size: int) -> bool:
+        """
+        Decides from the listing whether a file is worth downloading.
+
+        Args:
+            path (str): Path of the file.
+            size (int): Size reported by the repository listing.
+
+        Returns:
+            bool: False if the file is known to exceed the remaining budget.
+        """
+        limit = self.file_limit()
+        if limit is not None and size > limit:
+            logger.warning(f"Skipping {path}: {size} bytes exceeds the {limit} limit.")
+            self.skipped["too large"] += 1
+            return False
+        return True
+
+    def charge(self, content: str, size: int):
+        """Records a downloaded file of size bytes, decoded to content."""
+        self.files += 1
+        self.bytes += size
+        self.chars += len(content)
+
+    def summary(self) -> str:
+        skipped = ", ".join(
+            f"{count} {reason}" for reason, count in self.skipped.items()
+        )
+        return f"{self.files} files, {self.bytes} bytes, ~{self.tokens} tokens" + (
+            f"; skipped {skipped}" if skipped else ""
+        )
+
+
+def abandon_response(response: aiohttp.ClientResponse) -> None:
+    """
+    Drops a partly read response without returning a busy connection to the pool.
+
+    A connection still receiving the body is closed. One whose body arrived in full
+    is already back in the pool, paused for reading until its buffer drains, so the
+    buffered bytes are discarded to let the next request on it proceed.
+
+    Args:
+        response (aiohttp.ClientResponse): The response being abandoned.
+    """
+    if response.connection is None:
+        response.content.read_nowait()
+    response.close()
+
+
+async def stream_file_text(
+    session, file_url: str, headers: dict, limit: Optional[int]
+) -> Optional[str]:
+    """
+    Downloads a file in chunks and decodes it incrementally as UTF-8.
+
+    Memory stays bounded by the limit: the download is abandoned as soon as the
+    declared or received length exceeds it.
+
+    Args:
+        session: The aiohttp session.
+        file_url (str): Contents API URL of the file.
+        headers (dict): Request headers; the Accept header is set to RAW_MEDIA_TYPE.
+        limit (Optional[int]): Largest acceptable size in bytes, None for no limit.
+
+    Returns:
+        Optional[str]: The decoded text, with undecodable bytes replaced, or None if
+        the file is over the limit or binary.
+
+    Raises:
+        FileFetchError: If GitHub does not return the file.
+    """
+    async with session.get(
+        file_url, headers={**headers, "Accept": RAW_MEDIA_TYPE}
+    ) as response:
+        if response.status != 200:
+            GitHubErrorHandler.handle_file_fetch_error(file_url)
+        if limit is not None and (response.content_length or 0) > limit:
+            abandon_response(response)
+            return None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parts, received = [], 0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_BYTES):
+            if not received and b"\0" in chunk[:8000]:
+                abandon_response(response)
+                return None  # Binary file, as git itself detects them
+            received += len(chunk)
+            if limit is not None and received > limit:
+                abandon_response(response)
+                return None
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
@@ -0,0 +1,105 @@
+import os
+from typing import List, Optional
+from exceptions.excpetions import CircuitOpenError
+from services.configs.config import settings
+from services.llm.providers import (
+    LLMProvider,
+    LocalStubProvider,
+    OpenAICompatibleProvider,
+    OpenAIProvider,
+)
+from utils.resilience.resilience_utils import CircuitBreaker, get_circuit_breaker
+
+
+def build_provider(name: str) -> LLMProvider:
+    """
+    Builds a provider from its configured name.
+
+    Args:
+        name (str): One of "openai", "compatible" or "stub".
+
+    Returns:
+        LLMProvider: The configured provider.
+    """
+    if name == "openai":
+        return OpenAIProvider(settings.OPENAI_CONCURRENCY, settings.OPENAI_TIMEOUT)
+    if name == "compatible":
+        return OpenAICompatibleProvider(
+            base_url=settings.COMPATIBLE_BASE_URL,
+            api_key=settings.COMPATIBLE_API_KEY,
+            model_override=settings.COMPATIBLE_MODEL,
+            concurrency=settings.COMPATIBLE_CONCURRENCY,
+            timeout=settings.COMPATIBLE_TIMEOUT,
+        )
+    if name == "stub":
+        return LocalStubProvider(
+            settings.STUB_CONCURRENCY, settings.STUB_TIMEOUT, settings.STUB_LATENCY
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def build_providers() -> List[LLMProvider]:
+    """
+    Builds every provider listed in LLM_PROVIDERS.
+
+    Returns:
+        List[LLMProvider]: The configured providers.
+    """
+    names = [name.strip() for name in settings.LLM_PROVIDERS.split(",") if name.strip()]
+    return [build_provider(name) for name in names]
+
+
+_providers: Optional[List[LLMProvider]] = None
+
+
+def get_providers() -> List[LLMProvider]:
+    """
+    Returns the configured providers, building them on first use.
+
+    Returns:
+        List[LLMProvider]: The providers listed in LLM_PROVIDERS.
+    """
+    global _providers
+    if _providers is None:
+        _providers = build_providers()
+    return _providers
+
+
+def reset_providers():
+    """Drops the built providers, so the next call builds fresh clients."""
+    global _providers
+    _providers = None
+
+
+# HTTP clients must not be shared across a fork; each worker builds its own
+os.register_at_fork(after_in_child=reset_providers)
+
+
+def provider_breaker(provider: LLMProvider) -> CircuitBreaker:
+    """Returns the circuit breaker guarding calls to a provider."""
+    return get_circuit_breaker(f"llm:{provider.name}")
+
+
+def select_provider() -> LLMProvider:
+    """
+    Picks the least loaded provider, balancing work across backends.
+
+    Providers whose circuit breaker is open are skipped, so traffic fails over to
+    the remaining backends while one is down.
+
+    Returns:
+        LLMProvider: The provider with the lowest share of its concurrency pool in use.
+
+    Raises:
+        CircuitOpenError: If every provider's breaker is open.
+    """
+    providers = get_providers()
+    available = [
+        provider for provider in providers if provider_breaker(provider).allows_calls()
+    ]
+    if not available:
+        retry_after = min(
+            provider_breaker(provider).retry_after() for provider in providers
+        )
+        raise CircuitOpenError("LLM provider", max(int(retry_after + 0.5), 1))
+    return min(available, key=lambda provider: provider.load)
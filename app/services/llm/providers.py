@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+import json
+from typing import List, Optional
+import aiohttp
+from exceptions.excpetions import InvalidRequestError, OpenAIError, RateLimitError
+from models.llm_models import Completion
+from services.configs.config import settings
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Simulated prompt cache of the stub: about 128 tokens per block, as at OpenAI
+PREFIX_BLOCK_CHARS = 512
+MAX_CACHED_PREFIXES = 100_000
+
+
+class LLMProvider(ABC):
+    """
+    Base class for chat completion backends.
+
+    Each provider owns its concurrency pool and timeout, so one slow backend cannot
+    starve the others. Implementations translate backend errors into the
+    application's RateLimitError, InvalidRequestError and OpenAIError.
+    """
+
+    def __init__(self, name: str, concurrency: int, timeout: float):
+        """
+        Initializes the provider.
+
+        Args:
+            name (str): Provider name, used in logs and metrics.
+            concurrency (int): Maximum number of in-flight requests.
+            timeout (float): Per-request timeout in seconds.
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def load(self) -> float:
+        """Fraction of the concurrency pool currently in use."""
+        return self.in_flight / self.concurrency
+
+    async def complete(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[dict] = None,
+    ) -> Completion:
+        """
+        Runs a chat completion within the provider's concurrency pool and timeout.
+
+        Args:
+            messages (List[dict]): Chat messages.
+            model (str): Requested model name.
+            max_tokens (int): Completion token limit.
+            temperature (float): Sampling temperature.
+            response_format (Optional[dict]): OpenAI-style response format, e.g. a
+                JSON schema the output must follow. None for free text.
+
+        Returns:
+            Completion: The normalized completion.
+        """
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    self._complete(
+                        messages, model, max_tokens, temperature, response_format
+                    ),
+                    timeout=self.timeout,
+                )
+        except asyncio.TimeoutError as e:
+            raise OpenAIError(
+                f"{self.name} provider timed out after {self.timeout} seconds."
+            ) from e
+        finally:
+            self.in_flight -= 1
+
+    @abstractmethod
+    async def _complete(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[dict] = None,
+    ) -> Completion:
+        """Performs the backend call."""
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    Provider backed by the official OpenAI SDK.
+
+    Uses the async client, so cancelling a request closes the HTTP connection
+    instead of leaving a worker thread waiting on the response. The SDK is imported
+    here rather than at module level because it dominates the application's import
+    time and deployments using other providers never need it.
+    """
+
+    def __init__(self, concurrency: int, timeout: float):
+        super().__init__("openai", concurrency, timeout)
+        import openai
+
+        self.openai = openai
+        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+    async def _complete(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[dict] = None,
+    ) -> Completion:
+        openai = self.openai
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                response_format=response_format or openai.NOT_GIVEN,
+            )
+        except openai.RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after", "1")
+            raise RateLimitError(int(float(retry_after))) from e
+        except openai.BadRequestError as e:
+            raise InvalidRequestError(str(e)) from e
+        except openai.OpenAIError as e:
+            raise OpenAIError(str(e)) from e
+
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        return Completion(
+            content=(
+                (response.choices[0].message.content or "") if response.choices else ""
+            ),
+            model=response.model,
+            provider=self.name,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            cached_tokens=(details.cached_tokens or 0) if details else 0,
+        )
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Provider for any HTTP server exposing the OpenAI chat completions API.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model_override: str,
+        concurrency: int,
+        timeout: float,
+    ):
+        super().__init__("compatible", concurrency, timeout)
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.model_override = model_override
+
+    async def _complete(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[dict] = None,
+    ) -> Completion:
+        payload = {
+            "model": self.model_override or model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                self.url, json=payload, headers=self.headers
+            ) as response:
+                if response.status == 429:
+                    raise RateLimitError(
+                        int(float(response.headers.get("Retry-After", "1")))
+                    )
+                if 400 <= response.status < 500:
+                    raise InvalidRequestError(await response.text())
+                if response.status != 200:
+                    raise OpenAIError(
+                        f"{self.url} returned status code {response.status}."
+                    )
+                data = await response.json()
+
+        choices = data.get("choices") or [{}]
+        usage = data.get("usage") or {}
+        return Completion(
+            content=choices[0].get("message", {}).get("content") or "",
+            model=data.get("model", payload["model"]),
+            provider=self.name,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            cached_tokens=(usage.get("prompt_tokens_details") or {}).get(
+                "cached_tokens", 0
+            ),
+        )
+
+
+class LocalStubProvider(LLMProvider):
+    """
+    Deterministic offline provider for tests and load tests.
+
+    The same messages always produce the same review, so results are reproducible
+    and the rest of the pipeline can be exercised without network access. Prompt
+    caching is simulated like providers do it, in fixed-size blocks of a shared
+    prefix, so cached-token ratios can be measured offline.
+    """
+
+    def __init__(self, concurrency: int, timeout: float, latency: float = 0.0):
+        super().__init__("stub", concurrency, timeout)
+        self.latency = latency
+        self._prefixes: set = set()
+
+    def cached_prefix_length(self, prompt: str) -> int:
+        """
+        Returns how much of a prompt's prefix was seen before, and remembers it.
+
+        Args:
+            prompt (str): The full prompt text.
+
+        Returns:
+            int: Length in characters of the longest previously seen block prefix.
+        """
+        if len(self._prefixes) > MAX_CACHED_PREFIXES:
+            self._prefixes.clear()
+        cached, digest = 0, hashlib.sha256()
+        for end in range(PREFIX_BLOCK_CHARS, len(prompt) + 1, PREFIX_BLOCK_CHARS):
+            digest.update(prompt[end - PREFIX_BLOCK_CHARS : end].encode())
+            key = digest.copy().digest()
+            if key in self._prefixes:
+                cached = end
+            else:
+                self._prefixes.add(key)
+        return cached
+
+    async def _complete(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[dict] = None,
+    ) -> Completion:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prompt = "".join(message["content"] for message in messages)
+        cached_tokens = self.cached_prefix_length(prompt) // 4
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        rating = int(digest[:8], 16) % 5 + 1
+        downsides = (
+            f"Stub review {digest[:12]}: error handling and tests could be improved."
+        )
+        conclusion = "Deterministic review generated by the local stub provider."
+        if response_format:
+            content = json.dumps(
+                {"downsides": downsides, "rating": rating, "conclusion": conclusion}
+            )
+        else:
+            content = (
+                "### Downsides:\n"
+                f"{downsides}\n"
+                "### Rating:\n"
+                f"{rating}/5\n"
+                "### Comments:\n"
+                f"{conclusion}"
+            )
+        return Completion(
+            content=content,
+            model=model,
+            provider=self.name,
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=len(content) // 4,
+            cached_tokens=cached_tokens,
+        )
@@ -1,39 +1,144 @@
 import logging
-import asyncio  # Use asyncio for non-blocking sleep
+import time
+from typing import List, Optional
 from fastapi import HTTPException
-import openai
-from openai import OpenAI
-from exceptions.excpetions import RateLimitError, OpenAIError, InvalidRequestError
+from exceptions.excpetions import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    InvalidRequestError,
+    OpenAIError,
+    RateLimitError,
+)
 from exceptions.openai_error_handler import OpenAIErrorHandler
+from models.routing_models import Route
+from services.accounting.usage_ledger import record_llm_call
+from services.llm.provider_registry import provider_breaker, select_provider
+from services.prompts.prompt_registry import (
+    JSON_FORMAT_INSTRUCTIONS,
+    MARKDOWN_FORMAT_INSTRUCTIONS,
+    get_prompt_template,
+    render_prompt,
+)
 from services.configs.config import settings
-from utils.logging_config.logging_config import logging_config
+from services.routing.model_router import LARGE_ROUTE, record_route_call
+from utils.coordination.coordination_utils import spend_rate_budget
+from utils.deadline.deadline_utils import Deadline, enforce_deadline
+from utils.executor.executor_utils import run_cpu_bound
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("CodeReviewAI")
 
 error_handler = OpenAIErrorHandler()
 
-# OpenAI client setup
 MAX_RETRIES = 5
 EXPONENTIAL_BACKOFF_FACTOR = 2
 
-client = OpenAI(
-    api_key=settings.OPENAI_API_KEY,
+
+# Schema of a review in structured output mode
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "downsides": {"type": "string"},
+        "rating": {"type": "integer", "minimum": 1, "maximum": 5},
+        "conclusion": {"type": "string"},
+    },
+    "required": ["downsides", "rating", "conclusion"],
+    "additionalProperties": False,
+}
+
+REPAIR_INSTRUCTIONS = (
+    "The following code review does not follow the required format. Extract its "
+    "downsides, its rating and its concluding comments without changing their "
+    "meaning. If no rating is stated, infer one from 1 to 5 from the review's tone. "
 )
+REPAIR_INPUT_LIMIT = 8000  # Characters of malformed output sent for repair
+
+
+def review_response_format() -> Optional[dict]:
+    """
+    Returns the response format requested from providers for reviews.
+
+    Returns:
+        Optional[dict]: A JSON schema or JSON object format, or None when
+        STRUCTURED_OUTPUT is "off".
+    """
+    if settings.STRUCTURED_OUTPUT == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "code_review",
+                "strict": True,
+                "schema": REVIEW_SCHEMA,
+            },
+        }
+    if settings.STRUCTURED_OUTPUT == "json_object":
+        return {"type": "json_object"}
+    return None
 
 
-async def analyze_code(assignment: str, level: str, contents: str) -> str:
+def build_messages(
+    assignment: str,
+    level: str,
+    contents: str,
+    findings: str = "",
+    structured: bool = False,
+    starter_contents: str = "",
+    template_version: Optional[str] = None,
+) -> List[dict]:
+    """
+    Builds the chat messages for a code review request.
+
+    Args:
+        assignment (str): The task description for the code analysis.
+        level (str): The candidate's level (e.g., junior, senior).
+        contents (str): The code to be analyzed.
+        findings (str): Precomputed static-analysis summary to include in the prompt.
+        structured (bool): Ask for a JSON object instead of headed sections.
+        starter_contents (str): Starter code shared by every candidate, if known.
+        template_version (Optional[str]): Prompt template. Defaults to PROMPT_TEMPLATE.
+
+    Returns:
+        List[dict]: Messages for the chat completions API.
+    """
+    return render_prompt(
+        get_prompt_template(template_version),
+        assignment=assignment,
+        starter_code=starter_contents,
+        level=level,
+        findings=findings,
+        code=contents,
+        format_instructions=(
+            JSON_FORMAT_INSTRUCTIONS if structured else MARKDOWN_FORMAT_INSTRUCTIONS
+        ),
+    )
+
+
+async def analyze_code(
+    assignment: str,
+    level: str,
+    contents: str,
+    findings: str = "",
+    route: Optional[Route] = None,
+    deadline: Optional[Deadline] = None,
+    starter_contents: str = "",
+) -> str:
     """
     Analyzes code and provides feedback on downsides, a rating, and comments.
+    The request is sent to the least loaded configured LLM provider.
     Includes retries with exponential backoff for handling rate limit errors.
 
     Args:
         assignment (str): The task description for the code analysis.
         level (str): The candidate's level (e.g., junior, senior).
         contents (str): The code to be analyzed.
+        findings (str): Precomputed static-analysis summary to include in the prompt.
+        route (Optional[Route]): Routing tier to use. Defaults to the large route.
+        deadline (Optional[Deadline]): Request deadline. The provider call and any
+            retry backoff are cancelled when it passes.
+        starter_contents (str): Starter code shared by every candidate, placed
+            before the candidate's code so providers can cache it.
 
     Returns:
-        str: Feedback response generated by OpenAI API.
+        str: Feedback response generated by the LLM provider.
     """
     # Validate inputs
     if not assignment.strip():
@@ -45,65 +150,152 @@ async def analyze_code(assignment: str, level: str, contents: str) -> str:
     if not contents.strip():
         raise HTTPException(status_code=400, detail="Code contents cannot be empty.")
 
-    # Prepare messages for the OpenAI API
+    response_format = review_response_format()
+    # Prompt assembly copies the whole repository, so large ones leave the loop
+    messages = await run_cpu_bound(
+        build_messages,
+        assignment,
+        level,
+        contents,
+        findings,
+        response_format is not None,
+        starter_contents,
+        get_prompt_template().version,
+        size=len(contents) + len(starter_contents),
+    )
+    route = route or LARGE_ROUTE
+    return await complete_with_retries(
+        messages, route, route.max_tokens, 0.5, response_format, deadline
+    )
+
+
+async def repair_review(
+    review: str, route: Route, deadline: Optional[Deadline] = None
+) -> str:
+    """
+    Asks for a malformed review to be rewritten in the required format.
+
+    Much cheaper than generating the review again: the prompt holds only the
+    malformed output, not the repository, and the answer is short.
+
+    Args:
+        review (str): The model output that could not be parsed.
+        route (Route): Routing tier to use, normally the fast route.
+        deadline (Optional[Deadline]): Request deadline.
+
+    Returns:
+        str: The repaired review.
+    """
+    response_format = review_response_format()
+    format_instructions = (
+        JSON_FORMAT_INSTRUCTIONS if response_format else MARKDOWN_FORMAT_INSTRUCTIONS
+    )
     messages = [
-        {
-            "role": "user",
-            "content": (
-                f"Please analyze the following code:\n"
-                f"Task: {assignment}\n"
-                f"Level: {level}\n"
-                f"Code:\n{contents}\n\n"
-                "Provide feedback in the following format:\n"
-                "### Downsides:\n[Your feedback here]\n"
-                "### Rating:\n[Your rating here]\n"
-                "### Comments:\n[Your additional comments here]"
-            ),
-        }
+        {"role": "system", "content": REPAIR_INSTRUCTIONS + format_instructions},
+        {"role": "user", "content": review[:REPAIR_INPUT_LIMIT]},
     ]
+    return await complete_with_retries(
+        messages,
+        route,
+        settings.REPAIR_MAX_TOKENS,
+        0.0,
+        response_format,
+        deadline,
+    )
+
 
+async def complete_with_retries(
+    messages: List[dict],
+    route: Route,
+    max_tokens: int,
+    temperature: float,
+    response_format: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> str:
+    """
+    Runs a completion on the least loaded provider, retrying rate-limited calls.
+
+    Args:
+        messages (List[dict]): Chat messages.
+        route (Route): Routing tier, which selects the model.
+        max_tokens (int): Completion token limit.
+        temperature (float): Sampling temperature.
+        response_format (Optional[dict]): Structured output format, if any.
+        deadline (Optional[Deadline]): Request deadline. The provider call and any
+            retry backoff are cancelled when it passes.
+
+    Returns:
+        str: The completion text.
+    """
     retries = 0
-    while retries <= error_handler.max_retries:
-        try:
-            logger.info(
-                f"Sending request to OpenAI API (Retry {retries}/{error_handler.max_retries})"
-            )
-
-            # Call the OpenAI API
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="gpt-4-1106-preview",
-                messages=messages,
-                max_tokens=1024,
-                temperature=0.5,
-            )
-
-            logger.info(f"OpenAI API response: {response}")
-
-            # Check for empty or malformed responses
-            if not response.choices or not response.choices[0].message.content:
-                logger.error("Received empty or malformed response from OpenAI.")
-                raise ValueError("Received empty or malformed response from OpenAI.")
-
-            # Extract and return the content of the AI's response
-            return response.choices[0].message.content
-
-        except RateLimitError as e:
-            if not await error_handler.handle_rate_limit_error(retries):
-                break
-            retries += 1
-
-        except InvalidRequestError as e:
-            error_handler.handle_invalid_request_error(e)
-
-        except OpenAIError as e:
-            error_handler.handle_openai_error(e)
-
-        except Exception as e:
-            error_handler.handle_unexpected_error(e)
-
-    logger.error("Unable to get a response from OpenAI API after maximum retries.")
+    async with enforce_deadline(deadline, "analyze_code"):
+        while retries <= error_handler.max_retries:
+            try:
+                # The provider's rate limit is per account, not per worker
+                await spend_rate_budget(
+                    "llm", settings.LLM_RATE_LIMIT, settings.LLM_RATE_WINDOW, deadline
+                )
+                provider = select_provider()
+                logger.info(
+                    f"Sending request to {provider.name} provider "
+                    f"(Retry {retries}/{error_handler.max_retries})"
+                )
+
+                # Call the LLM provider through its circuit breaker
+                started = time.perf_counter()
+                async with provider_breaker(provider).guard():
+                    completion = await provider.complete(
+                        messages=messages,
+                        model=route.model,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        response_format=response_format,
+                    )
+                latency = time.perf_counter() - started
+                for record in (record_route_call, record_llm_call):
+                    record(
+                        route,
+                        latency,
+                        completion.prompt_tokens,
+                        completion.completion_tokens,
+                        completion.cached_tokens,
+                    )
+
+                logger.info(f"LLM provider response: {completion}")
+
+                # Check for empty or malformed responses
+                if not completion.content:
+                    logger.error(
+                        "Received empty or malformed response from LLM provider."
+                    )
+                    raise ValueError(
+                        "Received empty or malformed response from LLM provider."
+                    )
+
+                # Extract and return the content of the AI's response
+                return completion.content
+
+            except RateLimitError as e:
+                # Stop backing off once every provider's breaker has opened
+                select_provider()
+                if not await error_handler.handle_rate_limit_error(retries):
+                    break
+                retries += 1
+
+            except InvalidRequestError as e:
+                error_handler.handle_invalid_request_error(e)
+
+            except OpenAIError as e:
+                error_handler.handle_openai_error(e)
+
+            except (DeadlineExceededError, CircuitOpenError):
+                raise
+
+            except Exception as e:
+                error_handler.handle_unexpected_error(e)
+
+    logger.error("Unable to get a response from LLM provider after maximum retries.")
     raise HTTPException(
         status_code=503,
-        detail="Max retries exceeded. Unable to get a response from OpenAI API.",
+        detail="Max retries exceeded. Unable to get a response from LLM provider.",
     )
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+from typing import Dict, List, Optional
+from models.request_models import ReviewRequest
+from services.configs.config import settings
+from services.github.github_access import fetch_repository_contents
+from services.review.review_pipeline import run_review_pipeline
+from services.storage.review_store import get_review_store
+from utils.coordination.coordination_utils import (
+    acquire_lock,
+    release_lock,
+    wait_for_release,
+)
+from utils.deadline.deadline_utils import Deadline
+from utils.redis_cache.redis_utils import (
+    get_redis_client,
+    invalidate_reviews,
+    load_snapshot,
+    repo_tag,
+    save_snapshot,
+)
+
+logger = logging.getLogger("CodeReviewAI")
+
+
+def verify_signature(secret: str, body: bytes, signature_header: Optional[str]) -> bool:
+    """
+    Verifies the X-Hub-Signature-256 header of a GitHub webhook delivery.
+
+    Args:
+        secret (str): The webhook secret configured on GitHub.
+        body (bytes): The raw request body.
+        signature_header (Optional[str]): Value of the X-Hub-Signature-256 header.
+
+    Returns:
+        bool: True if the signature matches the body.
+    """
+    if not secret or not signature_header:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header)
+
+
+async def prefetch_repository(repo_url: str):
+    """
+    Warms the caches for a repository that was just pushed to.
+
+    Downloads the new repository state into the snapshot cache through the same
+    ingestion path as interactive reviews, drops reviews cached for the previous
+    state on every worker and, if PREFETCH_ASSIGNMENT is set, pre-computes its reviews so the
+    interactive request becomes a cache read.
+
+    Args:
+        repo_url (str): URL of the GitHub repository.
+    """
+    redis = await get_redis_client()
+    # Deliveries for one repository may land on different workers; they take
+    # turns, and later ones only download what changed since the snapshot
+    lock_name = f"prefetch:{repo_tag(repo_url)}"
+    lock_token = await acquire_lock(redis, lock_name, settings.REVIEW_LOCK_TTL)
+    while lock_token is None:
+        await wait_for_release(redis, lock_name, settings.REVIEW_LOCK_POLL_INTERVAL)
+        lock_token = await acquire_lock(redis, lock_name, settings.REVIEW_LOCK_TTL)
+    try:
+        fetched_files = await load_snapshot(redis, repo_url)
+        try:
+            await fetch_repository_contents(repo_url, fetched_files=fetched_files)
+        finally:
+            if fetched_files:
+                await save_snapshot(redis, repo_url, fetched_files)
+        invalidated = await invalidate_reviews(redis, repo_url)
+    finally:
+        await release_lock(redis, lock_name, lock_token)
+    logger.info(f"Prefetched {repo_url}, invalidated {invalidated} cached reviews.")
+
+    if not settings.PREFETCH_ASSIGNMENT:
+        return
+    store = await get_review_store()
+    levels = [level.strip() for level in settings.PREFETCH_LEVELS.split(",") if level]
+    for level in levels:
+        request = ReviewRequest(
+            assignment_description=settings.PREFETCH_ASSIGNMENT,
+            github_repo_url=repo_url,
+            candidate_level=level,
+        )
+        # One failed level must not keep the others from being warmed
+        try:
+            await run_review_pipeline(
+                request, redis, store, Deadline(settings.REQUEST_TIMEOUT)
+            )
+        except Exception as e:
+            logger.error(f"Could not pre-compute {level} review for {repo_url}: {e}")
+            continue
+        logger.info(f"Pre-computed {level} review for {repo_url}.")
+
+
+class PrefetchQueue:
+    """
+    Bounded, debounced queue of repositories to prefetch.
+
+    Pushes to the same repository within the debounce window collapse into a
+    single prefetch, run once the repository has been quiet for the whole window.
+    """
+
+    def __init__(self, maxsize: int, debounce_seconds: float, workers: int):
+        """
+        Initializes the queue.
+
+        Args:
+            maxsize (int): Maximum number of repositories waiting, debouncing or queued.
+            debounce_seconds (float): Quiet period required before prefetching.
+            workers (int): Number of concurrent prefetch workers.
+        """
+        self.maxsize = maxsize
+        self.debounce_seconds = debounce_seconds
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._debouncing: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """Number of repositories debouncing or waiting for a worker."""
+        return len(self._debouncing) + self._queue.qsize()
+
+    def enqueue(self, repo_url: str) -> str:
+        """
+        Schedules a repository for prefetching.
+
+        Args:
+            repo_url (str): URL of the GitHub repository.
+
+        Returns:
+            str: "queued" for a new entry, "coalesced" if the repository was already
+            debouncing, or "rejected" if the queue is full.
+        """
+        handle = self._debouncing.pop(repo_url, None)
+        if handle:
+            handle.cancel()
+            status = "coalesced"
+        elif self.pending >= self.maxsize:
+            logger.warning(f"Prefetch queue full, dropping push for {repo_url}.")
+            return "rejected"
+        else:
+            status = "queued"
+        loop = asyncio.get_running_loop()
+        self._debouncing[repo_url] = loop.call_later(
+            self.debounce_seconds, self._release, repo_url
+        )
+        return status
+
+    def _release(self, repo_url: str):
+        """Moves a repository whose debounce window passed onto the work queue."""
+        self._debouncing.pop(repo_url, None)
+        try:
+            self._queue.put_nowait(repo_url)
+        except asyncio.QueueFull:
+            logger.warning(f"Prefetch queue full, dropping {repo_url}.")
+
+    async def _worker(self):
+        while True:
+            repo_url = await self._queue.get()
+            try:
+                await prefetch_repository(repo_url)
+            except Exception as e:
+                logger.error(f"Prefetch of {repo_url} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        """Starts the prefetch workers on the running event loop."""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancels pending debounce timers and stops the workers."""
+        for handle in self._debouncing.values():
+            handle.cancel()
+        self._debouncing.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+prefetch_queue = PrefetchQueue(
+    maxsize=settings.PREFETCH_QUEUE_SIZE,
+    debounce_seconds=settings.PREFETCH_DEBOUNCE_SECONDS,
+    workers=settings.PREFETCH_WORKERS,
+)
@@ -0,0 +1,103 @@
+from string import Formatter
+from typing import Dict, List, Optional
+from models.prompt_models import PromptTemplate
+from services.configs.config import settings
+
+MARKDOWN_FORMAT_INSTRUCTIONS = (
+    "Provide feedback in the following format:\n"
+    "### Downsides:\n[Your feedback here]\n"
+    "### Rating:\n[Your rating here]\n"
+    "### Comments:\n[Your additional comments here]"
+)
+JSON_FORMAT_INSTRUCTIONS = (
+    "Respond with a JSON object with the keys "
+    '"downsides" (string, at most 500 characters), '
+    '"rating" (integer from 1 to 5) and '
+    '"conclusion" (string, at most 500 characters).'
+)
+
+# Original layout: request-specific task and level first, files in listing order
+REVIEW_V1 = PromptTemplate(
+    version="review-v1",
+    sections=[
+        "Please analyze the following code:\nTask: {assignment}\nLevel: {level}\n",
+        "Static analysis findings (precomputed, do not repeat lint-level issues):\n"
+        "{findings}\n\n",
+        "Starter code:\n{starter_code}\n\n",
+        "Code:\n{code}\n\n{format_instructions}",
+    ],
+)
+
+# Prefix-stable layout, from most to least shared: instructions (every request),
+# assignment and starter code (every candidate of an assignment), level, then the
+# candidate's findings and code
+REVIEW_V2 = PromptTemplate(
+    version="review-v2",
+    system=(
+        "You are an experienced software engineer reviewing a candidate's solution "
+        "to a take-home assignment. Judge correctness, code quality, structure, "
+        "testing and error handling against what is expected at the candidate's "
+        "level. Static analysis findings are precomputed; do not repeat "
+        "lint-level issues.\n\n{format_instructions}"
+    ),
+    sections=[
+        "Assignment:\n{assignment}\n\n",
+        "Starter code given to every candidate, unchanged by this one:\n"
+        "{starter_code}\n\n",
+        "Candidate level: {level}\n\n",
+        "Static analysis findings:\n{findings}\n\n",
+        "Candidate code:\n{code}",
+    ],
+)
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    template.version: template for template in (REVIEW_V1, REVIEW_V2)
+}
+
+
+def get_prompt_template(version: Optional[str] = None) -> PromptTemplate:
+    """
+    Looks up a prompt template.
+
+    Args:
+        version (Optional[str]): Template version. Defaults to PROMPT_TEMPLATE.
+
+    Returns:
+        PromptTemplate: The template.
+
+    Raises:
+        ValueError: If no template has that version.
+    """
+    version = version or settings.PROMPT_TEMPLATE
+    if version not in PROMPT_TEMPLATES:
+        raise ValueError(f"Unknown prompt template: {version}")
+    return PROMPT_TEMPLATES[version]
+
+
+def render_section(section: str, values: Dict[str, str]) -> str:
+    """Formats a section, or returns "" if all of its placeholders are empty."""
+    fields = [field for _, field, _, _ in Formatter().parse(section) if field]
+    if fields and not any(values.get(field) for field in fields):
+        return ""
+    return section.format(**values)
+
+
+def render_prompt(template: PromptTemplate, **values: str) -> List[dict]:
+    """
+    Renders a template into chat messages.
+
+    Args:
+        template (PromptTemplate): The template.
+        **values (str): Values of the template placeholders.
+
+    Returns:
+        List[dict]: Messages for the chat completions API.
+    """
+    messages = []
+    if template.system:
+        messages.append(
+            {"role": "system", "content": render_section(template.system, values)}
+        )
+    content = "".join(render_section(section, values) for section in template.sections)
+    messages.append({"role": "user", "content": content})
+    return messages
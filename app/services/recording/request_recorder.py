@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import os
+import queue
+import random
+import threading
+from typing import List, Optional
+from models.recording_models import RecordedRequest
+from models.request_models import ReviewRequest
+from models.usage_models import ReviewUsage
+from services.configs.config import settings
+from utils.github.github_utils import normalize_repo_url
+
+logger = logging.getLogger("CodeReviewAI")
+
+
+def anonymize(value: str) -> str:
+    """
+    Replaces an identifier with a keyed digest for recordings.
+
+    Args:
+        value (str): A repository URL, assignment or client identity.
+
+    Returns:
+        str: 24 hex characters, stable for a given RECORD_HASH_KEY.
+    """
+    return hashlib.blake2b(
+        value.encode(), key=settings.RECORD_HASH_KEY.encode()[:64], digest_size=12
+    ).hexdigest()
+
+
+def recorded_request(
+    request: ReviewRequest,
+    client_id: Optional[str],
+    usage: ReviewUsage,
+    status: str,
+    started_at: float,
+    latency: float,
+) -> RecordedRequest:
+    """
+    Builds the recording of a served review request.
+
+    Args:
+        request (ReviewRequest): The request payload.
+        client_id (Optional[str]): Client the request was served to.
+        usage (ReviewUsage): Usage and stage timings of the request.
+        status (str): "200", the HTTP status of an error, or the exception name.
+        started_at (float): Unix timestamp of when the request arrived.
+        latency (float): Seconds spent serving the request.
+
+    Returns:
+        RecordedRequest: The anonymized request.
+    """
+    return RecordedRequest(
+        at=started_at,
+        repo=anonymize(normalize_repo_url(request.github_repo_url)),
+        candidate_level=request.candidate_level,
+        assignment=anonymize(request.assignment_description.strip()),
+        assignment_length=len(request.assignment_description),
+        tenant=anonymize(client_id) if client_id else None,
+        has_candidate_id=request.candidate_id is not None,
+        status=status,
+        latency=latency,
+        cache_tier=usage.cache_tier,
+        stages=usage.stages,
+        llm_calls=usage.llm_calls,
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        llm_latency=usage.llm_latency,
+        github_calls=usage.github_calls,
+    )
+
+
+class RequestRecorder:
+    """
+    Appends recorded requests to a JSONL file, one line per request.
+
+    Requests are handed to a writer thread, so recording never blocks the event
+    loop. Lines are short and written with a single append, so every worker of a
+    server can record to the same file.
+    """
+
+    def __init__(self, path: str, sample_rate: float, max_pending: int = 1000):
+        """
+        Initializes the recorder.
+
+        Args:
+            path (str): File to append to; recording is off if empty.
+            sample_rate (float): Share of requests recorded, from 0 to 1.
+            max_pending (int): Lines waiting for the writer before new ones are
+                dropped.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._lines: queue.Queue = queue.Queue(max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Whether the next request should be recorded."""
+        return bool(self.path) and random.random() < self.sample_rate
+
+    def write(self, entry: RecordedRequest):
+        """
+        Queues a recorded request for the writer thread, starting it if needed.
+        Requests the writer has fallen behind on are dropped and logged.
+
+        Args:
+            entry (RecordedRequest): The request to append.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain, name="request-recorder", daemon=True
+                )
+                self._writer.start()
+        try:
+            self._lines.put_nowait(entry.model_dump_json() + "\n")
+        except queue.Full:
+            logger.warning("Request recorder fell behind, dropping a recorded request.")
+
+    def _drain(self):
+        """Appends queued lines until close(). Failures are logged and skipped."""
+        recording = None
+        while (line := self._lines.get()) is not None:
+            try:
+                if recording is None:
+                    recording = open(self.path, "a", encoding="utf-8")
+                recording.write(line)
+                recording.flush()
+            except OSError as e:
+                logger.warning(f"Could not record request to {self.path}: {e}")
+        if recording is not None:
+            recording.close()
+
+    def close(self):
+        """Writes the queued requests and closes the recording file."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._lines.put(None)
+            writer.join()
+
+
+def load_recording(path: str) -> List[RecordedRequest]:
+    """
+    Reads a recording, oldest request first.
+
+    Args:
+        path (str): JSONL file written by a RequestRecorder.
+
+    Returns:
+        List[RecordedRequest]: The recorded requests.
+    """
+    with open(path, encoding="utf-8") as recording:
+        entries = [
+            RecordedRequest.model_validate_json(line)
+            for line in recording
+            if line.strip()
+        ]
+    return sorted(entries, key=lambda entry: entry.at)
+
+
+_request_recorder: Optional[RequestRecorder] = None
+
+
+def get_request_recorder() -> RequestRecorder:
+    global _request_recorder
+    if _request_recorder is None:
+        path = settings.RECORD_REQUESTS_PATH
+        if path and not settings.RECORD_HASH_KEY:
+            logger.error(
+                "RECORD_REQUESTS_PATH is set without RECORD_HASH_KEY; "
+                "requests are not recorded."
+            )
+            path = ""
+        _request_recorder = RequestRecorder(path, settings.RECORD_SAMPLE_RATE)
+    return _request_recorder
+
+
+def _reset_request_recorder():
+    global _request_recorder
+    _request_recorder = None
+
+
+# Each worker opens the recording file itself
+os.register_at_fork(after_in_child=_reset_request_recorder)
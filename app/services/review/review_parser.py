@@ -0,0 +1,188 @@
+import json
+import re
+from typing import Dict, Optional
+from models.llm_models import ParsedReview
+
+MAX_SECTION_LENGTH = 500  # Max character length for downsides and conclusion
+
+# Section names as models write them, mapped to ParsedReview fields
+SECTION_ALIASES = {
+    "downsides": "downsides",
+    "weaknesses": "downsides",
+    "issues": "downsides",
+    "rating": "rating",
+    "score": "rating",
+    "grade": "rating",
+    "comments": "conclusion",
+    "conclusion": "conclusion",
+    "summary": "conclusion",
+}
+
+# A section name at the start of a line, marked up as a markdown heading or bold
+# text, or followed by a colon. Plain prose starting with "Issues ..." is not one.
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?P<marker>#{1,6}|\*\*|__)?[ \t]*"
+    rf"(?P<name>{'|'.join(SECTION_ALIASES)})\b"
+    r"[ \t]*[*_]*[ \t]*(?P<colon>:)?[ \t]*[*_]*",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# "4/5", "8 / 10", "4 out of 5", "4.5" or a bare "4"
+RATING_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:/|out of)\s*(\d+))?", re.IGNORECASE
+)
+
+# "key": "string" or "key": number, including a string cut off by max_tokens
+JSON_FIELD_PATTERN = re.compile(
+    r'"(?P<key>\w+)"\s*:\s*(?P<value>"(?:[^"\\]|\\.)*"?|-?\d+(?:\.\d+)?)', re.DOTALL
+)
+
+
+def parse_rating(text: str) -> Optional[int]:
+    """
+    Normalizes a rating written in any common form to the 1-5 scale.
+
+    Args:
+        text (str): Text containing the rating, e.g. "4/5", "8 out of 10" or "4".
+
+    Returns:
+        Optional[int]: The rating clamped to [1, 5], or None if no number was found.
+    """
+    match = RATING_PATTERN.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    scale = float(match.group(2)) if match.group(2) else 5.0
+    if scale <= 0:
+        return None
+    return min(max(int(value * 5 / scale + 0.5), 1), 5)
+
+
+def review_from_fields(fields: Dict[str, object]) -> ParsedReview:
+    """
+    Builds a ParsedReview from named fields, e.g. a decoded JSON object.
+
+    Args:
+        fields (Dict[str, object]): Field values keyed by section name or alias.
+
+    Returns:
+        ParsedReview: The recognized sections. Unknown keys are ignored.
+    """
+    values: Dict[str, str] = {}
+    for key, value in fields.items():
+        field = SECTION_ALIASES.get(str(key).lower())
+        if field is None or field in values:
+            continue
+        if isinstance(value, list):
+            value = "\n".join(f"- {item}" for item in value)
+        values[field] = str(value).strip()
+
+    rating = values.pop("rating", None)
+    return ParsedReview(
+        downsides=values.get("downsides"),
+        rating=parse_rating(rating) if rating is not None else None,
+        conclusion=values.get("conclusion"),
+        sections=[*values, *(["rating"] if rating is not None else [])],
+    )
+
+
+def decode_json_value(raw: str) -> str:
+    """Decodes a JSON scalar, closing a string that was cut off."""
+    for candidate in (raw, raw + '"'):
+        try:
+            return str(json.loads(candidate))
+        except ValueError:
+            continue
+    return raw.strip('"')
+
+
+def parse_json_output(text: str) -> Optional[ParsedReview]:
+    """
+    Parses output in JSON mode, tolerating surrounding prose, code fences and
+    objects truncated by the token limit.
+
+    Args:
+        text (str): Raw model output.
+
+    Returns:
+        Optional[ParsedReview]: The parsed review, or None if no JSON fields were found.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    end = text.rfind("}")
+    if end > start:
+        try:
+            data = json.loads(text[start : end + 1])
+            if isinstance(data, dict):
+                return review_from_fields(data)
+        except ValueError:
+            pass
+
+    # Invalid or truncated JSON: salvage the fields that are complete enough
+    fields = {
+        match.group("key"): decode_json_value(match.group("value"))
+        for match in JSON_FIELD_PATTERN.finditer(text, start)
+    }
+    parsed = review_from_fields(fields)
+    return parsed if parsed.sections else None
+
+
+def parse_markdown_output(text: str) -> ParsedReview:
+    """
+    Parses output with headed sections in a single pass over the text.
+
+    Args:
+        text (str): Raw model output.
+
+    Returns:
+        ParsedReview: The sections found. The first occurrence of a section wins.
+    """
+    headings = [
+        match
+        for match in HEADING_PATTERN.finditer(text)
+        if match.group("marker") or match.group("colon")
+    ]
+    fields: Dict[str, str] = {}
+    for heading, following in zip(headings, headings[1:] + [None]):
+        end = following.start() if following else len(text)
+        fields.setdefault(heading.group("name").lower(), text[heading.end() : end])
+    return review_from_fields(fields)
+
+
+def parse_model_output(text: str) -> ParsedReview:
+    """
+    Parses a review in any of the shapes models produce: a JSON object, with or
+    without fences and surrounding prose, or markdown-style headed sections.
+
+    Args:
+        text (str): Raw model output.
+
+    Returns:
+        ParsedReview: The extracted sections. Check `complete` before using them.
+    """
+    if '"' in text and "{" in text:
+        parsed = parse_json_output(text)
+        if parsed is not None:
+            return parsed
+    return parse_markdown_output(text)
+
+
+def shorten(text: str, limit: int = MAX_SECTION_LENGTH) -> str:
+    """
+    Shortens text to a length limit, cutting at a word boundary where possible.
+
+    Args:
+        text (str): The text to shorten.
+        limit (int): Maximum length of the result.
+
+    Returns:
+        str: The text, or its shortened form ending in "...".
+    """
+    if len(text) <= limit:
+        return text
+    cut = text[: limit - 3]
+    boundary = cut.rfind(" ")
+    if boundary > limit // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + "..."
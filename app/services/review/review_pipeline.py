@@ -0,0 +1,616 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Optional, Tuple, Union
+from fastapi import HTTPException, Response
+from redis.asyncio import Redis
+from exceptions.excpetions import (
+    BudgetExceededError,
+    CircuitOpenError,
+    DeadlineExceededError,
+    OverloadedError,
+    QuotaExceededError,
+)
+from models.request_models import ReviewRequest, ReviewResponse
+from models.storage_models import CachedReview, ReviewRecord
+from services.accounting.usage_ledger import (
+    check_tenant_budget,
+    current_usage,
+    get_usage_ledger,
+    set_cache_tier,
+    timed_stage,
+    track_usage,
+)
+from services.prompts.prompt_registry import get_prompt_template
+from services.github.github_access import fetch_commit_sha, fetch_repository_contents
+from services.recording.request_recorder import get_request_recorder, recorded_request
+from services.review.review_service import generate_review
+from services.routing.model_router import FAST_ROUTE, ROUTES, select_route
+from services.storage.review_store import ReviewStore
+from services.configs.config import settings
+from utils.admission.admission_utils import check_client_quota, get_admission_controller
+from utils.coordination.coordination_utils import (
+    acquire_lock,
+    release_lock,
+    wait_for_release,
+)
+from utils.deadline.deadline_utils import Deadline, enforce_deadline
+from utils.github.github_utils import normalize_repo_url
+from utils.redis_cache.redis_utils import (
+    cache_review,
+    hash_assignment,
+    load_snapshot,
+    parse_cached_review,
+    repo_tag,
+    review_cache_key,
+    save_snapshot,
+)
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Values of the X-Cache response header
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+# Cache name in Cache-Status response headers (RFC 9211)
+CACHE_STATUS_NAME = "CodeReviewAI"
+
+# Background revalidations running on this worker, by cache key
+_revalidations: Dict[str, asyncio.Task] = {}
+
+
+async def run_review_pipeline(
+    request: ReviewRequest,
+    redis: Redis,
+    store: ReviewStore,
+    deadline: Deadline,
+    client_id: Optional[str] = None,
+    http_response: Optional[Response] = None,
+    record: bool = False,
+):
+    """
+    Runs the review pipeline for a request, recording its usage.
+
+    Tokens, cost, GitHub calls and the cache tier that served the review are
+    added to the usage ledger under the client and candidate, whether the
+    request succeeds or not. With RECORD_REQUESTS_PATH set, sampled requests are
+    also written anonymized, with their stage timings, for benchmarks.replay.
+
+    Args:
+        request (ReviewRequest): The incoming request payload.
+        redis (Redis): Redis client for caching.
+        store (ReviewStore): Durable review store.
+        deadline (Deadline): The request deadline.
+        client_id (Optional[str]): Client to charge for a new review; None is not
+            subject to quotas or budgets.
+        http_response (Optional[Response]): Response to set cache headers on.
+        record (bool): Whether the request may be recorded.
+
+    Returns:
+        Union[ReviewResponse, Response]: The review results; cache hits are
+        a response carrying the cached JSON as is.
+    """
+    recorder = get_request_recorder()
+    record = record and recorder.sampled()
+    started_at, started = time.time(), time.perf_counter()
+    status = "200"
+    with track_usage() as usage:
+        try:
+            return await serve_review(
+                request, redis, store, deadline, client_id, http_response
+            )
+        except HTTPException as e:
+            status = str(e.status_code)
+            raise
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            get_usage_ledger().add(usage, client_id, request.candidate_id)
+            if record:
+                recorder.write(
+                    recorded_request(
+                        request,
+                        client_id,
+                        usage,
+                        status,
+                        started_at,
+                        time.perf_counter() - started,
+                    )
+                )
+
+
+async def serve_review(
+    request: ReviewRequest,
+    redis: Redis,
+    store: ReviewStore,
+    deadline: Deadline,
+    client_id: Optional[str] = None,
+    http_response: Optional[Response] = None,
+):
+    """
+    Runs the review pipeline for a request.
+
+    Steps:
+    1. Check Redis cache for an existing review. A review past REVIEW_CACHE_TTL
+       but within REVIEW_STALE_GRACE is returned at once and revalidated in the
+       background: kept if the commit is unchanged, regenerated otherwise.
+    2. Take the review's lock, so only one worker on any node generates it. Other
+       workers wait for the lock and then read the review from the cache. The
+       lock holder waits for an in-flight slot of this worker before doing any
+       work.
+    3. Check the review store for a review of the current commit.
+    4. Charge the client's quota and check its budget, then fetch repository
+       contents from GitHub, resuming from a cached snapshot.
+    5. Generate a new review if no stored review is found, on the fast route
+       only if the client is close to its budget.
+    6. Write the generated review through to the store and the cache, and return it.
+
+    Args:
+        request (ReviewRequest): The incoming request payload.
+        redis (Redis): Redis client for caching.
+        store (ReviewStore): Durable review store.
+        deadline (Deadline): The request deadline.
+        client_id (Optional[str]): Client to charge for a new review; None is not
+            subject to quotas or budgets.
+        http_response (Optional[Response]): Response to set cache headers on.
+
+    Returns:
+        Union[ReviewResponse, Response]: The review results; cache hits are
+        a response carrying the cached JSON as is.
+    """
+    try:
+        repo_url = normalize_repo_url(request.github_repo_url)
+        assignment_hash = hash_assignment(request.assignment_description)
+        # The route depends on the repository size, which is unknown until the
+        # contents are fetched, so every route's key is checked in one round trip
+        prompt_version = get_prompt_template().version
+        cache_keys = {
+            name: review_cache_key(
+                repo_url, request.candidate_level, assignment_hash, name, prompt_version
+            )
+            for name in ROUTES
+        }
+
+        # Step 1: Check Redis cache for existing review
+        with timed_stage("cache_read"):
+            cached = await read_cached_review(redis, cache_keys)
+        if cached:
+            cache_key, entry = cached
+            age = entry.age(time.time())
+            set_cache_tier("redis")
+            if age < settings.REVIEW_CACHE_TTL:
+                return cached_review_response(entry, http_response, CACHE_HIT, age)
+            # Expired but within the grace window: answer now, refresh afterwards
+            schedule_revalidation(request, redis, store, cache_keys, cache_key, entry)
+            return cached_review_response(entry, http_response, CACHE_STALE, age)
+
+        # Step 2: Single-flight across workers and nodes, then admission
+        lock_name = review_lock_name(request, assignment_hash)
+        lock_token = await acquire_lock(redis, lock_name, settings.REVIEW_LOCK_TTL)
+        while lock_token is None:
+            logger.info(f"Review in progress on another worker, waiting: {lock_name}")
+            with timed_stage("lock_wait"):
+                await wait_for_release(
+                    redis, lock_name, settings.REVIEW_LOCK_POLL_INTERVAL, deadline
+                )
+            cached = await read_cached_review(redis, cache_keys)
+            if cached:
+                _, entry = cached
+                set_cache_tier("redis")
+                return cached_review_response(
+                    entry, http_response, CACHE_HIT, entry.age(time.time())
+                )
+            # The holder failed or timed out without caching a review; take over
+            lock_token = await acquire_lock(redis, lock_name, settings.REVIEW_LOCK_TTL)
+        try:
+            # GitHub and LLM calls are only checked against the deadline between
+            # calls, so a slow download or completion is cancelled here
+            async with get_admission_controller().slot(deadline), enforce_deadline(
+                deadline, "generate_and_cache_review"
+            ):
+                review = await generate_and_cache_review(
+                    request,
+                    redis,
+                    store,
+                    deadline,
+                    assignment_hash,
+                    cache_keys,
+                    client_id=client_id,
+                )
+            set_cache_headers(http_response, CACHE_MISS)
+            return review
+        finally:
+            try:
+                await release_lock(redis, lock_name, lock_token)
+            except Exception as e:
+                # The lock expires on its own after REVIEW_LOCK_TTL
+                logger.warning(f"Failed to release {lock_name}: {e}")
+
+    except HTTPException as e:
+        logger.error(f"HTTP exception occurred: {e.detail}")
+        raise e
+
+    except (
+        BudgetExceededError,
+        CircuitOpenError,
+        DeadlineExceededError,
+        OverloadedError,
+        QuotaExceededError,
+    ):
+        raise
+
+    except Exception as e:
+        # Log unexpected errors and raise a 500 Internal Server Error
+        logger.exception("Unexpected error occurred during review generation.")
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+
+def review_lock_name(request: ReviewRequest, assignment_hash: str) -> str:
+    """Name of the lock held while a review is generated, on any worker."""
+    return (
+        f"review:{repo_tag(request.github_repo_url)}:"
+        f"{request.candidate_level}:{assignment_hash}"
+    )
+
+
+def set_cache_headers(
+    response: Optional[Response],
+    status: str,
+    age: float = 0.0,
+    detail: Optional[str] = None,
+):
+    """
+    Tells the client whether a review came from the cache, and how fresh it is.
+
+    Args:
+        response (Optional[Response]): The response; nothing is set if None.
+        status (str): CACHE_HIT, CACHE_STALE or CACHE_MISS.
+        age (float): Seconds since the review was cached.
+        detail (Optional[str]): Extra Cache-Status detail, e.g. why it is stale.
+    """
+    if response is None:
+        return
+    response.headers["X-Cache"] = status
+    if status == CACHE_MISS:
+        response.headers["Cache-Status"] = f"{CACHE_STATUS_NAME}; fwd=miss; stored"
+        return
+    # A negative ttl marks a stale response
+    cache_status = (
+        f"{CACHE_STATUS_NAME}; hit; ttl={math.floor(settings.REVIEW_CACHE_TTL - age)}"
+    )
+    if detail:
+        cache_status += f'; detail="{detail}"'
+    response.headers["Age"] = str(int(age))
+    response.headers["Cache-Status"] = cache_status
+    if status == CACHE_STALE:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+
+
+def cached_review_response(
+    entry: CachedReview,
+    http_response: Optional[Response],
+    status: str,
+    age: float,
+) -> Union[ReviewResponse, Response]:
+    """
+    Answers with a cached review.
+
+    The review's JSON was validated when it was cached, so it is sent as is
+    instead of being parsed and serialized again on every hit.
+
+    Args:
+        entry (CachedReview): The cache entry.
+        http_response (Optional[Response]): The endpoint's response, or None when
+            the pipeline runs outside a request, e.g. for a prefetch.
+        status (str): CACHE_HIT or CACHE_STALE.
+        age (float): Seconds since the review was cached.
+
+    Returns:
+        Union[ReviewResponse, Response]: A JSON response carrying the cached bytes
+        and the cache headers, or the parsed review outside a request.
+    """
+    if http_response is None:
+        return entry.review
+    response = Response(content=entry.review_json, media_type="application/json")
+    set_cache_headers(response, status, age)
+    return response
+
+
+def schedule_revalidation(
+    request: ReviewRequest,
+    redis: Redis,
+    store: ReviewStore,
+    cache_keys: Dict[str, str],
+    cache_key: str,
+    entry: CachedReview,
+):
+    """
+    Refreshes a stale review in the background, once per worker and cache key.
+
+    Args:
+        request (ReviewRequest): The request that found the review stale.
+        redis (Redis): Redis client.
+        store (ReviewStore): Durable review store.
+        cache_keys (Dict[str, str]): Cache keys by route name.
+        cache_key (str): Key the stale review was found under.
+        entry (CachedReview): The stale entry.
+    """
+    if cache_key in _revalidations:
+        return
+    task = asyncio.create_task(
+        revalidate_review(request, redis, store, cache_keys, cache_key, entry)
+    )
+    _revalidations[cache_key] = task
+    task.add_done_callback(lambda _: _revalidations.pop(cache_key, None))
+
+
+async def revalidate_review(
+    request: ReviewRequest,
+    redis: Redis,
+    store: ReviewStore,
+    cache_keys: Dict[str, str],
+    cache_key: str,
+    entry: CachedReview,
+):
+    """
+    Makes a stale review fresh again.
+
+    If the repository's commit is the one the review was generated for, the
+    review is cached again as is. Otherwise a new review is generated, under the
+    same lock and admission control as interactive requests. Failures are only
+    logged: the stale review keeps being served until its grace window ends.
+
+    Args:
+        request (ReviewRequest): The request that found the review stale.
+        redis (Redis): Redis client.
+        store (ReviewStore): Durable review store.
+        cache_keys (Dict[str, str]): Cache keys by route name.
+        cache_key (str): Key the stale review was found under.
+        entry (CachedReview): The stale entry.
+    """
+    repo_url = normalize_repo_url(request.github_repo_url)
+    assignment_hash = hash_assignment(request.assignment_description)
+    lock_name = review_lock_name(request, assignment_hash)
+    try:
+        lock_token = await acquire_lock(redis, lock_name, settings.REVIEW_LOCK_TTL)
+        if lock_token is None:
+            return  # Another worker is already generating this review
+    except Exception as e:
+        logger.warning(f"Revalidation of {cache_key} skipped: {e}")
+        return
+    # Recorded apart from the request that found the review stale, which was
+    # answered from the cache before this work started
+    with track_usage() as usage:
+        try:
+            commit_sha = await fetch_commit_sha(repo_url)
+            if commit_sha == entry.commit_sha:
+                set_cache_tier("redis")
+                await cache_review(redis, repo_url, cache_key, entry.review, commit_sha)
+                logger.info(f"Revalidated {cache_key}: commit unchanged.")
+                return
+            deadline = Deadline(settings.REQUEST_TIMEOUT)
+            async with get_admission_controller().slot(), enforce_deadline(
+                deadline, "revalidate_review"
+            ):
+                await generate_and_cache_review(
+                    request,
+                    redis,
+                    store,
+                    deadline,
+                    assignment_hash,
+                    cache_keys,
+                    commit_sha,
+                )
+            logger.info(f"Revalidated {cache_key}: regenerated for {commit_sha}.")
+        except Exception as e:
+            logger.warning(f"Revalidation of {cache_key} failed: {e}")
+        finally:
+            get_usage_ledger().add(usage, None, request.candidate_id)
+            try:
+                await release_lock(redis, lock_name, lock_token)
+            except Exception as e:
+                logger.warning(f"Failed to release {lock_name}: {e}")
+
+
+async def cancel_revalidations():
+    """Cancels this worker's background revalidations, e.g. on shutdown."""
+    tasks = list(_revalidations.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def find_stale_review(
+    request: ReviewRequest, store: ReviewStore
+) -> Optional[ReviewRecord]:
+    """
+    Finds the newest stored review of the repository at any commit.
+
+    Args:
+        request (ReviewRequest): The incoming request payload.
+        store (ReviewStore): Durable review store.
+
+    Returns:
+        Optional[ReviewRecord]: The stored review, or None if there is none, the
+        store is unavailable or SERVE_STALE_ON_OUTAGE is off.
+    """
+    if not settings.SERVE_STALE_ON_OUTAGE:
+        return None
+    try:
+        record = await store.find_latest(
+            normalize_repo_url(request.github_repo_url),
+            None,
+            request.candidate_level,
+            hash_assignment(request.assignment_description),
+            get_prompt_template().version,
+        )
+    except Exception as e:
+        logger.error(f"Failed to look up a stale review: {e}")
+        return None
+    return record
+
+
+async def read_cached_review(
+    redis: Redis, cache_keys: Dict[str, str]
+) -> Optional[Tuple[str, CachedReview]]:
+    """
+    Reads the newest cached review under any of the given keys.
+
+    Args:
+        redis (Redis): Redis client.
+        cache_keys (Dict[str, str]): Cache keys by route name.
+
+    Returns:
+        Optional[Tuple[str, CachedReview]]: The key and the cached entry, fresh or
+        stale, or None.
+    """
+    logger.info(f"Checking cache for keys: {list(cache_keys.values())}")
+    cached_responses = await redis.mget(list(cache_keys.values()))
+    newest = None
+    for cache_key, cached_response in zip(cache_keys.values(), cached_responses):
+        if not cached_response:
+            continue
+        logger.info(f"Cache hit for key: {cache_key}")
+        try:
+            entry = parse_cached_review(cached_response)
+        except Exception as e:
+            logger.error(f"Failed to parse cached response: {e}")
+            # Remove corrupted cache if parsing fails
+            await redis.delete(cache_key)
+            continue
+        if newest is None or (entry.created_at or float("inf")) > (
+            newest[1].created_at or float("inf")
+        ):
+            newest = (cache_key, entry)
+    return newest
+
+
+async def generate_and_cache_review(
+    request: ReviewRequest,
+    redis: Redis,
+    store: ReviewStore,
+    deadline: Deadline,
+    assignment_hash: str,
+    cache_keys: Dict[str, str],
+    commit_sha: Optional[str] = None,
+    client_id: Optional[str] = None,
+) -> ReviewResponse:
+    """
+    Steps 3 to 6 of the review pipeline, run while holding the review's lock.
+
+    Args:
+        request (ReviewRequest): The incoming request payload.
+        redis (Redis): Redis client for caching.
+        store (ReviewStore): Durable review store.
+        deadline (Deadline): The request deadline.
+        assignment_hash (str): Hash of the assignment description.
+        cache_keys (Dict[str, str]): Cache keys by route name.
+        commit_sha (Optional[str]): Current commit, if already fetched.
+        client_id (Optional[str]): Client to charge if a review is generated; None
+            is not subject to quotas or budgets.
+
+    Returns:
+        ReviewResponse: The review results.
+    """
+    repo_url = normalize_repo_url(request.github_repo_url)
+
+    # Step 3: Check the review store for a review of the current commit
+    prompt_version = get_prompt_template().version
+    with timed_stage("store_read"):
+        commit_sha = commit_sha or await fetch_commit_sha(repo_url)
+        record = await store.find_latest(
+            repo_url,
+            commit_sha,
+            request.candidate_level,
+            assignment_hash,
+            prompt_version,
+        )
+    if record:
+        logger.info(f"Review store hit for {repo_url}@{commit_sha}.")
+        set_cache_tier("store")
+        await cache_review(
+            redis, repo_url, cache_keys[record.route], record.review, commit_sha
+        )
+        return record.review
+
+    # Step 4: Charge the client only now that a review will be generated, then
+    # fetch repository contents. Fetched files are snapshotted even when the
+    # fetch is interrupted, so a retry only downloads what is missing.
+    downgrade = False
+    if client_id is not None:
+        await check_client_quota(redis, client_id)
+        downgrade = await check_tenant_budget(redis, client_id)
+    logger.info(f"Fetching repository contents for {repo_url}.")
+    with timed_stage("fetch"):
+        fetched_files = (
+            await load_snapshot(redis, repo_url)
+            if settings.CACHE_PARTIAL_RESULTS
+            else []
+        )
+        try:
+            repo_contents = await fetch_repository_contents(
+                repo_url, deadline=deadline, fetched_files=fetched_files
+            )
+        finally:
+            if settings.CACHE_PARTIAL_RESULTS and fetched_files:
+                await save_snapshot(redis, repo_url, fetched_files)
+    route = select_route(request.candidate_level, len(repo_contents.code_contents))
+    if downgrade:
+        logger.info(f"{client_id} is close to its budget, using the fast route.")
+        route = FAST_ROUTE
+
+    # Step 5: Generate a new review, keyed on the route that produced it
+    logger.info("Cache miss. Generating a new review.")
+    with timed_stage("generate"):
+        review, route = await generate_review(
+            request,
+            repo_contents,
+            route=route,
+            deadline=deadline,
+            allow_escalation=not downgrade,
+        )
+    cache_key = cache_keys[route.name]
+    logger.info(f"Generated review: {review}")
+
+    # Step 6: Validate the review once, write it through to the store, then
+    # cache it as the JSON that cache hits are answered with
+    if isinstance(review, str):
+        review = ReviewResponse.model_validate_json(review)
+    elif not isinstance(review, ReviewResponse):
+        raise TypeError("Unsupported type for the review object.")
+    # Missing sections are sent as empty values rather than null
+    review = review.model_copy(
+        update={
+            "found_files": review.found_files or [],
+            "downsides": review.downsides or "",
+            "rating": review.rating or "",
+            "conclusion": review.conclusion or "",
+        }
+    )
+    set_cache_tier("generated")
+    with timed_stage("write"):
+        try:
+            await store.save(
+                ReviewRecord(
+                    repo_url=repo_url,
+                    commit_sha=commit_sha,
+                    candidate_level=request.candidate_level,
+                    assignment_hash=assignment_hash,
+                    candidate_id=request.candidate_id,
+                    route=route.name,
+                    review=review,
+                    created_at=time.time(),
+                    prompt_version=prompt_version,
+                    usage=current_usage(),
+                )
+            )
+        except Exception as e:
+            # A paid-for review is still returned and cached if persisting fails
+            logger.error(f"Failed to persist review for {repo_url}: {e}")
+        await cache_review(redis, repo_url, cache_key, review, commit_sha)
+    logger.info(f"Cached review for key: {cache_key}")
+    return review
@@ -1,31 +1,76 @@
-import re
 import traceback
 import logging
+import json
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException
-from services.github.github_access import fetch_repository_contents
-from services.openai.openai_service import analyze_code
+from exceptions.excpetions import CircuitOpenError, DeadlineExceededError
+from services.analysis.repository_index import index_repository, select_relevant_files
+from services.analysis.static_analysis import format_findings, run_static_analysis
+from services.configs.config import settings
+from services.github.github_access import (
+    build_code_contents,
+    fetch_repository_contents,
+    fetch_repository_listing,
+)
+from services.openai.openai_service import analyze_code, repair_review
+from services.review.review_parser import (
+    parse_model_output,
+    review_from_fields,
+    shorten,
+)
+from services.routing.model_router import (
+    FAST_ROUTE,
+    LARGE_ROUTE,
+    escalation_reason,
+    record_escalation,
+    record_repair,
+    select_route,
+)
+from models.analysis_models import RepositoryIndex
+from models.llm_models import ParsedReview
+from models.repository_models import RepositoryFile
 from models.request_models import ReviewRequest, ReviewResponse
-from utils.logging_config.logging_config import logging_config
+from models.routing_models import Route
+from utils.deadline.deadline_utils import Deadline
+from utils.github.github_utils import normalize_repo_url
+from utils.redis_cache.redis_utils import get_redis_client, starter_key
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("CodeReviewAI")
 
+# Sent in place of the candidate code when filtering leaves none of it
+NO_CANDIDATE_CODE_NOTE = (
+    "(No files left to review: every file is unchanged starter code or was "
+    "omitted as low-value, see the static analysis findings.)"
+)
 
-async def generate_review(request: ReviewRequest, repo_contents=None):
+
+async def generate_review(
+    request: ReviewRequest,
+    repo_contents=None,
+    route: Optional[Route] = None,
+    deadline: Optional[Deadline] = None,
+    allow_escalation: bool = True,
+) -> Tuple[ReviewResponse, Route]:
     """
     Generates a review for a given GitHub repository and assignment.
 
     Args:
         request (ReviewRequest): The review request object containing assignment details.
         repo_contents (optional): Pre-fetched repository contents. Defaults to None.
+        route (Optional[Route]): Routing tier to start on. Selected from the level
+            and repository size if not provided.
+        deadline (Optional[Deadline]): Request deadline, propagated to every stage.
+        allow_escalation (bool): Whether a poor answer may be retried on the
+            large route, e.g. False for tenants close to their budget.
 
     Returns:
-        ReviewResponse: Parsed review data.
+        Tuple[ReviewResponse, Route]: Parsed review data, and the route that
+        produced it, which differs from the starting route after an escalation.
     """
     try:
         # Step 1: Fetch repository contents if not provided
         github = repo_contents or await fetch_repository_contents(
-            str(request.github_repo_url)
+            str(request.github_repo_url), deadline=deadline
         )
         if not github.file_contents:
             raise HTTPException(
@@ -34,25 +79,87 @@ async def generate_review(request: ReviewRequest, repo_contents=None):
 
         logger.info(f"Files in repository: {github.file_contents}")
 
-        # Step 2: Validate and summarize repository contents
+        # Step 2: Validate and index repository contents
         github.file_contents = validate_and_transform_contents(github.file_contents)
-        repo_files_summary = summarize_repo_contents(github.file_contents)
+        index = await index_repository(github.files) if github.files else None
+        repo_files_summary = summarize_repo_contents(github.file_contents, index)
         logger.info(f"Repository contents summary: {repo_files_summary}")
 
-        # Step 3: Analyze the code
+        # Step 3: Run the local static-analysis pass and drop low-value files,
+        # then keep the most relevant ones within the prompt token budget.
+        # Files are ordered by path, with unchanged starter files split out, so
+        # the prompt prefix is identical across candidates of an assignment.
+        contents, starter_contents, findings, report = (
+            github.code_contents,
+            "",
+            "",
+            None,
+        )
+        if github.files:
+            report, kept_files = await run_static_analysis(github.files)
+            starter_shas = await load_starter_shas(request.starter_repo_url, deadline)
+            starter_files, candidate_files = split_starter_files(
+                kept_files, starter_shas
+            )
+            candidate_files, over_budget = select_relevant_files(
+                candidate_files,
+                index,
+                settings.PROMPT_CODE_MAX_TOKENS,
+                request.assignment_description,
+            )
+            report.omitted_files.extend(
+                f"{path} (over the prompt token budget)" for path in over_budget
+            )
+            starter_contents = build_code_contents(starter_files)
+            contents = build_code_contents(candidate_files) or NO_CANDIDATE_CODE_NOTE
+            findings = format_findings(report)
+
+        # Step 4: Analyze the code. Malformed output gets a cheap repair call;
+        # only a poor answer is escalated to the large model.
+        route = route or select_route(
+            request.candidate_level, len(github.code_contents)
+        )
         review = await analyze_code(
             assignment=request.assignment_description,
             level=request.candidate_level,
-            contents=github.code_contents,
+            contents=contents,
+            findings=findings,
+            route=route,
+            deadline=deadline,
+            starter_contents=starter_contents,
         )
         logger.debug(f"Raw response from analyze_code: {review}")
+        parsed = await parse_or_repair(review, route, deadline)
 
-        # Step 4: Extract fields from the review
-        review_data = parse_review(review, repo_files_summary)
+        reason = (
+            escalation_reason(parsed)
+            if allow_escalation and route != LARGE_ROUTE
+            else None
+        )
+        if reason:
+            record_escalation(route, reason)
+            review = await analyze_code(
+                assignment=request.assignment_description,
+                level=request.candidate_level,
+                contents=contents,
+                findings=findings,
+                route=LARGE_ROUTE,
+                deadline=deadline,
+                starter_contents=starter_contents,
+            )
+            parsed = await parse_or_repair(review, LARGE_ROUTE, deadline)
+            route = LARGE_ROUTE
+
+        # Step 5: Build the response from the parsed sections
+        review_data = parse_review(parsed, repo_files_summary)
+        review_data.metrics = report
+        review_data.file_index = index.files if index else None
         logger.info(f"Generated review data: {review_data}")
 
-        return review_data
+        return review_data, route
 
+    except (DeadlineExceededError, CircuitOpenError):
+        raise
     except Exception as e:
         logger.error(f"Error in generate_review: {str(e)}")
         logger.debug(traceback.format_exc())
@@ -87,12 +194,14 @@ def validate_and_transform_contents(file_contents):
     return file_contents
 
 
-def summarize_repo_contents(repo_contents):
+def summarize_repo_contents(repo_contents, index: Optional[RepositoryIndex] = None):
     """
     Summarizes repository contents into a human-readable string for analysis.
 
     Args:
         repo_contents (list): List of repository files and directories.
+        index (Optional[RepositoryIndex]): Index of the fetched files, which adds
+            each file's language and size.
 
     Returns:
         str: A summary of the repository contents.
@@ -100,82 +209,141 @@ def summarize_repo_contents(repo_contents):
     if not isinstance(repo_contents, list):
         raise ValueError("Repository contents must be a list of files and directories.")
 
-    summary_lines = [
-        f"- {file.get('path', 'Unknown path')} ({file.get('type', 'Unknown type')})"
-        for file in repo_contents
-    ]
+    entries = {entry.path: entry for entry in index.files} if index else {}
+    summary_lines = []
+    for file in repo_contents:
+        path = file.get("path", "Unknown path")
+        entry = entries.get(path)
+        description = (
+            f"{entry.language}, {entry.loc} LOC"
+            if entry
+            else file.get("type", "Unknown type")
+        )
+        summary_lines.append(f"- {path} ({description})")
     return "\n".join(summary_lines)
 
 
+async def load_starter_shas(
+    starter_repo_url, deadline: Optional[Deadline] = None
+) -> Dict[str, str]:
+    """
+    Returns the blob SHAs of an assignment's starter repository, cached in Redis.
+
+    The starter code only improves prompt caching, so failures are logged and
+    treated as having no starter code.
+
+    Args:
+        starter_repo_url: URL of the starter repository, or None.
+        deadline (Optional[Deadline]): Request deadline.
+
+    Returns:
+        Dict[str, str]: Blob SHA by file path; empty without a starter repository.
+    """
+    if not starter_repo_url:
+        return {}
+    repo_url = normalize_repo_url(starter_repo_url)
+    try:
+        redis = await get_redis_client()
+        cached = await redis.get(starter_key(repo_url))
+        if cached:
+            return json.loads(cached)
+        listing = await fetch_repository_listing(repo_url, deadline)
+        await redis.set(
+            starter_key(repo_url), json.dumps(listing), ex=settings.SNAPSHOT_TTL
+        )
+        return listing
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to load starter repository {repo_url}: {e}")
+        return {}
+
+
+def split_starter_files(
+    files: List[RepositoryFile], starter_shas: Dict[str, str]
+) -> Tuple[List[RepositoryFile], List[RepositoryFile]]:
+    """
+    Splits files into unchanged starter files and the candidate's own, each
+    sorted by path so the prompt does not depend on GitHub's listing order.
+
+    Args:
+        files (List[RepositoryFile]): The candidate's files.
+        starter_shas (Dict[str, str]): Blob SHA by path in the starter repository.
+
+    Returns:
+        Tuple[List[RepositoryFile], List[RepositoryFile]]: Starter files and
+        candidate files.
+    """
+    starter, candidate = [], []
+    for file in sorted(files, key=lambda file: file.path):
+        unchanged = file.sha is not None and starter_shas.get(file.path) == file.sha
+        (starter if unchanged else candidate).append(file)
+    return starter, candidate
+
+
+async def parse_or_repair(
+    review: str, route: Route, deadline: Optional[Deadline] = None
+) -> ParsedReview:
+    """
+    Parses a model's review and, if sections or the rating are missing, asks the
+    fast model to reformat it instead of generating the whole review again.
+
+    Args:
+        review (str): Raw output of analyze_code.
+        route (Route): Route that produced the output, for metrics.
+        deadline (Optional[Deadline]): Request deadline.
+
+    Returns:
+        ParsedReview: The parsed review; may still be incomplete if repair failed.
+    """
+    parsed = parse_model_output(review)
+    if parsed.complete:
+        return parsed
+
+    record_repair(route, escalation_reason(parsed) or "incomplete output")
+    try:
+        repaired = parse_model_output(await repair_review(review, FAST_ROUTE, deadline))
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        # Escalation still gets a chance to produce a usable review
+        logger.warning(f"Repair call failed: {e}")
+        return parsed
+    return repaired if repaired.complete else parsed
+
+
 def parse_review(review, repo_files_summary):
     """
     Parses the review response and extracts necessary fields.
 
     Args:
-        review (str or dict): The response from analyze_code.
+        review (str, dict or ParsedReview): The response from analyze_code, its
+            decoded JSON or its parsed sections.
         repo_files_summary (str): Summary of repository files.
 
     Returns:
         ReviewResponse: Parsed review data.
     """
-    MAX_LENGTH = 500  # Max character length for downsides and conclusion
-    downsides, rating, conclusion = "", "", ""
-
     logger.info(f"Review data: {review}")
 
-    if isinstance(review, str):  # Parse string-based review
-        # Extract downsides
-        if "### Downsides" in review:
-            downsides_start = review.find("### Downsides")
-            downsides_end = review.find("### Rating", downsides_start)
-            downsides = (
-                review[downsides_start + len("### Downsides") : downsides_end].strip()
-                if downsides_end != -1
-                else ""
-            )
-
-        # Extract rating
-        if "### Rating" in review:
-            rating_start = review.find("### Rating")
-            rating_end = review.find("### Comments:", rating_start)
-            rating_section = (
-                review[rating_start + len("### Rating") : rating_end].strip()
-                if rating_end != -1
-                else ""
-            )
-            rating_match = re.search(r"\d+\/\d+", rating_section)
-            if rating_match:
-                raw_rating = rating_match.group(0).split("/")[0]
-                # Clamp to [1, 5]
-                rating = str(min(max(int(raw_rating), 1), 5))
-            else:
-                rating = "No rating provided"
-
-        # Extract conclusion
-        conclusion_start = review.find("### Comments:")
-        conclusion = (
-            review[conclusion_start + len("### Comments:") :].strip()
-            if conclusion_start != -1
-            else review.strip()
-        )
-
-    elif isinstance(review, dict):  # Parse dictionary-based review
-        downsides = review.get("downsides", "")
-        # Clamp rating
-        rating = str(min(max(int(review.get("rating", 1)), 1), 5))
-        conclusion = review.get("conclusion", "")
-
+    if isinstance(review, str):
+        parsed = parse_model_output(review)
+    elif isinstance(review, dict):
+        parsed = review_from_fields(review)
+    elif isinstance(review, ParsedReview):
+        parsed = review
     else:
         logger.error("analyze_code did not return a valid string or dictionary.")
         raise ValueError("Invalid response format from analyze_code.")
 
-    # Ensure downsides and conclusion do not exceed the max length
-    downsides = downsides[:MAX_LENGTH]
-    conclusion = conclusion[:MAX_LENGTH]
+    conclusion = parsed.conclusion
+    if conclusion is None and not parsed.sections and isinstance(review, str):
+        # Unstructured prose is still worth returning as the conclusion
+        conclusion = review.strip()
 
     return ReviewResponse(
-        conclusion=conclusion,
+        conclusion=shorten(conclusion or ""),
         found_files=repo_files_summary.split("\n"),
-        downsides=downsides,
-        rating=rating,
+        downsides=shorten(parsed.downsides or ""),
+        rating=str(parsed.rating) if parsed.rating is not None else "",
     )
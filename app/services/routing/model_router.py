@@ -0,0 +1,167 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Union
+from models.llm_models import ParsedReview
+from models.routing_models import Route, RouteMetrics
+from services.configs.config import settings
+from services.review.review_parser import parse_model_output
+
+logger = logging.getLogger("CodeReviewAI")
+
+FAST_ROUTE = Route(
+    name="fast",
+    model=settings.FAST_MODEL,
+    max_tokens=settings.FAST_MAX_TOKENS,
+    prompt_cost_per_1k=settings.FAST_PROMPT_COST_PER_1K,
+    completion_cost_per_1k=settings.FAST_COMPLETION_COST_PER_1K,
+)
+LARGE_ROUTE = Route(
+    name="large",
+    model=settings.LARGE_MODEL,
+    max_tokens=settings.LARGE_MAX_TOKENS,
+    prompt_cost_per_1k=settings.LARGE_PROMPT_COST_PER_1K,
+    completion_cost_per_1k=settings.LARGE_COMPLETION_COST_PER_1K,
+)
+ROUTES = {route.name: route for route in (FAST_ROUTE, LARGE_ROUTE)}
+
+REQUIRED_SECTIONS = ("downsides", "rating", "conclusion")
+MIN_SECTION_LENGTH = 20  # Shorter downsides or comments count as low confidence
+# From this rating on, a short downsides section ("None.") is a plausible answer
+HIGH_RATING = 4
+
+_metrics: Dict[str, RouteMetrics] = defaultdict(RouteMetrics)
+
+
+def select_route(level: str, code_size: int) -> Route:
+    """
+    Picks the routing tier for a review.
+
+    Args:
+        level (str): The candidate's level (e.g., junior, senior).
+        code_size (int): Size of the code to review in characters.
+
+    Returns:
+        Route: The fast route for small repositories or fast levels, the large route otherwise.
+    """
+    fast_levels = {
+        value.strip() for value in settings.ROUTING_FAST_LEVELS.split(",") if value
+    }
+    if level in fast_levels or code_size <= settings.ROUTING_SMALL_REPO_BYTES:
+        return FAST_ROUTE
+    return LARGE_ROUTE
+
+
+def escalation_reason(review: Union[str, ParsedReview]) -> Optional[str]:
+    """
+    Checks whether a review is malformed or low-confidence and should be escalated.
+
+    Short comments are low-confidence. Short downsides are too, unless the rating
+    is high: a strong submission may well have none worth listing.
+
+    Args:
+        review (Union[str, ParsedReview]): Raw review text returned by the model, or
+            its parsed sections.
+
+    Returns:
+        Optional[str]: The reason for escalation, or None if the review is usable.
+    """
+    parsed = parse_model_output(review) if isinstance(review, str) else review
+    missing = [
+        section for section in REQUIRED_SECTIONS if section not in parsed.sections
+    ]
+    if missing:
+        return f"missing sections: {', '.join(missing)}"
+    if parsed.rating is None:
+        return "no parsable rating"
+    if len(parsed.conclusion) < MIN_SECTION_LENGTH or (
+        len(parsed.downsides) < MIN_SECTION_LENGTH and parsed.rating < HIGH_RATING
+    ):
+        return "low-confidence answer"
+    return None
+
+
+def estimate_cost(route: Route, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimates the USD cost of a model call on a route.
+
+    Args:
+        route (Route): The route the call was made on.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+
+    Returns:
+        float: Estimated cost in USD.
+    """
+    return (
+        prompt_tokens * route.prompt_cost_per_1k
+        + completion_tokens * route.completion_cost_per_1k
+    ) / 1000
+
+
+def record_route_call(
+    route: Route,
+    latency: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+):
+    """
+    Records latency and token usage of a model call on a route.
+
+    Args:
+        route (Route): The route the call was made on.
+        latency (float): Call latency in seconds.
+        prompt_tokens (int): Prompt tokens consumed.
+        completion_tokens (int): Completion tokens consumed.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+    """
+    metrics = _metrics[route.name]
+    metrics.requests += 1
+    metrics.total_latency += latency
+    metrics.max_latency = max(metrics.max_latency, latency)
+    metrics.prompt_tokens += prompt_tokens
+    metrics.cached_tokens += cached_tokens
+    metrics.completion_tokens += completion_tokens
+    metrics.cost += estimate_cost(route, prompt_tokens, completion_tokens)
+
+
+def record_escalation(route: Route, reason: str):
+    """
+    Records that a review on a route had to be escalated.
+
+    Args:
+        route (Route): The route whose output was rejected.
+        reason (str): Why the output was rejected.
+    """
+    _metrics[route.name].escalations += 1
+    logger.warning(f"Escalating review from route '{route.name}': {reason}")
+
+
+def record_repair(route: Route, reason: str):
+    """
+    Records that a review on a route needed a repair call to be parsed.
+
+    Args:
+        route (Route): The route whose output was malformed.
+        reason (str): What was wrong with the output.
+    """
+    _metrics[route.name].repairs += 1
+    logger.warning(f"Repairing malformed output from route '{route.name}': {reason}")
+
+
+def get_route_metrics() -> Dict[str, dict]:
+    """
+    Returns per-route latency and cost metrics for this worker.
+
+    Returns:
+        Dict[str, dict]: Metrics keyed by route name.
+    """
+    return {
+        name: {
+            **metrics.model_dump(),
+            "average_latency": round(metrics.average_latency, 3),
+            "cached_token_ratio": round(metrics.cached_token_ratio, 3),
+            "model": ROUTES[name].model,
+        }
+        for name, metrics in _metrics.items()
+    }
@@ -0,0 +1,116 @@
+import asyncio
+import aiohttp
+from unittest.mock import AsyncMock, patch
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from services.accounting.usage_ledger import track_usage
+from services.github.github_access import fetch_file_contents, fetch_files_recursively
+from services.github.ingestion import RAW_MEDIA_TYPE, IngestBudget, stream_file_text
+
+TEXT = "naïve café " * 20000  # Multi-byte characters across chunk boundaries
+
+
+# Fixture serving raw files from a local aiohttp server
+@pytest_asyncio.fixture
+async def base_url():
+    async def raw_file(request: web.Request) -> web.Response:
+        assert request.headers["Accept"] == RAW_MEDIA_TYPE
+        files = {"text": TEXT.encode(), "binary": b"\x89PNG\0\0" * 100}
+        name = request.match_info["name"]
+        if name not in files:
+            return web.Response(status=404)
+        response = web.StreamResponse()
+        await response.prepare(request)  # Chunked, without a Content-Length
+        await response.write(files[name])
+        return response
+
+    async def listing(request: web.Request) -> web.Response:
+        base = f"http://{request.host}/listing"
+        listings = {
+            "root": [
+                {"type": "file", "path": "a.py"},
+                {"type": "dir", "path": "src", "url": f"{base}/src"},
+                {"type": "dir", "path": "docs", "url": f"{base}/docs"},
+            ],
+            "src": [{"type": "file", "path": "src/b.py"}],
+        }
+        return web.json_response(listings[request.match_info["name"]])
+
+    app = web.Application()
+    app.router.add_get("/listing/{name}", listing)
+    app.router.add_get("/{name}", raw_file)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    yield f"http://127.0.0.1:{runner.addresses[0][1]}"
+    await runner.cleanup()
+
+
+# Test case for streaming a file and stopping at the size limit
+@pytest.mark.asyncio
+async def test_stream_file_text(base_url):
+    async with aiohttp.ClientSession() as session:
+        assert await stream_file_text(session, f"{base_url}/text", {}, None) == TEXT
+        assert await stream_file_text(session, f"{base_url}/text", {}, 1000) is None
+        assert await stream_file_text(session, f"{base_url}/binary", {}, None) is None
+
+
+# Test case for skipping files by listing size and stopping at each budget
+def test_ingest_budget():
+    budget = IngestBudget(max_file_bytes=100, max_bytes=250, max_files=3, max_tokens=0)
+    assert not budget.admits("big.py", 101)
+    assert budget.admits("a.py", 100)
+    budget.charge("x" * 100, 100)
+    budget.charge("x" * 100, 100)
+    assert budget.file_limit() == 50
+    assert not budget.admits("b.py", 60)
+    assert budget.exhausted_by() is None
+    budget.charge("x" * 50, 50)
+    assert budget.exhausted_by() == "file count"
+
+    tokens = IngestBudget(max_file_bytes=0, max_bytes=0, max_files=0, max_tokens=10)
+    assert tokens.file_limit() is None
+    tokens.charge("x" * 40, 40)
+    assert tokens.exhausted_by() == "token"
+
+
+# Test case for stopping the directory listing at the file count budget
+@pytest.mark.asyncio
+async def test_listing_stops_at_file_budget(base_url):
+    all_files = []
+    with patch(
+        "services.github.github_access.spend_rate_budget", new_callable=AsyncMock
+    ) as spend:
+        async with aiohttp.ClientSession() as session:
+            await fetch_files_recursively(
+                session, f"{base_url}/listing/root", {}, all_files, max_files=2
+            )
+    assert [item["path"] for item in all_files] == ["a.py", "src/b.py"]
+    assert spend.await_count == 2  # The docs directory is never listed
+
+
+# Test case for charging a hedged download to the rate budget and the usage
+@pytest.mark.asyncio
+async def test_hedged_download_is_charged(base_url):
+    started = []
+
+    async def slow_first_attempt(session, url, headers, limit):
+        started.append(url)
+        if len(started) == 1:
+            await asyncio.sleep(1)
+        return "print(1)"
+
+    with patch(
+        "services.github.github_access.spend_rate_budget", new_callable=AsyncMock
+    ) as spend, patch(
+        "services.github.github_access.stream_file_text", slow_first_attempt
+    ), patch(
+        "services.github.github_access.settings.GITHUB_HEDGE_DELAY", 0.01
+    ), track_usage() as usage:
+        files = await fetch_file_contents([{"path": "a.py", "url": f"{base_url}/a"}])
+
+    assert [file.content for file in files] == ["print(1)"]
+    assert spend.await_count == 2
+    assert usage.github_calls == 2
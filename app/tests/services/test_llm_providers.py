@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from exceptions.excpetions import OpenAIError
+from services.llm.providers import LocalStubProvider
+
+MESSAGES = [{"role": "user", "content": "Please analyze the following code: ..."}]
+
+
+# Test case for deterministic output of the local stub provider
+@pytest.mark.asyncio
+async def test_local_stub_provider_is_deterministic():
+    provider = LocalStubProvider(concurrency=2, timeout=1)
+
+    first = await provider.complete(MESSAGES, "gpt-4o-mini", 1024, 0.5)
+    second = await provider.complete(MESSAGES, "gpt-4o-mini", 1024, 0.5)
+
+    assert first == second
+    assert first.provider == "stub"
+    assert "### Rating:" in first.content
+    assert provider.in_flight == 0
+
+
+# Test case for the per-provider concurrency pool
+@pytest.mark.asyncio
+async def test_provider_concurrency_limit():
+    provider = LocalStubProvider(concurrency=2, timeout=1, latency=0.05)
+
+    tasks = [
+        asyncio.create_task(provider.complete(MESSAGES, "model", 1024, 0.5))
+        for _ in range(4)
+    ]
+    await asyncio.sleep(0.01)
+
+    assert provider.in_flight == 4
+    assert provider._semaphore.locked()
+    await asyncio.gather(*tasks)
+
+
+# Test case for the per-provider timeout
+@pytest.mark.asyncio
+async def test_provider_timeout():
+    provider = LocalStubProvider(concurrency=1, timeout=0.01, latency=1)
+
+    with pytest.raises(OpenAIError, match="timed out"):
+        await provider.complete(MESSAGES, "model", 1024, 0.5)
@@ -0,0 +1,58 @@
+from services.routing.model_router import (
+    FAST_ROUTE,
+    LARGE_ROUTE,
+    escalation_reason,
+    estimate_cost,
+    select_route,
+)
+
+GOOD_REVIEW = (
+    "### Downsides:\nMissing tests for the service layer and no input validation.\n"
+    "### Rating:\n4/5\n"
+    "### Comments:\nClean structure overall, with clear naming and small functions."
+)
+
+
+# Test case for routing junior reviews and small repositories to the fast model
+def test_select_route():
+    assert select_route("junior", 10_000_000) == FAST_ROUTE
+    assert select_route("senior", 1_000) == FAST_ROUTE
+    assert select_route("senior", 10_000_000) == LARGE_ROUTE
+
+
+# Test case for accepting a well-formed review
+def test_escalation_reason_accepts_complete_review():
+    assert escalation_reason(GOOD_REVIEW) is None
+
+
+# Test case for escalating malformed or low-confidence reviews
+def test_escalation_reason_rejects_poor_reviews():
+    assert "missing sections" in escalation_reason("Looks fine to me.")
+    assert escalation_reason(GOOD_REVIEW.replace("4/5", "good")) == (
+        "no parsable rating"
+    )
+    short = "### Downsides:\nNone\n### Rating:\n5/5\n### Comments:\nOK"
+    assert escalation_reason(short) == "low-confidence answer"
+    no_downsides = GOOD_REVIEW.replace(
+        "Missing tests for the service layer and no input validation.", "None."
+    )
+    assert escalation_reason(no_downsides.replace("4/5", "2/5")) == (
+        "low-confidence answer"
+    )
+
+
+# Test case for accepting a highly rated review without downsides
+def test_escalation_reason_accepts_short_downsides_when_rated_high():
+    review = GOOD_REVIEW.replace(
+        "Missing tests for the service layer and no input validation.",
+        "No major issues.",
+    )
+    assert escalation_reason(review) is None
+    assert escalation_reason(review.replace("4/5", "5/5")) is None
+
+
+# Test case for cost estimation
+def test_estimate_cost():
+    assert estimate_cost(LARGE_ROUTE, 1000, 1000) == (
+        LARGE_ROUTE.prompt_cost_per_1k + LARGE_ROUTE.completion_cost_per_1k
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import hmac
+import pytest
+from unittest.mock import AsyncMock, patch
+from services.prefetch.prefetch_service import (
+    PrefetchQueue,
+    prefetch_repository,
+    verify_signature,
+)
+
+REPO_URL = "https://github.com/example/repo"
+PREFETCH = "services.prefetch.prefetch_service"
+
+
+# Test case for GitHub webhook signature verification
+def test_verify_signature():
+    body = b'{"ref": "refs/heads/main"}'
+    signature = "sha256=" + hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+
+    assert verify_signature("secret", body, signature)
+    assert not verify_signature("other-secret", body, signature)
+    assert not verify_signature("secret", body + b" ", signature)
+    assert not verify_signature("secret", body, None)
+
+
+# Test case for collapsing bursty pushes into a single prefetch
+@pytest.mark.asyncio
+async def test_prefetch_queue_debounces_pushes():
+    queue = PrefetchQueue(maxsize=10, debounce_seconds=0.05, workers=1)
+    with patch(
+        "services.prefetch.prefetch_service.prefetch_repository",
+        new_callable=AsyncMock,
+    ) as mock_prefetch:
+        queue.start()
+        assert queue.enqueue(REPO_URL) == "queued"
+        assert queue.enqueue(REPO_URL) == "coalesced"
+        assert queue.enqueue(REPO_URL) == "coalesced"
+        await asyncio.sleep(0.2)
+        await queue.stop()
+
+    mock_prefetch.assert_awaited_once_with(REPO_URL)
+
+
+# Test case for rejecting pushes when the queue is full
+@pytest.mark.asyncio
+async def test_prefetch_queue_is_bounded():
+    queue = PrefetchQueue(maxsize=2, debounce_seconds=10, workers=1)
+
+    assert queue.enqueue("https://github.com/example/a") == "queued"
+    assert queue.enqueue("https://github.com/example/b") == "queued"
+    assert queue.enqueue("https://github.com/example/c") == "rejected"
+    # Pushes to a repository that is already waiting are still accepted
+    assert queue.enqueue("https://github.com/example/a") == "coalesced"
+    await queue.stop()
+
+
+# Test case for warming the remaining levels when one review fails
+@pytest.mark.asyncio
+async def test_prefetch_continues_after_failed_level():
+    with patch(f"{PREFETCH}.get_redis_client", new_callable=AsyncMock), patch(
+        f"{PREFETCH}.get_review_store", new_callable=AsyncMock
+    ), patch(f"{PREFETCH}.acquire_lock", new_callable=AsyncMock), patch(
+        f"{PREFETCH}.release_lock", new_callable=AsyncMock
+    ), patch(
+        f"{PREFETCH}.load_snapshot", new_callable=AsyncMock, return_value=[]
+    ), patch(
+        f"{PREFETCH}.fetch_repository_contents", new_callable=AsyncMock
+    ), patch(
+        f"{PREFETCH}.invalidate_reviews", new_callable=AsyncMock, return_value=0
+    ), patch(
+        f"{PREFETCH}.run_review_pipeline",
+        new_callable=AsyncMock,
+        side_effect=[RuntimeError("LLM down"), None],
+    ) as pipeline, patch(
+        f"{PREFETCH}.settings.PREFETCH_ASSIGNMENT", "Build a todo API"
+    ), patch(
+        f"{PREFETCH}.settings.PREFETCH_LEVELS", "junior,senior"
+    ):
+        await prefetch_repository(REPO_URL)
+
+    levels = [call.args[0].candidate_level for call in pipeline.await_args_list]
+    assert levels == ["junior", "senior"]
@@ -0,0 +1,71 @@
+import pytest
+from models.repository_models import RepositoryFile
+from services.llm.providers import PREFIX_BLOCK_CHARS, LocalStubProvider
+from services.openai.openai_service import build_messages
+from services.prompts.prompt_registry import get_prompt_template
+from services.review.review_service import split_starter_files
+from utils.redis_cache.redis_utils import review_cache_key
+
+ASSIGNMENT = "Build a REST API for a todo list. " * 40
+
+
+# Test case for the original layout, kept for comparison
+def test_v1_matches_legacy_prompt():
+    messages = build_messages(
+        "Task", "Junior", "print(1)", "- F401", template_version="review-v1"
+    )
+    assert len(messages) == 1
+    content = messages[0]["content"]
+    assert content.startswith("Please analyze the following code:\nTask: Task\n")
+    assert "Static analysis findings" in content
+    assert "Starter code" not in content
+
+
+# Test case for the prefix-stable layout: static instructions first, request-specific
+# sections last, empty sections dropped
+def test_v2_orders_shared_content_first():
+    messages = build_messages(
+        ASSIGNMENT, "Senior", "print(1)", starter_contents="# starter"
+    )
+    assert messages[0]["role"] == "system"
+    content = messages[1]["content"]
+    assert content.startswith(f"Assignment:\n{ASSIGNMENT}")
+    assert (
+        content.index("# starter") < content.index("Senior") < content.index("print(1)")
+    )
+    assert "Static analysis findings" not in content
+
+
+# Test case for an unknown template version
+def test_unknown_template_version():
+    with pytest.raises(ValueError):
+        get_prompt_template("review-v0")
+
+
+# Test case for the simulated provider-side prefix cache
+def test_stub_caches_shared_prefix():
+    provider = LocalStubProvider(concurrency=1, timeout=1)
+    assert provider.cached_prefix_length(ASSIGNMENT + "candidate one") == 0
+    cached = provider.cached_prefix_length(ASSIGNMENT + "candidate two")
+    assert cached == len(ASSIGNMENT) // PREFIX_BLOCK_CHARS * PREFIX_BLOCK_CHARS > 0
+
+
+# Test case for separating unchanged starter files from the candidate's own
+def test_split_starter_files():
+    files = [
+        RepositoryFile(path="main.py", content="x", sha="b"),
+        RepositoryFile(path="app.py", content="y", sha="a"),
+        RepositoryFile(path="setup.py", content="z", sha="changed"),
+    ]
+    starter, candidate = split_starter_files(files, {"app.py": "a", "setup.py": "s"})
+    assert [file.path for file in starter] == ["app.py"]
+    assert [file.path for file in candidate] == ["main.py", "setup.py"]
+
+
+# Test case for the template version in review cache keys
+def test_cache_key_includes_prompt_version():
+    keys = {
+        review_cache_key("url", "Junior", "hash", "fast", version)
+        for version in ("review-v1", "review-v2")
+    }
+    assert len(keys) == 2
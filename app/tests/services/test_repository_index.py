@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from models.analysis_models import FileIndex, RepositoryIndex
+from models.repository_models import RepositoryFile
+from services.analysis.repository_index import (
+    index_file,
+    index_repository,
+    resolve_dependencies,
+    select_relevant_files,
+)
+from services.review.review_service import summarize_repo_contents
+
+PYTHON_FILES = {
+    "app/main.py": (
+        "from services.todo import TodoService\n"
+        "from . import config\n\n"
+        "def main():\n    TodoService().run()\n"
+    ),
+    "app/config.py": "DEBUG = False\n",
+    "app/services/todo.py": (
+        "import os\nfrom .store import *\n\n"
+        "class TodoService:\n    def run(self):\n        pass\n"
+    ),
+    "app/services/store.py": "class Store:\n    pass\n",
+}
+
+
+def make_files(sources: dict) -> list:
+    return [
+        RepositoryFile(path=path, content=content, sha=f"sha-{path}")
+        for path, content in sources.items()
+    ]
+
+
+# Test case for indexing a Python file with its AST
+def test_index_python_file():
+    entry = index_file("app/services/todo.py", PYTHON_FILES["app/services/todo.py"])
+    assert entry["language"] == "Python"
+    assert entry["loc"] == 5
+    assert entry["symbols"] == ["TodoService", "TodoService.run"]
+    assert entry["imports"] == ["os", ".store"]
+
+
+# Test case for indexing a TypeScript file with the line patterns
+def test_index_typescript_file():
+    source = (
+        "import { api } from './api';\n"
+        "import React from 'react';\n"
+        "export interface Todo { id: number }\n"
+        "export const TodoList = (props) => null;\n"
+        "export default function App() {}\n"
+    )
+    entry = index_file("web/src/App.tsx", source)
+    assert entry["language"] == "TypeScript"
+    assert entry["symbols"] == ["Todo", "TodoList", "App"]
+    assert entry["imports"] == ["./api", "react"]
+
+
+# Test case for resolving absolute, relative and third-party imports to files
+def test_resolve_dependencies():
+    entries = [
+        FileIndex(**index_file(f.path, f.content)) for f in make_files(PYTHON_FILES)
+    ]
+    entries.append(
+        FileIndex(path="web/App.js", language="JavaScript", imports=["./api"])
+    )
+    entries.append(FileIndex(path="web/api/index.js", language="JavaScript"))
+    resolve_dependencies(entries)
+    dependencies = {entry.path: entry.dependencies for entry in entries}
+    assert dependencies["app/main.py"] == ["app/services/todo.py", "app/config.py"]
+    assert dependencies["app/services/todo.py"] == ["app/services/store.py"]
+    assert dependencies["web/App.js"] == ["web/api/index.js"]
+
+
+# Test case for caching entries by blob SHA and parsing only new files
+@pytest.mark.asyncio
+async def test_index_repository_uses_cache():
+    files = make_files(PYTHON_FILES)
+    cached = FileIndex(path="old/path.py", language="Python", loc=1, symbols=["DEBUG"])
+    redis = MagicMock()
+    redis.mget = AsyncMock(return_value=[None, cached.model_dump_json(), None, None])
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    with patch(
+        "services.analysis.repository_index.get_redis_client",
+        new_callable=AsyncMock,
+        return_value=redis,
+    ):
+        index = await index_repository(files)
+
+    assert [entry.path for entry in index.files] == list(PYTHON_FILES)
+    assert index.files[1].symbols == ["DEBUG"]  # Served from the cache
+    assert pipe.set.call_count == 3
+    assert index.files[0].dependencies == ["app/services/todo.py", "app/config.py"]
+    assert "app/main.py (Python, 4 LOC)" in summarize_repo_contents(
+        [{"path": "app/main.py", "type": "file"}], index
+    )
+
+
+# Test case for keeping the most relevant files within the token budget
+def test_select_relevant_files():
+    files = [
+        RepositoryFile(path="app/main.py", content="x" * 400),
+        RepositoryFile(path="app/todo.py", content="x" * 400),
+        RepositoryFile(path="scripts/seed.py", content="x" * 400),
+    ]
+    index = RepositoryIndex(
+        files=[
+            FileIndex(
+                path="app/main.py", language="Python", dependencies=["app/todo.py"]
+            ),
+            FileIndex(path="app/todo.py", language="Python", symbols=["TodoService"]),
+            FileIndex(path="scripts/seed.py", language="Python"),
+        ]
+    )
+    selected, omitted = select_relevant_files(files, index, 200, "A todo list API")
+    assert [file.path for file in selected] == ["app/main.py", "app/todo.py"]
+    assert omitted == ["scripts/seed.py"]
+    assert select_relevant_files(files, index, 0) == (files, [])
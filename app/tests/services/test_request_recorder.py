@@ -0,0 +1,119 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, patch
+from models.request_models import ReviewRequest, ReviewResponse
+from services.accounting.usage_ledger import set_cache_tier, timed_stage
+from services.recording.request_recorder import (
+    RequestRecorder,
+    _reset_request_recorder,
+    anonymize,
+    get_request_recorder,
+    load_recording,
+)
+from services.review.review_pipeline import run_review_pipeline
+from utils.deadline.deadline_utils import Deadline
+from utils.github.github_utils import normalize_repo_url
+
+PIPELINE = "services.review.review_pipeline"
+
+REQUEST = ReviewRequest(
+    assignment_description="Build a todo API with tests",
+    github_repo_url="https://github.com/owner/secret-repo",
+    candidate_level="junior",
+    candidate_id="candidate-1",
+)
+
+
+async def run_recorded(recorder: RequestRecorder, serve: AsyncMock):
+    with patch(f"{PIPELINE}.get_request_recorder", return_value=recorder), patch(
+        f"{PIPELINE}.serve_review", serve
+    ):
+        return await run_review_pipeline(
+            REQUEST, AsyncMock(), AsyncMock(), Deadline(30), "client-1", record=True
+        )
+
+
+async def serve_generated(*args):
+    with timed_stage("generate"):
+        set_cache_tier("generated")
+    return ReviewResponse(rating="4")
+
+
+# Test case for replacing identifiers with stable keyed digests
+def test_anonymize():
+    assert anonymize("owner/repo") == anonymize("owner/repo")
+    assert anonymize("owner/repo") != anonymize("owner/other")
+    with patch("services.recording.request_recorder.settings.RECORD_HASH_KEY", "key"):
+        keyed = anonymize("owner/repo")
+    assert keyed != anonymize("owner/repo")
+
+
+# Test case for recording a served request without its identifiers
+@pytest.mark.asyncio
+async def test_records_anonymized_request(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    recorder = RequestRecorder(str(path), 1.0)
+
+    response = await run_recorded(recorder, AsyncMock(side_effect=serve_generated))
+    recorder.close()
+
+    assert response.rating == "4"
+    text = path.read_text()
+    assert "secret-repo" not in text and "todo" not in text and "client-1" not in text
+    [entry] = load_recording(str(path))
+    assert entry.repo == anonymize(normalize_repo_url(REQUEST.github_repo_url))
+    assert entry.assignment_length == len(REQUEST.assignment_description)
+    assert entry.tenant == anonymize("client-1")
+    assert entry.has_candidate_id
+    assert entry.status == "200"
+    assert entry.cache_tier == "generated"
+    assert set(entry.stages) == {"generate"}
+
+
+# Test case for recording the status of a failed request
+@pytest.mark.asyncio
+async def test_records_failed_request(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    recorder = RequestRecorder(str(path), 1.0)
+
+    with pytest.raises(HTTPException):
+        await run_recorded(
+            recorder, AsyncMock(side_effect=HTTPException(status_code=404))
+        )
+    with pytest.raises(TimeoutError):
+        await run_recorded(recorder, AsyncMock(side_effect=TimeoutError()))
+    recorder.close()
+
+    assert [entry.status for entry in load_recording(str(path))] == [
+        "404",
+        "TimeoutError",
+    ]
+
+
+# Test case for not recording when off or not sampled
+@pytest.mark.asyncio
+async def test_records_nothing_unsampled(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    unsampled = RequestRecorder(str(path), 0.0)
+
+    await run_recorded(unsampled, AsyncMock(side_effect=serve_generated))
+
+    assert not RequestRecorder("", 1.0).sampled()
+    assert not path.exists()
+
+
+# Test case for not recording when no key is set for the digests
+def test_recording_requires_hash_key(tmp_path):
+    path = str(tmp_path / "requests.jsonl")
+    settings = "services.recording.request_recorder.settings"
+    with patch(f"{settings}.RECORD_REQUESTS_PATH", path), patch(
+        f"{settings}.RECORD_HASH_KEY", ""
+    ):
+        _reset_request_recorder()
+        assert not get_request_recorder().sampled()
+    with patch(f"{settings}.RECORD_REQUESTS_PATH", path), patch(
+        f"{settings}.RECORD_HASH_KEY", "key"
+    ):
+        _reset_request_recorder()
+        assert get_request_recorder().path == path
+    _reset_request_recorder()
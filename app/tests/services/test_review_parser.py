@@ -0,0 +1,90 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from services.review.review_parser import parse_model_output, parse_rating, shorten
+from services.review.review_service import parse_or_repair, parse_review
+from services.routing.model_router import FAST_ROUTE
+
+DOWNSIDES = "Missing tests for the service layer."
+CONCLUSION = "Clean structure overall, with clear naming."
+
+
+# Test case for ratings written in different forms
+def test_parse_rating():
+    assert parse_rating("4/5") == 4
+    assert parse_rating("8 / 10") == 4
+    assert parse_rating("3 out of 5") == 3
+    assert parse_rating("Rating: 7") == 5
+    assert parse_rating("good") is None
+
+
+# Test case for headed sections with and without colons, bold or plain labels
+@pytest.mark.parametrize(
+    "output",
+    [
+        f"### Downsides:\n{DOWNSIDES}\n### Rating:\n4/5\n### Comments:\n{CONCLUSION}",
+        f"### Downsides\n{DOWNSIDES}\n### Rating\n4/5\n### Comments\n{CONCLUSION}",
+        f"**Downsides:** {DOWNSIDES}\n**Rating:** 4/5\n**Comments:** {CONCLUSION}",
+        f"Downsides: {DOWNSIDES}\nRating: 8/10\nConclusion: {CONCLUSION}",
+    ],
+)
+def test_parse_markdown_output(output):
+    parsed = parse_model_output(output)
+    assert parsed.complete
+    assert (parsed.downsides, parsed.rating, parsed.conclusion) == (
+        DOWNSIDES,
+        4,
+        CONCLUSION,
+    )
+
+
+# Test case for JSON output, fenced, and cut off by the token limit
+def test_parse_json_output():
+    body = json.dumps({"downsides": DOWNSIDES, "rating": 4, "conclusion": CONCLUSION})
+    assert parse_model_output(body).complete
+    assert parse_model_output(f"Review:\n```json\n{body}\n```").rating == 4
+
+    truncated = parse_model_output(body[:-10])
+    assert truncated.complete
+    assert CONCLUSION.startswith(truncated.conclusion)
+
+
+# Test case for prose that merely starts with a section name
+def test_prose_is_not_a_heading():
+    parsed = parse_model_output("Issues are few.\n### Rating:\n5/5\n")
+    assert parsed.sections == ["rating"]
+    assert not parsed.complete
+
+
+# Test case for building a valid response, shortening long sections
+def test_parse_review_builds_valid_response():
+    output = f"### Downsides:\n{'word ' * 200}\n### Rating:\n9/10\n### Comments:\nOK"
+    review = parse_review(output, "- main.py (Unknown)")
+    assert review.rating == "5"
+    assert len(review.downsides) <= 500 and review.downsides.endswith("...")
+    assert parse_review("Looks fine to me.", "- a.py").conclusion == (
+        "Looks fine to me."
+    )
+    assert shorten("short") == "short"
+
+
+# Test case for repairing output without a rating instead of regenerating it
+@pytest.mark.asyncio
+async def test_parse_or_repair():
+    broken = f"### Downsides:\n{DOWNSIDES}\n### Comments:\n{CONCLUSION}"
+    repaired = json.dumps(
+        {"downsides": DOWNSIDES, "rating": 3, "conclusion": CONCLUSION}
+    )
+    with patch(
+        "services.review.review_service.repair_review",
+        new_callable=AsyncMock,
+        return_value=repaired,
+    ) as repair:
+        parsed = await parse_or_repair(broken, FAST_ROUTE)
+        assert parsed.rating == 3
+        repair.assert_awaited_once()
+
+        repair.reset_mock()
+        repair.side_effect = Exception("provider down")
+        parsed = await parse_or_repair(broken, FAST_ROUTE)
+        assert parsed.rating is None
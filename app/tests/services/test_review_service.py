@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from models.repository_models import RepositoryFile, Result
+from models.request_models import ReviewRequest
+from services.routing.model_router import FAST_ROUTE, LARGE_ROUTE
+from services.review.review_service import NO_CANDIDATE_CODE_NOTE, generate_review
+
+REVIEW = (
+    '{"downsides": "Error handling is missing in the API layer.", "rating": 4, '
+    '"conclusion": "A clean and well-structured solution overall."}'
+)
+POOR_REVIEW = '{"downsides": "None.", "rating": 4, "conclusion": "Good."}'
+
+
+def make_request() -> ReviewRequest:
+    return ReviewRequest(
+        assignment_description="Build a REST API for a todo list.",
+        github_repo_url="https://github.com/user/repo",
+        candidate_level="junior",
+        starter_repo_url="https://github.com/org/starter",
+    )
+
+
+# Test case for a repository whose files are all unchanged starter code: the
+# excluded files are not sent back as the candidate code
+@pytest.mark.asyncio
+async def test_no_candidate_files_sends_note():
+    files = [
+        RepositoryFile(path="main.py", content="print('starter')\n", sha="s1"),
+        RepositoryFile(path="package-lock.json", content="{}", sha="s2"),
+    ]
+    github = Result(
+        code_contents="# full contents\n",
+        file_contents=[file.path for file in files],
+        files=files,
+    )
+    with patch(
+        "services.review.review_service.load_starter_shas",
+        new_callable=AsyncMock,
+        return_value={"main.py": "s1"},
+    ), patch(
+        "services.analysis.repository_index.get_redis_client",
+        new_callable=AsyncMock,
+        side_effect=ConnectionError,
+    ), patch(
+        "services.review.review_service.analyze_code",
+        new_callable=AsyncMock,
+        return_value=REVIEW,
+    ) as analyze:
+        review, route = await generate_review(make_request(), repo_contents=github)
+
+    assert review.rating == "4"
+    assert route == FAST_ROUTE
+    assert review.file_index[0].language == "Python"
+    assert analyze.await_args.kwargs["contents"] == NO_CANDIDATE_CODE_NOTE
+    assert "print('starter')" in analyze.await_args.kwargs["starter_contents"]
+
+
+# Test case for reporting the route that produced the review after an escalation
+@pytest.mark.asyncio
+async def test_escalated_review_reports_large_route():
+    github = Result(code_contents="print(1)\n", file_contents=["main.py"])
+    with patch(
+        "services.review.review_service.analyze_code",
+        new_callable=AsyncMock,
+        side_effect=[POOR_REVIEW, REVIEW],
+    ) as analyze, patch("services.review.review_service.record_escalation"):
+        review, route = await generate_review(
+            make_request(), repo_contents=github, route=FAST_ROUTE
+        )
+
+    assert route == LARGE_ROUTE
+    assert analyze.await_args.kwargs["route"] == LARGE_ROUTE
+    assert review.conclusion.startswith("A clean")
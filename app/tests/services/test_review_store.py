@@ -0,0 +1,130 @@
+import asyncio
+import sqlite3
+import pytest
+from models.request_models import ReviewResponse
+from models.storage_models import ReviewRecord
+from models.usage_models import ReviewUsage, UsageReport
+from services.storage.review_store import SQLITE_SCHEMA, SQLiteReviewStore
+
+
+def make_record(created_at: float, **overrides) -> ReviewRecord:
+    fields = dict(
+        repo_url="https://github.com/example/repo",
+        commit_sha="abc123",
+        candidate_level="junior",
+        assignment_hash="hash",
+        candidate_id="candidate-1",
+        route="fast",
+        review=ReviewResponse(rating="4", conclusion="Good overall"),
+        created_at=created_at,
+        prompt_version="review-v2",
+    )
+    fields.update(overrides)
+    return ReviewRecord(**fields)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteReviewStore(str(tmp_path / "reviews.db"))
+
+
+# Test case for looking up the newest review of an exact commit and assignment
+@pytest.mark.asyncio
+async def test_find_latest(store):
+    await store.save(make_record(1.0))
+    newest = await store.save(make_record(2.0, route="large"))
+    await store.save(make_record(3.0, commit_sha="def456"))
+
+    found = await store.find_latest(
+        "https://github.com/example/repo", "abc123", "junior", "hash", "review-v2"
+    )
+
+    assert found == newest
+    assert found.review.rating == "4"
+    assert (
+        await store.find_latest(
+            "https://github.com/example/repo", "x", "junior", "hash", "review-v2"
+        )
+        is None
+    )
+
+    # Any commit, e.g. for a stale review while GitHub is down
+    stale = await store.find_latest(
+        "https://github.com/example/repo", None, "junior", "hash", "review-v2"
+    )
+    assert stale.commit_sha == "def456"
+
+    # Reviews generated with another prompt template are not reused
+    assert (
+        await store.find_latest(
+            "https://github.com/example/repo", "abc123", "junior", "hash", "review-v1"
+        )
+        is None
+    )
+
+
+# Test case for adding new columns to a database created before them
+@pytest.mark.asyncio
+async def test_migrates_existing_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(SQLITE_SCHEMA.replace(",\n    prompt_version TEXT", ""))
+    connection.execute(
+        "CREATE INDEX idx_reviews_lookup ON reviews "
+        "(repo_url, commit_sha, candidate_level, assignment_hash, created_at)"
+    )
+    connection.close()
+
+    store = SQLiteReviewStore(path)
+    await store.save(make_record(1.0))
+    found = await store.find_latest(
+        "https://github.com/example/repo", "abc123", "junior", "hash", "review-v2"
+    )
+    assert found.prompt_version == "review-v2"
+    indexes, _ = await asyncio.to_thread(
+        store._execute, "SELECT name FROM sqlite_master WHERE type = 'index'"
+    )
+    assert ("idx_reviews_lookup",) not in indexes
+    columns, _ = await asyncio.to_thread(
+        store._execute, "PRAGMA index_info(idx_reviews_version_lookup)"
+    )
+    assert "prompt_version" in [column[2] for column in columns]
+
+
+# Test case for paginated history by repository and by candidate
+@pytest.mark.asyncio
+async def test_list_history(store):
+    for index in range(5):
+        await store.save(make_record(float(index)))
+    await store.save(
+        make_record(
+            10.0, repo_url="https://github.com/other/repo", candidate_id="candidate-2"
+        )
+    )
+
+    page = await store.list_history(
+        repo_url="https://github.com/example/repo", page=2, page_size=2
+    )
+    assert page.total == 5
+    assert [item.created_at for item in page.items] == [2.0, 1.0]
+
+    candidate_page = await store.list_history(candidate_id="candidate-2")
+    assert candidate_page.total == 1
+    assert candidate_page.items[0].repo_url == "https://github.com/other/repo"
+
+
+# Test case for storing a review's usage and a day's usage totals
+@pytest.mark.asyncio
+async def test_usage_persistence(store):
+    usage = ReviewUsage(cache_tier="generated", llm_calls=2, cost=0.01)
+    saved = await store.save(make_record(1.0, usage=usage))
+    report = UsageReport(period="2026-01-01", scope="tenant", scope_id="t", reviews=1)
+    await store.save_usage(report)
+    await store.save_usage(report.model_copy(update={"reviews": 2}))
+
+    history = await store.list_history(candidate_id="candidate-1")
+
+    assert history.items[0].id == saved.id
+    assert history.items[0].usage == usage
+    assert (await store.find_usage("2026-01-01", "tenant", "t")).reviews == 2
+    assert await store.find_usage("2026-01-02", "tenant", "t") is None
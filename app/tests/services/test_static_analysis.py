@@ -0,0 +1,83 @@
+import pytest
+from models.repository_models import RepositoryFile
+from services.analysis.static_analysis import (
+    analyze_file,
+    format_findings,
+    low_value_reason,
+    run_static_analysis,
+)
+
+SAMPLE_CODE = """
+from os import *
+
+
+def classify(value):
+    if value > 10 and value < 100:
+        return "medium"
+    elif value >= 100:
+        return "large"
+    try:
+        return str(value)
+    except:
+        return "unknown"  # TODO: handle properly
+
+
+class Helper:
+    pass
+"""
+
+DUPLICATED_BLOCK = """
+total = 0
+for item in items:
+    total += item.price
+    total -= item.discount
+    total *= tax_rate
+print(total)
+"""
+
+
+# Test case for AST metrics and lint counts of a single Python file
+def test_analyze_file_python_metrics():
+    result = analyze_file("module.py", SAMPLE_CODE)
+
+    assert result["classes"] == 1
+    assert result["functions"] == [("classify", 5)]
+    assert result["lint"]["bare_except"] == 1
+    assert result["lint"]["wildcard_import"] == 1
+    assert result["lint"]["todo"] == 1
+
+
+# Test case for files that fail to parse
+def test_analyze_file_syntax_error():
+    result = analyze_file("broken.py", "def broken(:\n    pass\n")
+
+    assert result["lint"]["syntax_error"] == 1
+    assert result["functions"] == []
+
+
+# Test case for low-value file detection
+def test_low_value_reason():
+    assert low_value_reason("poetry.lock", "") == "lock file"
+    assert low_value_reason("static/app.min.js", "") == "generated or data file"
+    assert low_value_reason("web/node_modules/x/index.js", "") == (
+        "vendored or build output"
+    )
+    assert low_value_reason("main.py", SAMPLE_CODE) is None
+
+
+# Test case for the full pipeline across several files
+@pytest.mark.asyncio
+async def test_run_static_analysis_detects_duplicates_and_omits_files():
+    files = [
+        RepositoryFile(path="a.py", content=DUPLICATED_BLOCK),
+        RepositoryFile(path="b.py", content=DUPLICATED_BLOCK),
+        RepositoryFile(path="poetry.lock", content="[[package]]"),
+    ]
+
+    report, kept_files = await run_static_analysis(files)
+
+    assert [file.path for file in kept_files] == ["a.py", "b.py"]
+    assert report.files_analyzed == 2
+    assert report.duplicate_blocks > 0
+    assert report.omitted_files == ["poetry.lock (lock file)"]
+    assert "Duplicate code blocks" in format_findings(report)
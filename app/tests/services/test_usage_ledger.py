@@ -0,0 +1,190 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from httpx import AsyncClient
+from api.main import app
+from exceptions.excpetions import BudgetExceededError
+from models.usage_models import UsageReport
+from services.accounting.usage_ledger import (
+    UsageLedger,
+    check_tenant_budget,
+    current_usage,
+    read_usage,
+    record_github_call,
+    record_llm_call,
+    set_cache_tier,
+    track_usage,
+    usage_period,
+)
+from services.routing.model_router import FAST_ROUTE, estimate_cost
+from services.storage.review_store import get_review_store
+from utils.redis_cache.redis_utils import get_redis_client, usage_key
+
+LEDGER = "services.accounting.usage_ledger"
+
+
+def mock_redis_pipeline():
+    redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return redis, pipe
+
+
+def generated_usage():
+    with track_usage() as usage:
+        record_llm_call(FAST_ROUTE, 1.5, 1000, 200, 400)
+        record_github_call()
+        record_github_call()
+        set_cache_tier("generated")
+    return usage
+
+
+# Test case for recording calls only inside track_usage
+def test_track_usage_records_calls():
+    usage = generated_usage()
+
+    assert usage.llm_calls == 1
+    assert usage.models == [FAST_ROUTE.model]
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens) == (
+        1000,
+        200,
+        400,
+    )
+    assert usage.cost == estimate_cost(FAST_ROUTE, 1000, 200)
+    assert usage.github_calls == 2
+    assert usage.cache_tier == "generated"
+    # Outside a tracked request nothing is recorded, and nothing fails
+    record_github_call()
+    assert current_usage() is None
+
+
+# Test case for flushing a review's usage to its total, tenant and candidate
+@pytest.mark.asyncio
+async def test_flush_aggregates_scopes():
+    ledger = UsageLedger()
+    ledger.add(generated_usage(), "tenant-1", "candidate-1")
+    ledger.add(generated_usage(), "tenant-1", None)
+    redis, pipe = mock_redis_pipeline()
+
+    await ledger.flush(redis)
+
+    increments = {call.args for call in pipe.hincrby.call_args_list}
+    period = usage_period()
+    assert (usage_key(period, "total", "all"), "reviews", 2) in increments
+    assert (usage_key(period, "tenant", "tenant-1"), "github_calls", 4) in increments
+    assert (
+        usage_key(period, "candidate", "candidate-1"),
+        "tier:generated",
+        1,
+    ) in increments
+    assert pipe.expire.call_count == 3
+    assert ledger.pending(usage_key(period, "total", "all"), "reviews") == 0
+
+
+# Test case for keeping counters for the next flush while Redis is down
+@pytest.mark.asyncio
+async def test_flush_keeps_counters_on_failure():
+    ledger = UsageLedger()
+    ledger.add(generated_usage(), None, None)
+    redis, pipe = mock_redis_pipeline()
+    pipe.execute.side_effect = ConnectionError("Redis down")
+
+    await ledger.flush(redis)
+
+    assert ledger.pending(usage_key(usage_period(), "total", "all"), "llm_calls") == 1
+
+
+# Test case for downgrading, then rejecting, tenants past their daily budget
+@pytest.mark.asyncio
+async def test_tenant_budget():
+    redis = AsyncMock()
+    with patch(f"{LEDGER}.settings.TENANT_DAILY_BUDGET", 1.0), patch(
+        f"{LEDGER}.settings.API_KEYS", "key-1:tenant-1"
+    ), patch(f"{LEDGER}.get_usage_ledger", return_value=UsageLedger()):
+        redis.hget.return_value = "100000"
+        assert await check_tenant_budget(redis, "tenant-1") is False
+
+        redis.hget.return_value = "850000"
+        assert await check_tenant_budget(redis, "tenant-1") is True
+
+        redis.hget.return_value = "1000000"
+        with pytest.raises(BudgetExceededError) as error:
+            await check_tenant_budget(redis, "tenant-1")
+        assert 0 < error.value.retry_after <= 24 * 3600
+
+        redis.hget.side_effect = ConnectionError("Redis down")
+        assert await check_tenant_budget(redis, "tenant-1") is False
+
+
+# Test case for not enforcing budgets on clients without authenticated tenants
+@pytest.mark.asyncio
+async def test_tenant_budget_needs_api_keys():
+    redis = AsyncMock()
+    redis.hget.return_value = "1000000"
+    with patch(f"{LEDGER}.settings.TENANT_DAILY_BUDGET", 1.0), patch(
+        f"{LEDGER}.settings.API_KEYS", ""
+    ):
+        assert await check_tenant_budget(redis, "10.0.0.5") is False
+    redis.hget.assert_not_awaited()
+
+
+# Test case for usage reports: any scope with the admin token, a tenant's own
+# totals with its API key, nothing without either
+@pytest.mark.asyncio
+async def test_usage_endpoint_requires_auth():
+    redis, store = AsyncMock(), AsyncMock()
+    redis.hgetall.return_value = {"reviews": "1"}
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    app.dependency_overrides[get_review_store] = lambda: store
+    try:
+        with patch("api.endpoints.settings.API_KEYS", "key-1:tenant-1"), patch(
+            "api.endpoints.settings.ADMIN_TOKEN", "secret"
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                anonymous = await client.get("/api/usage")
+                other = await client.get(
+                    "/api/usage",
+                    params={"tenant": "tenant-2"},
+                    headers={"X-API-Key": "key-1"},
+                )
+                own = await client.get("/api/usage", headers={"X-API-Key": "key-1"})
+                admin = await client.get(
+                    "/api/usage",
+                    params={"tenant": "tenant-2"},
+                    headers={"X-Admin-Token": "secret"},
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert other.status_code == 403
+    assert own.status_code == 200
+    assert own.json()["scope_id"] == "tenant-1"
+    assert admin.status_code == 200
+    assert admin.json()["scope_id"] == "tenant-2"
+
+
+# Test case for reading totals from Redis, or from the store once expired
+@pytest.mark.asyncio
+async def test_read_usage():
+    redis = AsyncMock()
+    store = AsyncMock()
+    redis.hgetall.return_value = {
+        "reviews": "3",
+        "cost_microusd": "2500",
+        "tier:redis": "2",
+        "tier:generated": "1",
+    }
+
+    report = await read_usage(redis, store, "2026-01-02", "tenant", "tenant-1")
+
+    assert report.reviews == 3
+    assert report.cost == 0.0025
+    assert report.cache_tiers == {"redis": 2, "generated": 1}
+    store.find_usage.assert_not_awaited()
+
+    stored = UsageReport(period="2026-01-01", scope="total", scope_id="all", reviews=7)
+    redis.hgetall.return_value = {}
+    store.find_usage.return_value = stored
+    assert await read_usage(redis, store, "2026-01-01", "total", "all") == stored
@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient
+from api.main import app
+
+ADMIN = "api.admin.settings"
+
+
+# Test case for admin endpoints being off without a configured token
+@pytest.mark.asyncio
+async def test_profile_not_configured():
+    with patch(f"{ADMIN}.ADMIN_TOKEN", ""):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/api/admin/profile", headers={"X-Admin-Token": ""}
+            )
+    assert response.status_code == 503
+
+
+# Test case for rejecting a wrong admin token
+@pytest.mark.asyncio
+async def test_profile_invalid_token():
+    with patch(f"{ADMIN}.ADMIN_TOKEN", "secret"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/api/admin/profile", headers={"X-Admin-Token": "guess"}
+            )
+    assert response.status_code == 403
+
+
+# Test case for returning folded stacks of the serving worker
+@pytest.mark.asyncio
+async def test_profile_returns_folded_stacks():
+    with patch(f"{ADMIN}.ADMIN_TOKEN", "secret"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/api/admin/profile",
+                params={"seconds": 0.1, "interval": 0.001},
+                headers={"X-Admin-Token": "secret"},
+            )
+    assert response.status_code == 200
+    assert response.headers["X-Worker-Pid"]
+    lines = response.text.splitlines()
+    assert lines
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -1,9 +1,21 @@
+import asyncio
+import time
 import pytest
 from httpx import AsyncClient
 from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock
 from api.main import app
-from models.request_models import ReviewResponse
+from services.review.review_pipeline import (
+    generate_and_cache_review,
+    run_review_pipeline,
+)
+from exceptions.excpetions import DeadlineExceededError
+from models.repository_models import Result
+from models.request_models import ReviewRequest, ReviewResponse
+from services.routing.model_router import FAST_ROUTE, LARGE_ROUTE, ROUTES
+from services.storage.review_store import get_review_store
+from utils.deadline.deadline_utils import Deadline
+from utils.redis_cache.redis_utils import get_redis_client
 
 
 # Fixture to create an async client for testing
@@ -42,33 +54,39 @@ async def test_review_code_success(async_client):
             conclusion="Good overall",
         )
 
-        # Mock the necessary dependencies
-        with patch(
-            "app.services.github.github_access.fetch_repository_contents",
-            new_callable=AsyncMock,
-        ) as mock_fetch:
+        # Mock the dependencies the pipeline imports, and Redis and the store
+        redis, store = AsyncMock(), AsyncMock()
+        redis.mget.return_value = [None, None]
+        store.find_latest.return_value = None
+        app.dependency_overrides[get_redis_client] = lambda: redis
+        app.dependency_overrides[get_review_store] = lambda: store
+        try:
             with patch(
-                "app.services.review.review_service.generate_review",
+                "services.review.review_pipeline.fetch_commit_sha",
                 new_callable=AsyncMock,
-            ) as mock_generate:
-                with patch(
-                    "app.utils.redis_cache.redis_utils.get_redis_client",
-                    new_callable=AsyncMock,
-                ) as mock_redis:
-                    # Set up mock return values
-                    mock_fetch.return_value = "mock_repo_contents"
-                    mock_generate.return_value = mock_review_response
-                    mock_redis.return_value.get.return_value = None
-
-                    # Send a POST request to the review endpoint
-                    response = await client.post(
-                        "/api/review",
-                        json={
-                            "assignment_description": "Test assignment",
-                            "github_repo_url": "https://github.com/test/repo",
-                            "candidate_level": "junior",
-                        },
-                    )
+                return_value="abc",
+            ), patch(
+                "services.review.review_pipeline.fetch_repository_contents",
+                new_callable=AsyncMock,
+                return_value=Result(code_contents="print(1)", file_contents=[]),
+            ), patch(
+                "services.review.review_pipeline.generate_review",
+                new_callable=AsyncMock,
+                return_value=(mock_review_response, FAST_ROUTE),
+            ), patch(
+                "services.review.review_pipeline.cache_review", new_callable=AsyncMock
+            ):
+                # Send a POST request to the review endpoint
+                response = await client.post(
+                    "/api/review",
+                    json={
+                        "assignment_description": "Test assignment",
+                        "github_repo_url": "https://github.com/test/repo",
+                        "candidate_level": "junior",
+                    },
+                )
+        finally:
+            app.dependency_overrides.clear()
 
         # Assert the response is as expected
         assert response.status_code == 200
@@ -99,7 +117,8 @@ async def test_review_code_github_error(async_client):
     async for client in async_client:
         # Mock the GitHub API to raise an exception
         with patch(
-            "app.api.endpoints.fetch_repository_contents", new_callable=AsyncMock
+            "app.services.review.review_pipeline.fetch_repository_contents",
+            new_callable=AsyncMock,
         ) as mock_fetch:
             mock_fetch.side_effect = Exception("GitHub API error")
 
@@ -124,10 +143,12 @@ async def test_review_code_generation_error(async_client):
     async for client in async_client:
         # Mock the dependencies
         with patch(
-            "app.api.endpoints.fetch_repository_contents", new_callable=AsyncMock
+            "app.services.review.review_pipeline.fetch_repository_contents",
+            new_callable=AsyncMock,
         ) as mock_fetch:
             with patch(
-                "app.api.endpoints.generate_review", new_callable=AsyncMock
+                "app.services.review.review_pipeline.generate_review",
+                new_callable=AsyncMock,
             ) as mock_generate:
                 # Set up mock return values and side effects
                 mock_fetch.return_value = "mock_repo_contents"
@@ -146,3 +167,65 @@ async def test_review_code_generation_error(async_client):
         # Assert that the response indicates a server error
         assert response.status_code == 500
         assert "An unexpected error occurred" in response.json()["detail"]
+
+
+# Test case for caching and storing an escalated review under the route that
+# produced it
+@pytest.mark.asyncio
+async def test_escalated_review_keyed_on_large_route():
+    request = ReviewRequest(
+        assignment_description="Test assignment",
+        github_repo_url="https://github.com/test/repo",
+        candidate_level="junior",
+    )
+    review = ReviewResponse(found_files=[], downsides="None", rating="4")
+    store = AsyncMock()
+    store.find_latest.return_value = None
+    repo_contents = Result(code_contents="print(1)", file_contents=["main.py"])
+    cache_keys = {name: f"key:{name}" for name in ROUTES}
+    with patch(
+        "services.review.review_pipeline.fetch_repository_contents",
+        new_callable=AsyncMock,
+        return_value=repo_contents,
+    ), patch(
+        "services.review.review_pipeline.generate_review",
+        new_callable=AsyncMock,
+        return_value=(review, LARGE_ROUTE),
+    ), patch(
+        "services.review.review_pipeline.cache_review", new_callable=AsyncMock
+    ) as cache:
+        await generate_and_cache_review(
+            request, AsyncMock(), store, Deadline(5), "hash", cache_keys, "abc"
+        )
+
+    assert store.save.await_args.args[0].route == LARGE_ROUTE.name
+    assert cache.await_args.args[2] == "key:large"
+
+
+# Test case for cancelling a download that runs past the request deadline
+@pytest.mark.asyncio
+async def test_deadline_cancels_slow_fetch():
+    async def slow_fetch(*args, **kwargs):
+        await asyncio.sleep(3)
+
+    request = ReviewRequest(
+        assignment_description="Test assignment",
+        github_repo_url="https://github.com/test/repo",
+        candidate_level="junior",
+    )
+    redis = AsyncMock()
+    redis.mget.return_value = [None, None]
+    store = AsyncMock()
+    store.find_latest.return_value = None
+    started = time.monotonic()
+    with patch(
+        "services.review.review_pipeline.fetch_commit_sha",
+        new_callable=AsyncMock,
+        return_value="abc",
+    ), patch(
+        "services.review.review_pipeline.fetch_repository_contents",
+        side_effect=slow_fetch,
+    ):
+        with pytest.raises(DeadlineExceededError, match="generate_and_cache_review"):
+            await run_review_pipeline(request, redis, store, Deadline(0.5))
+    assert time.monotonic() - started < 1.5
@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import AsyncMock
+from httpx import AsyncClient
+from api.main import app
+from services.storage.review_store import get_review_store
+from utils.redis_cache.redis_utils import get_redis_client
+
+
+# Fixture overriding the probe dependencies with mocks
+@pytest.fixture
+def dependencies():
+    redis, store = AsyncMock(), AsyncMock()
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    app.dependency_overrides[get_review_store] = lambda: store
+    yield redis, store
+    app.dependency_overrides.clear()
+
+
+# Test case for the liveness probe
+@pytest.mark.asyncio
+async def test_liveness():
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+# Test case for the readiness probe with healthy dependencies
+@pytest.mark.asyncio
+async def test_readiness_ok(dependencies):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["checks"] == {"redis": "ok", "review_store": "ok"}
+
+
+# Test case for taking a worker out of rotation when Redis is unreachable
+@pytest.mark.asyncio
+async def test_readiness_unavailable(dependencies):
+    redis, _ = dependencies
+    redis.ping.side_effect = ConnectionError("down")
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["redis"] == "unavailable"
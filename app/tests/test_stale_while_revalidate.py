@@ -0,0 +1,131 @@
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from httpx import AsyncClient
+from services.review.review_pipeline import revalidate_review
+from api.main import app
+from models.request_models import ReviewRequest, ReviewResponse
+from models.storage_models import CachedReview
+from services.configs.config import settings
+from services.storage.review_store import get_review_store
+from utils.redis_cache.redis_utils import (
+    get_redis_client,
+    parse_cached_review,
+    serialize_cached_review,
+)
+
+PAYLOAD = {
+    "assignment_description": "Test assignment",
+    "github_repo_url": "https://github.com/test/repo",
+    "candidate_level": "junior",
+}
+REVIEW = ReviewResponse(found_files=[], downsides="None", rating="4", conclusion="OK")
+
+
+def cached_entry(age: float, commit_sha: str = "abc") -> str:
+    return serialize_cached_review(
+        CachedReview(
+            review_json=REVIEW.model_dump_json(),
+            created_at=time.time() - age,
+            commit_sha=commit_sha,
+        )
+    )
+
+
+# Fixture overriding the endpoint dependencies with mocks
+@pytest.fixture
+def redis():
+    redis = AsyncMock()
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    app.dependency_overrides[get_review_store] = lambda: AsyncMock()
+    yield redis
+    app.dependency_overrides.clear()
+
+
+# Test case for entries with ages, and the entry formats cached before them
+def test_parse_cached_review():
+    entry = parse_cached_review(cached_entry(10))
+    assert entry.commit_sha == "abc" and 9 < entry.age(time.time()) < 11
+    assert entry.review == REVIEW
+    undated = parse_cached_review(
+        serialize_cached_review(CachedReview(review_json=REVIEW.model_dump_json()))
+    )
+    assert undated.created_at is None and undated.commit_sha is None
+    envelope = parse_cached_review(
+        CachedReview(
+            review_json=REVIEW.model_dump_json(), created_at=1.0
+        ).model_dump_json()
+    )
+    assert envelope.review == REVIEW and envelope.commit_sha is None
+    legacy = parse_cached_review(REVIEW.model_dump_json())
+    assert legacy.review == REVIEW and legacy.age(time.time()) == 0
+    nested = parse_cached_review(
+        json.dumps({"review": REVIEW.model_dump(), "created_at": 1.0})
+    )
+    assert nested.review_json == REVIEW.model_dump_json()
+    assert nested.created_at == 1.0
+
+
+# Test case for a fresh hit, with its age in the headers
+@pytest.mark.asyncio
+async def test_fresh_hit_headers(redis):
+    redis.mget.return_value = [cached_entry(100), None]
+    with patch("services.review.review_pipeline.schedule_revalidation") as schedule:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/review", json=PAYLOAD)
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "HIT"
+    assert 99 <= int(response.headers["Age"]) <= 101
+    assert "hit; ttl=" in response.headers["Cache-Status"]
+    # The cached JSON is sent as is
+    assert response.content == REVIEW.model_dump_json().encode()
+    schedule.assert_not_called()
+
+
+# Test case for answering with an expired review at once and refreshing it later
+@pytest.mark.asyncio
+async def test_stale_hit_is_served_and_revalidated(redis):
+    redis.mget.return_value = [None, cached_entry(settings.REVIEW_CACHE_TTL + 60)]
+    with patch(
+        "services.review.review_pipeline.schedule_revalidation"
+    ) as schedule, patch(
+        "services.review.review_pipeline.generate_review", new_callable=AsyncMock
+    ) as generate:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/review", json=PAYLOAD)
+    assert response.status_code == 200
+    assert response.json()["rating"] == "4"
+    assert response.headers["X-Cache"] == "STALE"
+    assert "ttl=-" in response.headers["Cache-Status"]
+    assert response.headers["Warning"].startswith("110")
+    schedule.assert_called_once()
+    generate.assert_not_awaited()
+
+
+# Test case for revalidation keeping the review while the commit is unchanged
+@pytest.mark.asyncio
+async def test_revalidation_checks_commit():
+    request = ReviewRequest(**PAYLOAD)
+    entry = parse_cached_review(cached_entry(settings.REVIEW_CACHE_TTL + 60))
+    redis = AsyncMock()
+    redis.set.return_value = True
+    with patch(
+        "services.review.review_pipeline.fetch_commit_sha",
+        new_callable=AsyncMock,
+        return_value="abc",
+    ), patch(
+        "services.review.review_pipeline.cache_review", new_callable=AsyncMock
+    ) as cache, patch(
+        "services.review.review_pipeline.generate_and_cache_review",
+        new_callable=AsyncMock,
+    ) as generate:
+        await revalidate_review(request, redis, AsyncMock(), {}, "key", entry)
+        cache.assert_awaited_once()
+        generate.assert_not_awaited()
+
+        entry.commit_sha = "old"
+        await revalidate_review(request, redis, AsyncMock(), {}, "key", entry)
+        generate.assert_awaited_once()
+        assert generate.await_args.args[-1] == "abc"
+    redis.eval.assert_awaited()  # the lock was released
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import pytest
+from services.llm import provider_registry
+from utils.redis_cache import redis_utils
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CHECK = """
+import os, sys
+import api.main
+assert "openai" not in sys.modules, "openai SDK imported eagerly"
+assert not os.path.exists("app.log"), "log file opened on import"
+from services.llm import provider_registry
+from utils.redis_cache import redis_utils
+from services.storage import review_store
+from utils.executor import executor_utils
+assert provider_registry._providers is None
+assert redis_utils._redis_client is None
+assert review_store._review_store is None
+assert executor_utils._process_pool is None
+"""
+
+
+# Test case for importing the application without creating clients or opening files
+def test_import_has_no_side_effects(tmp_path):
+    env = {**os.environ, "PYTHONPATH": APP_DIR}
+    env.pop("OPENAI_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+# Test case for building providers on first use only
+def test_providers_built_lazily(monkeypatch):
+    monkeypatch.setattr(provider_registry.settings, "LLM_PROVIDERS", "stub")
+    provider_registry.reset_providers()
+    try:
+        provider = provider_registry.select_provider()
+        assert provider.name == "stub"
+        assert provider_registry.get_providers() == [provider]
+    finally:
+        provider_registry.reset_providers()
+
+
+# Test case for sharing one Redis client between requests
+@pytest.mark.asyncio
+async def test_redis_client_shared():
+    first = await redis_utils.get_redis_client()
+    try:
+        assert await redis_utils.get_redis_client() is first
+    finally:
+        await redis_utils.close_redis_client()
+    assert redis_utils._redis_client is None
@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from httpx import AsyncClient
+from api.main import app
+from exceptions.excpetions import OverloadedError, QuotaExceededError
+from models.request_models import ReviewResponse
+from services.storage.review_store import get_review_store
+from starlette.requests import Request
+from utils.admission.admission_utils import (
+    AdmissionController,
+    check_client_quota,
+    client_identity,
+)
+from utils.redis_cache.redis_utils import get_redis_client
+
+ADMISSION = "utils.admission.admission_utils"
+PAYLOAD = {
+    "assignment_description": "Test assignment",
+    "github_repo_url": "https://github.com/test/repo",
+    "candidate_level": "junior",
+}
+
+
+# Test case for queueing up to the limit and shedding beyond it
+@pytest.mark.asyncio
+async def test_admission_queue_is_bounded():
+    controller = AdmissionController(max_in_flight=1, max_queued=1, queue_timeout=5)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    running = asyncio.create_task(hold())
+    queued = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert (controller.in_flight, controller.queued) == (1, 1)
+
+    with pytest.raises(OverloadedError) as error:
+        async with controller.slot():
+            pass
+    assert error.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert controller.metrics()["admitted"] == 2
+    assert controller.metrics()["rejected"] == 1
+
+
+# Test case for shedding a request that waited too long for a slot
+@pytest.mark.asyncio
+async def test_admission_queue_timeout():
+    controller = AdmissionController(max_in_flight=1, max_queued=4, queue_timeout=0.01)
+    async with controller.slot():
+        with pytest.raises(OverloadedError):
+            async with controller.slot():
+                pass
+    assert controller.queued == 0
+
+
+# Test case for per-client quotas, and letting requests through when Redis is down
+@pytest.mark.asyncio
+async def test_client_quota():
+    with patch(f"{ADMISSION}.settings.CLIENT_QUOTA", 2), patch(
+        f"{ADMISSION}.consume_rate_budget", new_callable=AsyncMock, return_value=1.5
+    ):
+        with pytest.raises(QuotaExceededError) as error:
+            await check_client_quota(AsyncMock(), "team-a")
+    assert error.value.retry_after == 2
+
+    with patch(f"{ADMISSION}.settings.CLIENT_QUOTA", 2), patch(
+        f"{ADMISSION}.consume_rate_budget",
+        new_callable=AsyncMock,
+        side_effect=ConnectionError("down"),
+    ):
+        await check_client_quota(AsyncMock(), "team-a")
+
+
+def make_request(headers: dict, peer: str = "10.0.0.5") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "client": (peer, 1234),
+        }
+    )
+
+
+# Test case for identifying clients by API key, never by the client id header
+def test_client_identity_from_api_key():
+    with patch(f"{ADMISSION}.settings.API_KEYS", "key-a:team-a,key-b:team-b"):
+        assert client_identity(make_request({"X-API-Key": "key-b"})) == "team-b"
+        assert client_identity(make_request({"X-API-Key": "guess"})) is None
+        assert client_identity(make_request({"X-Client-ID": "team-a"})) is None
+
+
+# Test case for identifying clients by address, behind trusted proxies only
+def test_client_identity_from_address():
+    spoofed = {"X-Client-ID": "team-a", "X-Forwarded-For": "1.2.3.4"}
+    assert client_identity(make_request(spoofed)) == "10.0.0.5"
+
+    with patch(f"{ADMISSION}.settings.TRUSTED_PROXIES", "10.0.0.5"):
+        forwarded = {"X-Forwarded-For": "1.2.3.4, 5.6.7.8"}
+        assert client_identity(make_request(forwarded)) == "5.6.7.8"
+        assert client_identity(make_request({})) == "10.0.0.5"
+
+
+# Test case for rejecting requests without a known API key
+@pytest.mark.asyncio
+async def test_endpoint_requires_api_key():
+    with patch(f"{ADMISSION}.settings.API_KEYS", "key-a:team-a"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/api/review", json=PAYLOAD, headers={"X-Client-ID": "team-a"}
+            )
+    assert response.status_code == 401
+
+
+# Test case for rejecting with Retry-After while still serving cached reviews
+@pytest.mark.asyncio
+async def test_endpoint_sheds_misses_but_serves_hits():
+    review = ReviewResponse(
+        found_files=[], downsides="None", rating="4", conclusion="Good"
+    )
+    redis = AsyncMock()
+    store = AsyncMock()
+    store.find_latest.return_value = None
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    app.dependency_overrides[get_review_store] = lambda: store
+    try:
+        with patch(
+            "services.review.review_pipeline.check_client_quota",
+            new_callable=AsyncMock,
+            side_effect=QuotaExceededError("team-a", 30),
+        ), patch(
+            "services.review.review_pipeline.fetch_commit_sha",
+            new_callable=AsyncMock,
+            return_value="abc",
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                redis.mget.return_value = [None, None]
+                response = await client.post("/api/review", json=PAYLOAD)
+                assert response.status_code == 429
+                assert response.headers["Retry-After"] == "30"
+
+                redis.mget.return_value = [review.model_dump_json(), None]
+                response = await client.post("/api/review", json=PAYLOAD)
+                assert response.status_code == 200
+    finally:
+        app.dependency_overrides.clear()
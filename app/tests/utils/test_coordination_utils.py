@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from exceptions.excpetions import DeadlineExceededError
+from models.request_models import ReviewRequest, ReviewResponse
+from utils.coordination.coordination_utils import (
+    acquire_lock,
+    consume_rate_budget,
+    spend_rate_budget,
+)
+from utils.deadline.deadline_utils import Deadline
+
+COORDINATION = "utils.coordination.coordination_utils"
+
+
+# Test case for taking a lock only when nobody holds it
+@pytest.mark.asyncio
+async def test_acquire_lock():
+    redis = AsyncMock()
+    redis.set.return_value = True
+    token = await acquire_lock(redis, "review:x", ttl=2)
+    assert token
+    redis.set.assert_awaited_once_with("lock:review:x", token, nx=True, px=2000)
+
+    redis.set.return_value = None
+    assert await acquire_lock(redis, "review:x", ttl=2) is None
+
+
+# Test case for spending a unit and reporting the wait once the window is used up
+@pytest.mark.asyncio
+async def test_consume_rate_budget():
+    redis = AsyncMock()
+    redis.eval.return_value = [1, 60000]
+    assert await consume_rate_budget(redis, "llm", limit=1, window=60) == 0.0
+    assert redis.eval.await_args.args[2:] == ("rate:llm", 60000)
+
+    redis.eval.return_value = [2, 1500]
+    assert await consume_rate_budget(redis, "llm", limit=1, window=60) == 1.5
+
+
+# Test case for an unlimited budget never touching Redis
+@pytest.mark.asyncio
+async def test_unlimited_rate_budget():
+    with patch(f"{COORDINATION}.get_redis_client", new_callable=AsyncMock) as client:
+        await spend_rate_budget("llm", limit=0, window=60)
+    client.assert_not_awaited()
+
+
+# Test case for waiting until the shared window resets
+@pytest.mark.asyncio
+async def test_rate_budget_waits_for_window():
+    with patch(f"{COORDINATION}.get_redis_client", new_callable=AsyncMock), patch(
+        f"{COORDINATION}.consume_rate_budget",
+        new_callable=AsyncMock,
+        side_effect=[0.01, 0.0],
+    ) as consume:
+        await spend_rate_budget("llm", limit=1, window=60)
+    assert consume.await_count == 2
+
+
+# Test case for failing fast when the wait outlasts the deadline
+@pytest.mark.asyncio
+async def test_rate_budget_respects_deadline():
+    with patch(f"{COORDINATION}.get_redis_client", new_callable=AsyncMock), patch(
+        f"{COORDINATION}.consume_rate_budget", new_callable=AsyncMock, return_value=30
+    ):
+        with pytest.raises(DeadlineExceededError):
+            await spend_rate_budget("llm", limit=1, window=60, deadline=Deadline(1))
+
+
+# Test case for letting calls through when Redis is down
+@pytest.mark.asyncio
+async def test_rate_budget_fails_open():
+    with patch(f"{COORDINATION}.get_redis_client", new_callable=AsyncMock), patch(
+        f"{COORDINATION}.consume_rate_budget",
+        new_callable=AsyncMock,
+        side_effect=ConnectionError("down"),
+    ):
+        await spend_rate_budget("llm", limit=1, window=60)
+
+
+# Test case for waiting on another worker's review instead of generating it again
+@pytest.mark.asyncio
+async def test_pipeline_waits_for_review_in_progress():
+    from services.review.review_pipeline import run_review_pipeline
+
+    review = ReviewResponse(
+        found_files=[], downsides="None", rating="4", conclusion="Good"
+    )
+    redis = AsyncMock()
+    redis.mget.side_effect = [[None, None], [review.model_dump_json(), None]]
+    redis.set.return_value = None  # the lock is held by another worker
+    redis.exists.return_value = 0
+    request = ReviewRequest(
+        assignment_description="Test assignment",
+        github_repo_url="https://github.com/test/repo",
+        candidate_level="junior",
+    )
+    with patch(
+        "services.review.review_pipeline.generate_review", new_callable=AsyncMock
+    ) as generate, patch(
+        "services.review.review_pipeline.check_client_quota", new_callable=AsyncMock
+    ) as quota:
+        result = await run_review_pipeline(
+            request, redis, AsyncMock(), Deadline(5), client_id="team-a"
+        )
+
+    assert result == review
+    generate.assert_not_awaited()
+    quota.assert_not_awaited()  # Waiters served another worker's review are free
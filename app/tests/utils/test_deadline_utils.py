@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from exceptions.excpetions import ClientDisconnectedError, DeadlineExceededError
+from utils.deadline.deadline_utils import (
+    Deadline,
+    enforce_deadline,
+    run_until_disconnected,
+)
+
+
+class FakeRequest:
+    """Minimal stand-in for a Starlette request that disconnects on demand."""
+
+    def __init__(self, disconnected: bool):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+# Test case for reading the deadline from request headers
+def test_deadline_from_headers():
+    assert Deadline.from_headers({"X-Request-Timeout": "5"}).remaining() <= 5
+    absolute = {"X-Request-Deadline": str(time.time() - 1)}
+    assert Deadline.from_headers(absolute).expired
+    assert Deadline.from_headers({"X-Request-Timeout": "soon"}).remaining() > 5
+
+
+# Test case for cancelling work that runs past the deadline
+@pytest.mark.asyncio
+async def test_enforce_deadline_cancels_slow_work():
+    with pytest.raises(DeadlineExceededError, match="analyze_code"):
+        async with enforce_deadline(Deadline(0.01), "analyze_code"):
+            await asyncio.sleep(1)
+
+
+# Test case for cancelling the pipeline when the client disconnects
+@pytest.mark.asyncio
+async def test_run_until_disconnected_cancels_work():
+    cancelled = asyncio.Event()
+
+    async def slow_work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnectedError):
+        await run_until_disconnected(slow_work(), FakeRequest(disconnected=True))
+    assert cancelled.is_set()
+
+
+# Test case for returning the result while the client stays connected
+@pytest.mark.asyncio
+async def test_run_until_disconnected_returns_result():
+    async def work():
+        return "review"
+
+    assert await run_until_disconnected(work(), FakeRequest(False)) == "review"
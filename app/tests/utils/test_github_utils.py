@@ -0,0 +1,36 @@
+import pytest
+from pydantic import HttpUrl
+from models.request_models import ReviewRequest
+from services.review.review_pipeline import review_lock_name
+from utils.github.github_utils import normalize_repo_url, owner_and_repo
+
+
+# Test case for mapping every spelling of a repository URL to one form
+@pytest.mark.parametrize(
+    "repo_url",
+    [
+        "https://github.com/owner/repo",
+        "https://github.com/owner/repo/",
+        "https://github.com/owner/repo.git",
+        " https://www.GitHub.com/Owner/Repo.git/ ",
+        HttpUrl("https://github.com/owner/repo/"),
+    ],
+)
+def test_normalize_repo_url(repo_url):
+    assert normalize_repo_url(repo_url) == "https://github.com/owner/repo"
+    assert owner_and_repo(repo_url) == ("owner", "repo")
+
+
+# Test case for interactive requests and webhook URLs sharing one lock
+def test_review_lock_uses_normalized_url():
+    def lock_name(repo_url: str) -> str:
+        request = ReviewRequest(
+            assignment_description="Test assignment",
+            github_repo_url=repo_url,
+            candidate_level="junior",
+        )
+        return review_lock_name(request, "hash")
+
+    assert lock_name("https://github.com/Owner/Repo.git") == lock_name(
+        normalize_repo_url("https://github.com/owner/repo/")
+    )
@@ -0,0 +1,37 @@
+import threading
+import time
+from utils.profiling.profiling_utils import SamplingProfiler
+
+
+def busy_function(started: threading.Event, stop: threading.Event):
+    started.set()
+    while not stop.is_set():
+        sum(range(1000))
+
+
+# Test case for sampling the stacks of a busy thread
+def test_profiler_samples_thread():
+    started, stop = threading.Event(), threading.Event()
+    worker = threading.Thread(target=busy_function, args=(started, stop))
+    worker.start()
+    started.wait()
+    profiler = SamplingProfiler(0.001, (worker.ident,))
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert profiler.samples
+    assert all(
+        any("busy_function" in frame for frame in stack) for stack in profiler.samples
+    )
+
+
+# Test case for rendering samples as folded stacks, most sampled first
+def test_folded_format():
+    profiler = SamplingProfiler()
+    profiler.samples[("main (a.py:1)", "handler (b.py:5)")] += 3
+    profiler.samples[("main (a.py:1)",)] += 1
+
+    assert profiler.folded() == "main (a.py:1);handler (b.py:5) 3\nmain (a.py:1) 1\n"
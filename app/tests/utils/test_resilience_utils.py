@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from httpx import AsyncClient
+from api.main import app
+from exceptions.excpetions import CircuitOpenError, OpenAIError
+from models.request_models import ReviewResponse
+from models.storage_models import ReviewRecord
+from services.llm.provider_registry import provider_breaker, select_provider
+from services.llm.providers import LocalStubProvider
+from services.storage.review_store import get_review_store
+from utils.redis_cache.redis_utils import get_redis_client
+from utils.resilience.resilience_utils import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    hedged,
+)
+
+PAYLOAD = {
+    "assignment_description": "Test assignment",
+    "github_repo_url": "https://github.com/test/repo",
+    "candidate_level": "junior",
+}
+
+
+async def fail(breaker: CircuitBreaker, error: Exception):
+    with pytest.raises(type(error)):
+        async with breaker.guard():
+            raise error
+
+
+# Test case for opening after consecutive failures, then closing after a trial call
+@pytest.mark.asyncio
+async def test_circuit_breaker_cycle():
+    breaker = CircuitBreaker("github", failure_threshold=2, reset_timeout=0.05)
+    await fail(breaker, ConnectionError("down"))
+    assert breaker.state == CLOSED
+    await fail(breaker, ConnectionError("down"))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        async with breaker.guard():
+            pass
+    assert breaker.metrics()["rejected"] == 1
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    async with breaker.guard():
+        pass
+    assert breaker.state == CLOSED
+
+
+# Test case for a failed trial call reopening the breaker
+@pytest.mark.asyncio
+async def test_half_open_failure_reopens():
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=0.01)
+    await fail(breaker, ConnectionError("down"))
+    await asyncio.sleep(0.02)
+    await fail(breaker, ConnectionError("still down"))
+    assert breaker.state == OPEN
+    assert breaker.metrics()["opened"] == 2
+
+
+# Test case for client errors not counting against the dependency
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_breaker():
+    breaker = CircuitBreaker("github", failure_threshold=1, reset_timeout=30)
+    try:
+        raise HTTPException(status_code=404, detail="Repository not found.")
+    except HTTPException as e:
+        wrapped = RuntimeError("Error occurred while fetching repository contents.")
+        wrapped.__cause__ = e
+    await fail(breaker, wrapped)
+    assert breaker.state == CLOSED
+
+
+# Test case for failing over to another provider while one is down
+@pytest.mark.asyncio
+async def test_select_provider_skips_open_breakers():
+    first = LocalStubProvider(concurrency=1, timeout=1)
+    second = LocalStubProvider(concurrency=10, timeout=1)
+    first.name, second.name = "failover-a", "failover-b"
+    with patch(
+        "services.llm.provider_registry.get_providers", return_value=[first, second]
+    ):
+        for _ in range(5):
+            await fail(provider_breaker(first), OpenAIError("timed out"))
+        assert select_provider() is second
+
+        for _ in range(5):
+            await fail(provider_breaker(second), OpenAIError("timed out"))
+        with pytest.raises(CircuitOpenError):
+            select_provider()
+
+
+# Test case for hedging a slow call, and not hedging a fast one
+@pytest.mark.asyncio
+async def test_hedged_request():
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert await asyncio.wait_for(hedged(call, delay=0.01), timeout=0.5) == 0.0
+    assert await hedged(AsyncMock(return_value="fast"), delay=1) == "fast"
+
+
+# Test case for serving a stored review of an older commit while GitHub is down
+@pytest.mark.asyncio
+async def test_endpoint_serves_stale_review_while_open():
+    review = ReviewResponse(
+        found_files=[], downsides="None", rating="4", conclusion="Good"
+    )
+    redis, store = AsyncMock(), AsyncMock()
+    redis.mget.return_value = [None, None]
+    redis.set.return_value = True
+    store.find_latest.return_value = ReviewRecord(
+        repo_url=PAYLOAD["github_repo_url"],
+        commit_sha="old",
+        candidate_level="junior",
+        assignment_hash="hash",
+        route="fast",
+        review=review,
+        created_at=0,
+    )
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    app.dependency_overrides[get_review_store] = lambda: store
+    try:
+        with patch(
+            "services.review.review_pipeline.fetch_commit_sha",
+            new_callable=AsyncMock,
+            side_effect=CircuitOpenError("github", 12),
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.post("/api/review", json=PAYLOAD)
+                assert response.status_code == 200
+                assert response.headers["Warning"].startswith("110")
+
+                store.find_latest.return_value = None
+                response = await client.post("/api/review", json=PAYLOAD)
+                assert response.status_code == 503
+                assert response.headers["Retry-After"] == "12"
+    finally:
+        app.dependency_overrides.clear()
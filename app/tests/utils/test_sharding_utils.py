@@ -0,0 +1,157 @@
+import os
+import pytest
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+from models.request_models import ReviewResponse
+from services.review.review_pipeline import read_cached_review
+from utils.redis_cache.redis_utils import (
+    build_redis_client,
+    cache_review,
+    invalidate_reviews,
+    review_cache_key,
+    review_index_key,
+    snapshot_key,
+)
+from utils.sharding.sharding_utils import (
+    DEFAULT_POOL,
+    HashRing,
+    ShardedRedis,
+    hash_tag,
+    parse_namespace_urls,
+)
+
+NODES = ["redis://node-a:6379", "redis://node-b:6379", "redis://node-c:6379"]
+REPO_URL = "https://github.com/owner/repo"
+
+
+def mock_node(values: dict):
+    """Client of one node, answering MGET from a dict and recording pipelines."""
+    client = MagicMock()
+    client.mget = AsyncMock(side_effect=lambda keys: [values.get(key) for key in keys])
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=["OK"])
+    client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    client.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return client, pipe
+
+
+def sharded(values: dict, pools: dict = None) -> ShardedRedis:
+    pools = pools or {DEFAULT_POOL: NODES}
+    urls = {url for pool in pools.values() for url in pool}
+    return ShardedRedis({url: mock_node(values)[0] for url in urls}, pools)
+
+
+# Test case for keys of one repository sharing a shard, as with Redis Cluster
+def test_keys_are_normalized_hashed_and_tagged():
+    keys = [
+        review_cache_key(url, "junior", "hash", "fast", "review-v2")
+        for url in (REPO_URL, "https://github.com/Owner/repo.git", REPO_URL + "/")
+    ]
+    assert len(set(keys)) == 1
+    assert "github.com" not in keys[0]
+    tag = hash_tag(keys[0])
+    assert hash_tag(review_index_key(REPO_URL)) == tag
+    assert hash_tag(snapshot_key(REPO_URL)) == tag
+    assert snapshot_key(REPO_URL).startswith("snapshot:")
+
+
+# Test case for spreading keys evenly and moving few of them when a node is added
+def test_hash_ring_balance_and_stability():
+    keys = [f"review:{{repo-{index}}}:junior" for index in range(6000)]
+    ring = HashRing(NODES)
+    owners = {key: ring.node_for(hash_tag(key)) for key in keys}
+    for count in Counter(owners.values()).values():
+        assert 1500 < count < 2500
+
+    grown = HashRing(NODES + ["redis://node-d:6379"])
+    moved = [key for key in keys if grown.node_for(hash_tag(key)) != owners[key]]
+    assert all(grown.node_for(hash_tag(key)) == "redis://node-d:6379" for key in moved)
+    assert len(moved) < len(keys) / 3
+
+
+# Test case for routing namespaces with a pool of their own to its nodes only
+def test_namespace_pools():
+    pools = {
+        DEFAULT_POOL: NODES,
+        **parse_namespace_urls("snapshot=redis://lru-a:6379, redis://lru-b:6379"),
+    }
+    redis = sharded({}, pools)
+    snapshot_nodes = {redis.node_for(f"snapshot:{{repo-{i}}}") for i in range(100)}
+    review_nodes = {redis.node_for(f"review:{{repo-{i}}}") for i in range(100)}
+    assert snapshot_nodes == {"redis://lru-a:6379", "redis://lru-b:6379"}
+    assert review_nodes == set(NODES)
+
+
+# Test case for fanning MGET out to every node and keeping the key order
+@pytest.mark.asyncio
+async def test_mget_fans_out():
+    keys = [f"file-index:{{sha-{index}}}:Python" for index in range(30)]
+    values = {key: f"value-{index}" for index, key in enumerate(keys) if index % 2}
+    redis = sharded(values)
+
+    assert await redis.mget(keys) == [values.get(key) for key in keys]
+    assert sum(client.mget.await_count for client in redis.clients.values()) == 3
+
+
+# Test case for running transactions on one node and rejecting cross-node ones
+@pytest.mark.asyncio
+async def test_pipeline_routing():
+    redis = sharded({})
+    review = ReviewResponse(rating="4")
+    await cache_review(
+        redis, REPO_URL, review_cache_key(REPO_URL, "junior", "h", "fast", "v"), review
+    )
+    used = [client for client in redis.clients.values() if client.pipeline.called]
+    assert len(used) == 1
+    pipe = used[0].pipeline.return_value.__aenter__.return_value
+    assert pipe.set.called and pipe.sadd.called and pipe.expire.called
+
+    keys = [f"usage:{{day-{index}}}:total:all" for index in range(10)]
+    async with redis.pipeline(transaction=True) as pipe:
+        for key in keys:
+            pipe.hincrby(key, "reviews", 1)
+        with pytest.raises(ValueError):
+            await pipe.execute()
+
+
+# Test case for building a sharded client when several nodes are configured
+def test_build_redis_client():
+    settings = "utils.redis_cache.redis_utils.settings"
+    with patch(f"{settings}.REDIS_URLS", ",".join(NODES)), patch(
+        f"{settings}.REDIS_NAMESPACE_URLS", "lock=redis://locks:6379"
+    ):
+        client = build_redis_client()
+    assert isinstance(client, ShardedRedis)
+    assert set(client.clients) == set(NODES) | {"redis://locks:6379"}
+
+    with patch(f"{settings}.REDIS_URLS", ""), patch(
+        f"{settings}.REDIS_NAMESPACE_URLS", ""
+    ):
+        assert not isinstance(build_redis_client(), ShardedRedis)
+
+
+# Test case for caching, reading and invalidating reviews on real local nodes,
+# e.g. REDIS_TEST_URLS=redis://localhost:6380,redis://localhost:6381
+@pytest.mark.skipif(
+    not os.getenv("REDIS_TEST_URLS"), reason="REDIS_TEST_URLS is not set"
+)
+@pytest.mark.asyncio
+async def test_sharded_round_trip():
+    urls = os.environ["REDIS_TEST_URLS"].split(",")
+    redis = ShardedRedis.from_urls(urls, decode_responses=True)
+    review = ReviewResponse(rating="4", conclusion="Good")
+    repos = [f"https://github.com/sharding-test/repo-{index}" for index in range(20)]
+    try:
+        for repo_url in repos:
+            keys = {
+                route: review_cache_key(repo_url, "junior", "h", route, "v")
+                for route in ("fast", "large")
+            }
+            await cache_review(redis, repo_url, keys["large"], review, "sha")
+            cached = await read_cached_review(redis, keys)
+            assert cached[0] == keys["large"] and cached[1].review == review
+        assert len({redis.node_for(snapshot_key(url)) for url in repos}) > 1
+    finally:
+        for repo_url in repos:
+            await invalidate_reviews(redis, repo_url)
+        await redis.aclose()
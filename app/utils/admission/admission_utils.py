@@ -0,0 +1,246 @@
+import asyncio
+import hmac
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+from redis.asyncio import Redis
+from starlette.requests import Request
+from exceptions.excpetions import OverloadedError, QuotaExceededError
+from services.configs.config import settings
+from utils.coordination.coordination_utils import consume_rate_budget
+from utils.deadline.deadline_utils import Deadline
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Weight of the newest sample in the moving average of the review service time
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionController:
+    """
+    Bounds the reviews a worker generates at once.
+
+    Up to max_in_flight reviews run concurrently and up to max_queued wait for a
+    slot, in arrival order. Anything beyond that is rejected at once instead of
+    slowing down the requests already admitted.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, queue_timeout: float):
+        """
+        Initializes the controller.
+
+        Args:
+            max_in_flight (int): Reviews generated concurrently (0 = unlimited).
+            max_queued (int): Requests allowed to wait for a slot.
+            queue_timeout (float): Longest wait for a slot, in seconds.
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.service_time = 0.0
+        self._semaphore = asyncio.Semaphore(max_in_flight or 1)
+
+    def retry_after(self) -> int:
+        """Estimates in whole seconds when the queue will have drained."""
+        slots = max(self.max_in_flight, 1)
+        return max(math.ceil(self.service_time * (self.queued + 1) / slots), 1)
+
+    def reject(self, reason: str) -> OverloadedError:
+        self.rejected += 1
+        retry_after = self.retry_after()
+        logger.warning(f"Shedding review request ({reason}), retry in {retry_after}s.")
+        return OverloadedError(retry_after)
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[Deadline] = None):
+        """
+        Holds an in-flight slot for the enclosed work, waiting for one if needed.
+
+        Args:
+            deadline (Optional[Deadline]): Request deadline; caps the wait.
+
+        Raises:
+            OverloadedError: If the queue is full, or no slot frees up in time.
+        """
+        if not self.max_in_flight:
+            yield
+            return
+        if self._semaphore.locked():
+            if self.queued >= self.max_queued:
+                raise self.reject("queue full")
+            timeout = self.queue_timeout
+            if deadline:
+                timeout = min(timeout, deadline.remaining())
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise self.reject("queue timeout")
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            elapsed = time.monotonic() - started
+            self.service_time += SERVICE_TIME_SMOOTHING * (elapsed - self.service_time)
+
+    def metrics(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_time": round(self.service_time, 3),
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Returns this worker's admission controller, creating it on first use.
+
+    Returns:
+        AdmissionController: Controller configured from the ADMISSION_* settings.
+    """
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(
+            settings.ADMISSION_MAX_IN_FLIGHT,
+            settings.ADMISSION_MAX_QUEUED,
+            settings.ADMISSION_QUEUE_TIMEOUT,
+        )
+    return _admission_controller
+
+
+def _reset_admission_controller():
+    global _admission_controller
+    _admission_controller = None
+
+
+# Limits are per worker; a forked child starts with empty counters
+os.register_at_fork(after_in_child=_reset_admission_controller)
+
+
+@lru_cache(maxsize=4)
+def parse_api_keys(value: str) -> Dict[str, str]:
+    """
+    Parses the API_KEYS setting.
+
+    Args:
+        value (str): Comma-separated "key:tenant" pairs.
+
+    Returns:
+        Dict[str, str]: Tenant by API key.
+    """
+    keys = {}
+    for pair in value.split(","):
+        key, _, tenant = pair.strip().partition(":")
+        if key and tenant:
+            keys[key] = tenant
+    return keys
+
+
+def authenticated_tenant(request: Request) -> Optional[str]:
+    """
+    Finds the tenant whose API key a request carries.
+
+    Args:
+        request (Request): The raw HTTP request.
+
+    Returns:
+        Optional[str]: The tenant, or None if the key is missing or unknown.
+    """
+    api_key = request.headers.get(settings.API_KEY_HEADER)
+    if not api_key:
+        return None
+    tenant = None
+    # Every key is compared, in constant time, so timing reveals nothing about them
+    for key, key_tenant in parse_api_keys(settings.API_KEYS).items():
+        if hmac.compare_digest(key.encode(), api_key.encode()):
+            tenant = key_tenant
+    return tenant
+
+
+def peer_address(request: Request) -> str:
+    """
+    Finds the address a request came from, behind any trusted proxies.
+
+    Args:
+        request (Request): The raw HTTP request.
+
+    Returns:
+        str: The nearest address in X-Forwarded-For that is not a trusted proxy
+        if the peer is one, otherwise the peer's address.
+    """
+    address = request.client.host if request.client else "unknown"
+    trusted = {proxy.strip() for proxy in settings.TRUSTED_PROXIES.split(",")}
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    while address in trusted and hops:
+        address = hops.pop()
+    return address
+
+
+def client_identity(request: Request) -> Optional[str]:
+    """
+    Identifies the client a request is billed to, from what the server can verify.
+
+    Args:
+        request (Request): The raw HTTP request.
+
+    Returns:
+        Optional[str]: The tenant of the request's API key if API_KEYS is set,
+        None if it carries no known key; otherwise the client's address.
+    """
+    if settings.API_KEYS:
+        return authenticated_tenant(request)
+    return peer_address(request)
+
+
+async def check_client_quota(redis: Redis, client_id: str):
+    """
+    Spends one review from a client's quota, shared by all workers through Redis.
+
+    A quota of 0 is unlimited. If Redis is unavailable the request is let through.
+
+    Args:
+        redis (Redis): Redis client.
+        client_id (str): Client identity from client_identity.
+
+    Raises:
+        QuotaExceededError: If the client has no reviews left in the current window.
+    """
+    if settings.CLIENT_QUOTA <= 0:
+        return
+    try:
+        wait = await consume_rate_budget(
+            redis,
+            f"client:{client_id}",
+            settings.CLIENT_QUOTA,
+            settings.CLIENT_QUOTA_WINDOW,
+        )
+    except Exception as e:
+        logger.warning(f"Client quotas unavailable, not enforcing: {e}")
+        return
+    if wait:
+        raise QuotaExceededError(client_id, math.ceil(wait))
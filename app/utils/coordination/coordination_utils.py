@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import secrets
+from typing import Optional
+from redis.asyncio import Redis
+from exceptions.excpetions import DeadlineExceededError
+from utils.deadline.deadline_utils import Deadline
+from utils.redis_cache.redis_utils import get_redis_client
+
+logger = logging.getLogger("CodeReviewAI")
+
+# Deletes the lock only if it still holds our token, so a worker whose lock expired
+# never releases a lock another worker acquired since
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Spends one unit of a fixed-window budget, starting the window with the first unit.
+# A key left without an expiry is given one, so a budget can never lock up for good.
+# Returns the units used in the window and the milliseconds until it resets.
+CONSUME_RATE_BUDGET_SCRIPT = """
+local used = redis.call("incr", KEYS[1])
+local ttl = redis.call("pttl", KEYS[1])
+if used == 1 or ttl < 0 then
+    redis.call("pexpire", KEYS[1], ARGV[1])
+    ttl = tonumber(ARGV[1])
+end
+return {used, ttl}
+"""
+
+
+def lock_key(name: str) -> str:
+    return f"lock:{name}"
+
+
+def rate_budget_key(name: str) -> str:
+    return f"rate:{name}"
+
+
+async def acquire_lock(redis: Redis, name: str, ttl: float) -> Optional[str]:
+    """
+    Tries to take a lock shared by every worker on every node.
+
+    Args:
+        redis (Redis): Redis client.
+        name (str): Name of the lock.
+        ttl (float): Seconds after which the lock expires, in case its holder dies.
+
+    Returns:
+        Optional[str]: A token to release the lock with, or None if it is held.
+    """
+    token = secrets.token_hex(16)
+    acquired = await redis.set(lock_key(name), token, nx=True, px=int(ttl * 1000))
+    return token if acquired else None
+
+
+async def release_lock(redis: Redis, name: str, token: str) -> bool:
+    """
+    Releases a lock taken with acquire_lock.
+
+    Args:
+        redis (Redis): Redis client.
+        name (str): Name of the lock.
+        token (str): Token returned by acquire_lock.
+
+    Returns:
+        bool: False if the lock had already expired or been taken over.
+    """
+    return bool(await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key(name), token))
+
+
+async def wait_for_release(
+    redis: Redis, name: str, poll_interval: float, deadline: Optional[Deadline] = None
+):
+    """
+    Waits until a lock held by another worker is released or expires.
+
+    Args:
+        redis (Redis): Redis client.
+        name (str): Name of the lock.
+        poll_interval (float): Seconds between checks.
+        deadline (Optional[Deadline]): Request deadline.
+
+    Raises:
+        DeadlineExceededError: If the deadline passes first.
+    """
+    while await redis.exists(lock_key(name)):
+        if deadline:
+            deadline.check(f"waiting for {name}")
+            await asyncio.sleep(min(poll_interval, deadline.remaining()))
+        else:
+            await asyncio.sleep(poll_interval)
+
+
+async def consume_rate_budget(
+    redis: Redis, name: str, limit: int, window: float
+) -> float:
+    """
+    Spends one unit of a fixed-window rate budget shared by all workers.
+
+    Args:
+        redis (Redis): Redis client.
+        name (str): Name of the budget.
+        limit (int): Units available per window.
+        window (float): Window length in seconds.
+
+    Returns:
+        float: 0 if the unit was granted, otherwise seconds until the window resets.
+    """
+    used, ttl_ms = await redis.eval(
+        CONSUME_RATE_BUDGET_SCRIPT, 1, rate_budget_key(name), int(window * 1000)
+    )
+    if used <= limit:
+        return 0.0
+    return max(ttl_ms, 1) / 1000
+
+
+async def spend_rate_budget(
+    name: str, limit: int, window: float, deadline: Optional[Deadline] = None
+):
+    """
+    Waits until a shared rate budget grants one unit.
+
+    A budget with a limit of 0 is unlimited. If Redis is unavailable the call is
+    let through, since the upstream API still enforces its own limit.
+
+    Args:
+        name (str): Name of the budget, e.g. "llm" or "github".
+        limit (int): Units available per window.
+        window (float): Window length in seconds.
+        deadline (Optional[Deadline]): Request deadline.
+
+    Raises:
+        DeadlineExceededError: If the budget cannot be granted before the deadline.
+    """
+    if limit <= 0:
+        return
+    redis = await get_redis_client()
+    while True:
+        try:
+            wait = await consume_rate_budget(redis, name, limit, window)
+        except Exception as e:
+            logger.warning(f"Rate budget {name} unavailable, not throttling: {e}")
+            return
+        if not wait:
+            return
+        if deadline and wait >= deadline.remaining():
+            raise DeadlineExceededError(f"{name} rate budget")
+        logger.info(f"Rate budget {name} exhausted, waiting {wait:.2f} seconds.")
+        await asyncio.sleep(wait)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Mapping, Optional, TypeVar
+from starlette.requests import Request
+from exceptions.excpetions import ClientDisconnectedError, DeadlineExceededError
+from services.configs.config import settings
+
+T = TypeVar("T")
+
+# Relative timeout in seconds, e.g. set by a gateway from its own remaining budget
+TIMEOUT_HEADER = "X-Request-Timeout"
+# Absolute deadline as a Unix timestamp in seconds
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+class Deadline:
+    """
+    A point in time by which a request must complete.
+    """
+
+    def __init__(self, timeout: float):
+        """
+        Initializes the deadline.
+
+        Args:
+            timeout (float): Seconds from now until the deadline.
+        """
+        self.expires_at = time.monotonic() + timeout
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "Deadline":
+        """
+        Builds a deadline from request headers, falling back to REQUEST_TIMEOUT.
+
+        The tightest of the configured timeout and any header values wins.
+
+        Args:
+            headers (Mapping[str, str]): The request headers.
+
+        Returns:
+            Deadline: The request deadline.
+        """
+        timeout = settings.REQUEST_TIMEOUT
+        try:
+            if TIMEOUT_HEADER in headers:
+                timeout = min(timeout, float(headers[TIMEOUT_HEADER]))
+            if DEADLINE_HEADER in headers:
+                timeout = min(timeout, float(headers[DEADLINE_HEADER]) - time.time())
+        except ValueError:
+            pass  # Ignore malformed headers and keep the configured timeout
+        return cls(max(timeout, 0.0))
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline, never negative."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        """
+        Fails fast if the deadline has already passed.
+
+        Args:
+            stage (str): Name of the pipeline stage, for the error message.
+
+        Raises:
+            DeadlineExceededError: If the deadline has passed.
+        """
+        if self.expired:
+            raise DeadlineExceededError(stage)
+
+
+@asynccontextmanager
+async def enforce_deadline(deadline: Optional[Deadline], stage: str):
+    """
+    Cancels the enclosed work when the deadline passes.
+
+    Args:
+        deadline (Optional[Deadline]): The request deadline. No-op when None.
+        stage (str): Name of the pipeline stage, for the error message.
+
+    Raises:
+        DeadlineExceededError: If the deadline passes before the work completes.
+    """
+    if deadline is None:
+        yield
+        return
+    deadline.check(stage)
+    scope = asyncio.timeout(deadline.remaining())
+    try:
+        async with scope:
+            yield
+    except TimeoutError as e:
+        if scope.expired():
+            raise DeadlineExceededError(stage) from e
+        raise
+
+
+async def run_until_disconnected(awaitable: Awaitable[T], request: Request) -> T:
+    """
+    Runs work for a request and cancels it as soon as the client disconnects.
+
+    Args:
+        awaitable (Awaitable[T]): The work to run.
+        request (Request): The incoming request to watch.
+
+    Returns:
+        T: The result of the work.
+
+    Raises:
+        ClientDisconnectedError: If the client disconnected before the work completed.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {task}, timeout=settings.DISCONNECT_POLL_INTERVAL
+            )
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnectedError()
+    finally:
+        # Also covers cancellation of the endpoint itself, e.g. on server shutdown
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from services.configs.config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor: Pool used to run CPU-bound work off the event loop.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS or os.cpu_count()
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stops the shared process pool's workers, e.g. on shutdown."""
+    global _process_pool
+    if _process_pool is not None:
+        pool, _process_pool = _process_pool, None
+        pool.shutdown(cancel_futures=True)
+
+
+def _reset_process_pool():
+    global _process_pool
+    _process_pool = None
+
+
+# A forked child cannot use its parent's pool; it starts its own on first use
+os.register_at_fork(after_in_child=_reset_process_pool)
+
+
+def should_offload(size: int) -> bool:
+    """
+    Decides whether a payload is big enough to be worth sending to the process pool.
+
+    Args:
+        size (int): Size of the payload in bytes (or characters).
+
+    Returns:
+        bool: True if the work should run in the process pool.
+    """
+    return size >= settings.CPU_OFFLOAD_THRESHOLD_BYTES
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any, size: int) -> Any:
+    """
+    Runs a CPU-bound function inline for small payloads or in the process pool for big ones.
+
+    Small payloads stay inline because pickling them to a worker process costs more
+    than the work itself.
+
+    Args:
+        func (Callable): A picklable, module-level function.
+        *args: Picklable arguments passed to the function.
+        size (int): Size of the payload, compared against the offload threshold.
+
+    Returns:
+        Any: The function's return value.
+    """
+    if not should_offload(size):
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
@@ -0,0 +1,36 @@
+from typing import Tuple
+from urllib.parse import urlsplit
+
+
+def normalize_repo_url(repo_url) -> str:
+    """
+    Normalizes a repository URL, so every spelling of a repository maps to the
+    same cache keys, locks and stored reviews.
+
+    GitHub owner and repository names are case-insensitive, so the URL is
+    lowercased, with any trailing slash, ".git" suffix, query and fragment removed.
+
+    Args:
+        repo_url: URL of the repository, as a string or a pydantic HttpUrl.
+
+    Returns:
+        str: The normalized URL, e.g. https://github.com/owner/repo.
+    """
+    parts = urlsplit(str(repo_url).strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/").removesuffix(".git").rstrip("/").lower()
+    return f"{parts.scheme.lower() or 'https'}://{host}{path}"
+
+
+def owner_and_repo(repo_url) -> Tuple[str, str]:
+    """
+    Extracts the owner and repository name from a repository URL.
+
+    Args:
+        repo_url: URL of the repository.
+
+    Returns:
+        Tuple[str, str]: The owner and the repository name.
+    """
+    owner, repo = normalize_repo_url(repo_url).split("/")[-2:]
+    return owner, repo
@@ -22,6 +22,7 @@ logging_config = {
             "level": "INFO",
             "maxBytes": 10485760,  # 10 MB
             "backupCount": 5,
+            "delay": True,  # open app.log on the first record, not at startup
         },
     },
     "loggers": {
@@ -34,4 +35,12 @@ logging_config = {
     },
 }
 
-logging.config.dictConfig(logging_config)
+
+def configure_logging():
+    """
+    Applies the application's logging configuration.
+
+    Called once per process at startup rather than on import, so importing a module
+    never reconfigures logging or opens the log file.
+    """
+    logging.config.dictConfig(logging_config)
@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Iterable, Optional
+
+# Prefix stripped from file names in frame labels
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def frame_label(frame: FrameType) -> str:
+    """
+    Labels a stack frame for a flame graph.
+
+    Args:
+        frame (FrameType): The frame.
+
+    Returns:
+        str: "function (file:line)", with app files relative to the app root.
+    """
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT + os.sep):
+        filename = filename[len(_ROOT) + 1 :]
+    # Semicolons separate frames in the folded format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def stack_labels(frame: Optional[FrameType]) -> tuple:
+    """
+    Labels a stack, outermost frame first.
+
+    Args:
+        frame (Optional[FrameType]): The innermost frame.
+
+    Returns:
+        tuple: The frame labels.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of running threads from a background thread.
+
+    Sampling costs the profiled threads nothing but the GIL hand-offs, so it can
+    run against a serving worker. The result is in the folded format read by
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids: Iterable[int] = ()):
+        """
+        Initializes the profiler.
+
+        Args:
+            interval (float): Seconds between samples.
+            thread_ids (Iterable[int]): Threads to sample; all but the
+                profiler's own if empty.
+        """
+        self.interval = interval
+        self.thread_ids = set(thread_ids)
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        """Records the current stack of each profiled thread once."""
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (
+                self.thread_ids and thread_id not in self.thread_ids
+            ):
+                continue
+            self.samples[stack_labels(frame)] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        """Starts sampling in a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling and waits for the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def folded(self) -> str:
+        """
+        Renders the samples as folded stacks.
+
+        Returns:
+            str: One "outer;...;inner count" line per distinct stack, most
+            sampled first.
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.samples.most_common()
+            if stack
+        )
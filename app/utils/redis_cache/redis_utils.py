@@ -1,8 +1,319 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import List, Optional
 from redis.asyncio import Redis
+from models.repository_models import RepositoryFile, Result
+from models.request_models import ReviewResponse
+from models.storage_models import CachedReview
 from services.configs.config import settings
+from utils.github.github_utils import normalize_repo_url
+from utils.sharding.sharding_utils import ShardedRedis, parse_namespace_urls
 
-redis_client = Redis.from_url(settings.REDIS_URL)
+logger = logging.getLogger("CodeReviewAI")
+
+# Starts the header line of cache entries; older entries are JSON documents
+CACHE_ENTRY_HEADER = "review/2"
+
+_redis_client: Optional[Redis] = None
 
 
 async def get_redis_client() -> Redis:
-    return Redis(host="redis", port=6379, decode_responses=True)
+    """
+    Returns the shared Redis client, creating it on first use.
+
+    The client owns a connection pool, so requests reuse connections instead of
+    opening a new one each time.
+
+    Returns:
+        Redis: Client for REDIS_URL, or a ShardedRedis client when REDIS_URLS or
+        REDIS_NAMESPACE_URLS list several nodes.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = build_redis_client()
+    return _redis_client
+
+
+def build_redis_client() -> Redis:
+    """Builds a client for the configured Redis node or nodes."""
+    urls = [url.strip() for url in settings.REDIS_URLS.split(",") if url.strip()]
+    namespace_urls = parse_namespace_urls(settings.REDIS_NAMESPACE_URLS)
+    if len(urls) <= 1 and not namespace_urls:
+        return Redis.from_url(
+            urls[0] if urls else settings.REDIS_URL, decode_responses=True
+        )
+    return ShardedRedis.from_urls(
+        urls or [settings.REDIS_URL],
+        namespace_urls,
+        replicas=settings.REDIS_RING_REPLICAS,
+        decode_responses=True,
+    )
+
+
+async def close_redis_client():
+    """Closes the shared Redis client and its connections, e.g. on shutdown."""
+    global _redis_client
+    if _redis_client is not None:
+        client, _redis_client = _redis_client, None
+        await client.aclose()
+
+
+def _reset_redis_client():
+    global _redis_client
+    _redis_client = None
+
+
+# Sockets must not be shared across a fork; each worker opens its own pool
+os.register_at_fork(after_in_child=_reset_redis_client)
+
+
+def key_digest(value: str) -> str:
+    """
+    Hashes an unbounded key component, e.g. a URL, into a short stable digest.
+
+    Args:
+        value (str): The component.
+
+    Returns:
+        str: 32 hex characters.
+    """
+    return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+
+
+def repo_tag(repo_url: str) -> str:
+    """
+    Returns the hash tag shared by every key of a repository.
+
+    Keys are namespaced ("review:", "snapshot:", ...) and carry a {hash tag}: keys
+    with the same tag land on the same node, as in Redis Cluster, so a
+    repository's review keys and review index can be read and written together.
+    URLs are normalized first, so "https://github.com/a/b.git" and
+    "https://github.com/a/b/" share their keys.
+
+    Args:
+        repo_url (str): URL of the GitHub repository.
+
+    Returns:
+        str: The tag, braces included.
+    """
+    return f"{{{key_digest(normalize_repo_url(repo_url))}}}"
+
+
+def hash_assignment(assignment_description: str) -> str:
+    """
+    Hashes an assignment description for use in cache keys and the review store.
+
+    Args:
+        assignment_description (str): The assignment description.
+
+    Returns:
+        str: A short, stable hex digest.
+    """
+    return hashlib.sha256(assignment_description.strip().encode()).hexdigest()[:16]
+
+
+def review_cache_key(
+    repo_url: str,
+    candidate_level: str,
+    assignment_hash: str,
+    route_name: str,
+    prompt_version: str,
+) -> str:
+    return (
+        f"review:{repo_tag(repo_url)}:{candidate_level}:{assignment_hash}:"
+        f"{prompt_version}:{route_name}"
+    )
+
+
+def review_index_key(repo_url: str) -> str:
+    return f"review:{repo_tag(repo_url)}:index"
+
+
+def review_cache_retention() -> int:
+    """Seconds a cached review is kept: fresh for REVIEW_CACHE_TTL, then stale."""
+    return settings.REVIEW_CACHE_TTL + settings.REVIEW_STALE_GRACE
+
+
+async def cache_review(
+    redis: Redis,
+    repo_url: str,
+    cache_key: str,
+    review: ReviewResponse,
+    commit_sha: Optional[str] = None,
+):
+    """
+    Caches a review and records its key in the repository's review index.
+
+    The entry outlives REVIEW_CACHE_TTL by REVIEW_STALE_GRACE, during which it is
+    served as stale while a fresh review is generated in the background.
+
+    Args:
+        redis (Redis): Redis client.
+        repo_url (str): URL of the GitHub repository.
+        cache_key (str): Key built by review_cache_key.
+        review (ReviewResponse): The review.
+        commit_sha (Optional[str]): Commit the review was generated for.
+    """
+    entry = CachedReview(
+        review_json=review.model_dump_json(),
+        created_at=time.time(),
+        commit_sha=commit_sha,
+    )
+    index_key = review_index_key(repo_url)
+    retention = review_cache_retention()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(cache_key, serialize_cached_review(entry), ex=retention)
+        pipe.sadd(index_key, cache_key)
+        pipe.expire(index_key, retention)
+        await pipe.execute()
+
+
+def serialize_cached_review(entry: CachedReview) -> str:
+    """
+    Serializes a cache entry: a header line with its metadata, then the review JSON.
+
+    Compact JSON never contains a raw newline, so the header ends at the first one
+    and the review is stored, and read back, as is.
+
+    Args:
+        entry (CachedReview): The entry.
+
+    Returns:
+        str: The value to cache.
+    """
+    created_at = "-" if entry.created_at is None else repr(entry.created_at)
+    return (
+        f"{CACHE_ENTRY_HEADER} {created_at} {entry.commit_sha or '-'}\n"
+        f"{entry.review_json}"
+    )
+
+
+def parse_cached_review(value: str) -> CachedReview:
+    """
+    Parses a cache entry, including entries in the formats cached before.
+
+    Only the header line is parsed; the review was validated when it was cached
+    and is kept as the JSON it was cached as.
+
+    Args:
+        value (str): The cached value.
+
+    Returns:
+        CachedReview: The entry. Bare reviews have no age and count as fresh.
+
+    Raises:
+        ValueError: If the value is neither an entry nor a review.
+    """
+    if value.startswith(CACHE_ENTRY_HEADER):
+        header, _, review_json = value.partition("\n")
+        _, created_at, commit_sha = header.split(" ")
+        return CachedReview.model_construct(
+            review_json=review_json,
+            created_at=None if created_at == "-" else float(created_at),
+            commit_sha=None if commit_sha == "-" else commit_sha,
+        )
+    # Entries cached as a JSON envelope, with the review as a string or an
+    # object, or bare reviews without an age
+    try:
+        return CachedReview.model_validate_json(value)
+    except ValueError:
+        data = json.loads(value)
+    if isinstance(data, dict) and isinstance(data.get("review"), dict):
+        return CachedReview(
+            review_json=ReviewResponse.model_validate(data["review"]).model_dump_json(),
+            created_at=data.get("created_at"),
+            commit_sha=data.get("commit_sha"),
+        )
+    return CachedReview(
+        review_json=ReviewResponse.model_validate(data).model_dump_json()
+    )
+
+
+async def invalidate_reviews(redis: Redis, repo_url: str) -> int:
+    """
+    Deletes every cached review of a repository, e.g. after a push.
+
+    Uses the repository's review index rather than scanning the keyspace, so the
+    cost does not grow with the number of repositories sharing the Redis instance.
+
+    Args:
+        redis (Redis): Redis client.
+        repo_url (str): URL of the GitHub repository.
+
+    Returns:
+        int: Number of deleted keys.
+    """
+    index_key = review_index_key(repo_url)
+    keys = list(await redis.smembers(index_key))
+    if not keys:
+        return 0
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(*keys)
+        pipe.srem(index_key, *keys)
+        deleted, _ = await pipe.execute()
+    return deleted
+
+
+def starter_key(repo_url: str) -> str:
+    return f"starter:{repo_tag(repo_url)}"
+
+
+def file_index_key(blob_sha: str, language: str) -> str:
+    return f"file-index:{{{blob_sha}}}:{language}"
+
+
+def usage_key(period: str, scope: str, scope_id: str) -> str:
+    # A day's counters share a node, so they are flushed in one transaction
+    return f"usage:{{{period}}}:{scope}:{scope_id}"
+
+
+def snapshot_key(repo_url: str) -> str:
+    return f"snapshot:{repo_tag(repo_url)}"
+
+
+async def load_snapshot(redis: Redis, repo_url: str) -> List[RepositoryFile]:
+    """
+    Loads repository files cached by an earlier, possibly interrupted, fetch.
+
+    Snapshot errors never fail the request; they only cost a full fetch.
+
+    Args:
+        redis (Redis): Redis client.
+        repo_url (str): URL of the GitHub repository.
+
+    Returns:
+        List[RepositoryFile]: The cached files, or an empty list.
+    """
+    try:
+        cached = await redis.get(snapshot_key(repo_url))
+        return Result.model_validate_json(cached).files if cached else []
+    except Exception as e:
+        logger.warning(f"Failed to load repository snapshot for {repo_url}: {e}")
+        return []
+
+
+async def save_snapshot(redis: Redis, repo_url: str, files: List[RepositoryFile]):
+    """
+    Caches fetched repository files so a retry can resume instead of restarting.
+
+    Args:
+        redis (Redis): Redis client.
+        repo_url (str): URL of the GitHub repository.
+        files (List[RepositoryFile]): The files fetched so far.
+    """
+    # Only per-file contents are kept; the combined string is rebuilt on resume
+    snapshot = Result(
+        code_contents="", file_contents=[file.path for file in files], files=files
+    )
+    try:
+        await redis.set(
+            snapshot_key(repo_url),
+            snapshot.model_dump_json(),
+            ex=settings.SNAPSHOT_TTL,
+        )
+        logger.info(f"Saved snapshot of {len(files)} files for {repo_url}.")
+    except Exception as e:
+        logger.warning(f"Failed to save repository snapshot for {repo_url}: {e}")
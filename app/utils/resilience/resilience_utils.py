@@ -0,0 +1,296 @@
+import asyncio
+import functools
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, TypeVar
+from fastapi import HTTPException
+from exceptions.excpetions import (
+    CircuitOpenError,
+    ClientDisconnectedError,
+    DeadlineExceededError,
+    InvalidRequestError,
+)
+from services.configs.config import settings
+
+logger = logging.getLogger("CodeReviewAI")
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_dependency_failure(error: BaseException) -> bool:
+    """
+    Decides whether an error says something about the dependency's health.
+
+    Client errors (4xx), our own deadlines, disconnects and cancellations do not;
+    server errors, timeouts and network errors do. The error's cause chain is
+    checked, since services wrap HTTP errors in their own exception types.
+
+    Args:
+        error (BaseException): The error raised by the dependency call.
+
+    Returns:
+        bool: True if the error should count against the circuit breaker.
+    """
+    if not isinstance(error, Exception):
+        return False
+    seen = error
+    while seen is not None:
+        if isinstance(
+            seen,
+            (
+                CircuitOpenError,
+                ClientDisconnectedError,
+                DeadlineExceededError,
+                InvalidRequestError,
+            ),
+        ):
+            return False
+        if isinstance(seen, asyncio.CancelledError):
+            return False
+        if isinstance(seen, HTTPException) and seen.status_code < 500:
+            return False
+        seen = seen.__cause__ or seen.__context__
+    return True
+
+
+class CircuitBreaker:
+    """
+    Fails calls to a dependency fast while it is down.
+
+    After failure_threshold consecutive failures the breaker opens and every call
+    is rejected with CircuitOpenError for reset_timeout seconds. It then goes
+    half-open and lets half_open_calls trial calls through: a success closes it,
+    a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_calls: int = 1,
+    ):
+        """
+        Initializes the breaker in the closed state.
+
+        Args:
+            name (str): Dependency name, used in errors and metrics.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            reset_timeout (float): Seconds to stay open before trial calls.
+            half_open_calls (int): Concurrent trial calls while half-open.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self._state = CLOSED
+        self.counts = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.retry_after() == 0:
+            self._state, self.trials = HALF_OPEN, 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets trial calls through."""
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allows_calls(self) -> bool:
+        """True if a call would be let through right now."""
+        state = self.state
+        return state == CLOSED or (
+            state == HALF_OPEN and self.trials < self.half_open_calls
+        )
+
+    def before_call(self):
+        """
+        Lets a call through or rejects it.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with its trial
+                calls in progress.
+        """
+        if not self.allows_calls():
+            self.counts["rejected"] += 1
+            raise CircuitOpenError(self.name, max(math.ceil(self.retry_after()), 1))
+        if self._state == HALF_OPEN:
+            self.trials += 1
+
+    def record_success(self):
+        if self._state != CLOSED:
+            logger.info(f"Circuit breaker {self.name} closed.")
+        self._state, self.consecutive_failures, self.trials = CLOSED, 0, 0
+        self.counts["successes"] += 1
+
+    def record_failure(self):
+        self.counts["failures"] += 1
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN or (
+            self._state == CLOSED
+            and self.consecutive_failures >= self.failure_threshold
+        ):
+            logger.warning(
+                f"Circuit breaker {self.name} opened after "
+                f"{self.consecutive_failures} consecutive failures."
+            )
+            self._state, self.opened_at, self.trials = OPEN, time.monotonic(), 0
+            self.counts["opened"] += 1
+
+    def record_ignored(self):
+        """Releases a trial call that ended without a verdict, e.g. cancelled."""
+        if self._state == HALF_OPEN and self.trials:
+            self.trials -= 1
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Runs the enclosed dependency call through the breaker.
+
+        Raises:
+            CircuitOpenError: If the call is not let through.
+        """
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            if is_dependency_failure(e):
+                self.record_failure()
+            else:
+                self.record_ignored()
+            raise
+        self.record_success()
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1) if self._state == OPEN else 0,
+            **self.counts,
+        }
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Returns this worker's breaker for a dependency, creating it on first use.
+
+    Args:
+        name (str): Dependency name, e.g. "github" or "llm:openai".
+
+    Returns:
+        CircuitBreaker: Breaker configured from the CIRCUIT_* settings.
+    """
+    if name not in _circuit_breakers:
+        _circuit_breakers[name] = CircuitBreaker(
+            name,
+            settings.CIRCUIT_FAILURE_THRESHOLD,
+            settings.CIRCUIT_RESET_TIMEOUT,
+            settings.CIRCUIT_HALF_OPEN_CALLS,
+        )
+    return _circuit_breakers[name]
+
+
+def circuit_breaker(name: str):
+    """
+    Decorates a coroutine function so every call goes through a breaker.
+
+    Args:
+        name (str): Dependency name.
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            async with get_circuit_breaker(name).guard():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+hedge_counts = {"calls": 0, "hedged": 0, "hedge_won": 0}
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Runs a call, and a second copy if the first is slower than delay seconds.
+
+    The first copy to succeed wins and the other is cancelled, which cuts the
+    latency tail caused by a few slow responses at the cost of a few extra
+    requests. Only use it for idempotent calls.
+
+    Args:
+        call (Callable[[], Awaitable[T]]): Starts one attempt of the call.
+        delay (float): Seconds to wait before hedging (0 = never hedge).
+
+    Returns:
+        T: Result of the first attempt that succeeds.
+
+    Raises:
+        Exception: The first attempt's error if every attempt fails.
+    """
+    hedge_counts["calls"] += 1
+    if delay <= 0:
+        return await call()
+    primary = asyncio.ensure_future(call())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    hedge_counts["hedged"] += 1
+    hedge = asyncio.ensure_future(call())
+    attempts = [primary, hedge]
+    try:
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for attempt in attempts:
+                if attempt in done and attempt.exception() is None:
+                    if attempt is hedge:
+                        hedge_counts["hedge_won"] += 1
+                    return attempt.result()
+        return primary.result()
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+def get_resilience_metrics() -> dict:
+    """
+    Returns circuit breaker states and hedging counts for this worker.
+
+    Returns:
+        dict: Breaker metrics by dependency name, and hedged request counts.
+    """
+    return {
+        "circuit_breakers": {
+            name: breaker.metrics() for name, breaker in _circuit_breakers.items()
+        },
+        "hedged_requests": dict(hedge_counts),
+    }
+
+
+def _reset_resilience_state():
+    _circuit_breakers.clear()
+    for key in hedge_counts:
+        hedge_counts[key] = 0
+
+
+# Breakers are per worker; a forked child starts with every breaker closed
+os.register_at_fork(after_in_child=_reset_resilience_state)
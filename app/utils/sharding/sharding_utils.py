@@ -0,0 +1,284 @@
+import asyncio
+import bisect
+import hashlib
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from redis.asyncio import Redis
+
+# Ring used for namespaces without a pool of their own
+DEFAULT_POOL = ""
+
+
+def ring_hash(value: str) -> int:
+    """Position of a value on the hash ring."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+    )
+
+
+def hash_tag(key: str) -> str:
+    """
+    Returns the part of a key that decides its shard.
+
+    As in Redis Cluster, a non-empty {hash tag} is used if the key has one, so
+    keys with the same tag are always on the same shard; otherwise the whole key.
+
+    Args:
+        key (str): A Redis key.
+
+    Returns:
+        str: The hash tag, or the key.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1 : end]
+    return key
+
+
+def key_namespace(key: str) -> str:
+    """Returns the namespace of a key: everything before its first colon."""
+    return key.split(":", 1)[0]
+
+
+def parse_namespace_urls(value: str) -> Dict[str, List[str]]:
+    """
+    Parses REDIS_NAMESPACE_URLS.
+
+    Args:
+        value (str): Pools as namespace=url,url entries separated by semicolons,
+            e.g. "snapshot=redis://a:6379,redis://b:6379;lock=redis://c:6379".
+
+    Returns:
+        Dict[str, List[str]]: Node URLs by namespace.
+    """
+    pools = {}
+    for entry in filter(None, (part.strip() for part in value.split(";"))):
+        namespace, _, urls = entry.partition("=")
+        pools[namespace.strip()] = [
+            url.strip() for url in urls.split(",") if url.strip()
+        ]
+    return pools
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys to nodes.
+
+    Each node is placed at many points of the ring, so keys spread evenly and
+    adding or removing a node only moves the keys of its own segments.
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 160):
+        """
+        Initializes the ring.
+
+        Args:
+            nodes (List[str]): Node names, e.g. their URLs.
+            replicas (int): Points per node on the ring.
+        """
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node.")
+        self.nodes = list(nodes)
+        points = sorted(
+            (ring_hash(f"{node}#{index}"), node)
+            for node in self.nodes
+            for index in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, value: str) -> str:
+        """Returns the node owning a value: the first point clockwise from it."""
+        index = bisect.bisect(self._hashes, ring_hash(value)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class ShardedRedis:
+    """
+    Redis client spreading keys over several nodes by consistent hashing.
+
+    A key's namespace selects a pool of nodes, so e.g. snapshots can live on
+    nodes with an allkeys-lru eviction policy while locks stay on noeviction
+    nodes, and its hash tag selects a node within the pool.
+
+    Single-key commands are routed by their key. MGET, DELETE and SCAN fan out
+    to every node involved. Scripts and transactions must only touch keys of one
+    node, which holds for keys sharing a hash tag.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, Redis],
+        pools: Dict[str, List[str]],
+        replicas: int = 160,
+    ):
+        """
+        Initializes the client.
+
+        Args:
+            clients (Dict[str, Redis]): Clients by node URL.
+            pools (Dict[str, List[str]]): Node URLs by namespace; DEFAULT_POOL
+                serves the namespaces without a pool of their own.
+            replicas (int): Points per node on each hash ring.
+        """
+        self.clients = clients
+        self._rings = {
+            namespace: HashRing(urls, replicas) for namespace, urls in pools.items()
+        }
+
+    @classmethod
+    def from_urls(
+        cls,
+        urls: List[str],
+        namespace_urls: Optional[Dict[str, List[str]]] = None,
+        replicas: int = 160,
+        **kwargs,
+    ) -> "ShardedRedis":
+        """
+        Builds a sharded client from node URLs.
+
+        Args:
+            urls (List[str]): Nodes of the default pool.
+            namespace_urls (Optional[Dict[str, List[str]]]): Nodes of dedicated
+                pools, by namespace.
+            replicas (int): Points per node on each hash ring.
+            **kwargs: Options of every node's client, e.g. decode_responses.
+
+        Returns:
+            ShardedRedis: The client.
+        """
+        pools = {DEFAULT_POOL: urls, **(namespace_urls or {})}
+        clients = {
+            url: Redis.from_url(url, **kwargs)
+            for pool in pools.values()
+            for url in pool
+        }
+        return cls(clients, pools, replicas)
+
+    def node_for(self, key: str) -> str:
+        """Returns the URL of the node holding a key."""
+        ring = self._rings.get(key_namespace(key), self._rings[DEFAULT_POOL])
+        return ring.node_for(hash_tag(key))
+
+    def client_for(self, key: str) -> Redis:
+        """Returns the client of the node holding a key."""
+        return self.clients[self.node_for(key)]
+
+    def group_by_node(self, keys: List[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """Groups keys by node, with their positions in the list."""
+        groups = defaultdict(list)
+        for position, key in enumerate(keys):
+            groups[self.node_for(key)].append((position, key))
+        return groups
+
+    def __getattr__(self, name: str):
+        # Single-key commands, e.g. get, set, hincrby or exists with one key
+        async def command(key: str, *args, **kwargs):
+            return await getattr(self.client_for(key), name)(key, *args, **kwargs)
+
+        return command
+
+    async def mget(self, keys: List[str], *args) -> List[Optional[Any]]:
+        keys = list(keys) + list(args)
+        groups = self.group_by_node(keys)
+        values = await asyncio.gather(
+            *(
+                self.clients[node].mget([key for _, key in group])
+                for node, group in groups.items()
+            )
+        )
+        results = [None] * len(keys)
+        for group, group_values in zip(groups.values(), values):
+            for (position, _), value in zip(group, group_values):
+                results[position] = value
+        return results
+
+    async def delete(self, *keys: str) -> int:
+        groups = self.group_by_node(list(keys))
+        deleted = await asyncio.gather(
+            *(
+                self.clients[node].delete(*(key for _, key in group))
+                for node, group in groups.items()
+            )
+        )
+        return sum(deleted)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        keys = keys_and_args[:numkeys]
+        nodes = {self.node_for(key) for key in keys}
+        if len(nodes) > 1:
+            raise ValueError(f"Script keys are on several nodes: {list(keys)}")
+        client = self.client_for(keys[0]) if keys else self._any_client()
+        return await client.eval(script, numkeys, *keys_and_args)
+
+    async def scan_iter(self, match: Optional[str] = None, **kwargs) -> AsyncIterator:
+        for client in self.clients.values():
+            async for key in client.scan_iter(match=match, **kwargs):
+                yield key
+
+    async def ping(self) -> bool:
+        await asyncio.gather(*(client.ping() for client in self.clients.values()))
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "ShardedPipeline":
+        return ShardedPipeline(self, transaction)
+
+    async def aclose(self):
+        await asyncio.gather(*(client.aclose() for client in self.clients.values()))
+
+    def _any_client(self) -> Redis:
+        return next(iter(self.clients.values()))
+
+
+class ShardedPipeline:
+    """
+    Pipeline of a ShardedRedis client.
+
+    Commands are routed by their first key and sent as one pipeline per node. A
+    transaction must only touch keys of one node.
+    """
+
+    def __init__(self, redis: ShardedRedis, transaction: bool):
+        self.redis = redis
+        self.transaction = transaction
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "ShardedPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        def command(key: str, *args, **kwargs) -> "ShardedPipeline":
+            self._commands.append((name, (key,) + args, kwargs))
+            return self
+
+        return command
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        groups = self.redis.group_by_node([args[0] for _, args, _ in commands])
+        if self.transaction and len(groups) > 1:
+            keys = [args[0] for _, args, _ in commands]
+            raise ValueError(f"Transaction keys are on several nodes: {keys}")
+
+        async def run(node: str, group: List[Tuple[int, str]]) -> List[Any]:
+            async with self.redis.clients[node].pipeline(
+                transaction=self.transaction
+            ) as pipe:
+                for position, _ in group:
+                    name, args, kwargs = commands[position]
+                    getattr(pipe, name)(*args, **kwargs)
+                return await pipe.execute()
+
+        values = await asyncio.gather(
+            *(run(node, group) for node, group in groups.items())
+        )
+        results = [None] * len(commands)
+        for group, group_values in zip(groups.values(), values):
+            for (position, _), value in zip(group, group_values):
+                results[position] = value
+        return results